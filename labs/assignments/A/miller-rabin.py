@@ -1,5 +1,10 @@
-import string
-from assignments.utils import Style, Formatting
+from typing import Iterator
+
+from assignments.render import Renderer
+from assignments.steps import MillerRabinDecomposition, MillerRabinError, MillerRabinIteration, \
+    MillerRabinPowersOfTwo, MillerRabinResult, MillerRabinStart
+from assignments.utils import Style
+from pkc.instrumentation import metrics
 
 
 def is_set(number, n):
@@ -14,7 +19,7 @@ def repeated_squaring_modular_exponentiation(base: int, exponent: int, modulus:
     if exponent == 0:
         return result
 
-    fragment: int = base
+    fragment: int = base % modulus
 
     if is_set(exponent, 0):
         result = fragment
@@ -23,6 +28,10 @@ def repeated_squaring_modular_exponentiation(base: int, exponent: int, modulus:
         if is_set(exponent, bit_position):
             result = (result * fragment) % modulus
 
+    if metrics.enabled:
+        metrics.count('miller_rabin.powmod')
+        # one squaring for every bit after the lowest one, one multiplication for every set bit after the lowest
+        metrics.count('miller_rabin.mulmod', exponent.bit_length() - 1 + bin(exponent >> 1).count('1'))
     return result
 
 
@@ -32,116 +41,90 @@ def compute_from_number_exponent_of_factor(number: int, factor: int):
     exponent = 0
     while number % factor == 0:
         exponent += 1
-        number /= factor
+        number //= factor
     return exponent
 
 
-def binary_representation_of_number(number: int):
-    return bin(number)[2:]
-
-
-def print_necessary_powers_of_two(modulus: int, t: int):
-    for necessary_power in range(10):
-        end_type: string
-        computed_value: string
-
-        if necessary_power == 4 or necessary_power == 9:
-            end_type = "\n"
-        else:
-            end_type = "\t\t\t"
-
-        if necessary_power < t.bit_length():
-            computed_value = str(2 ** (2 ** necessary_power) % modulus)
-        else:
-            computed_value = "x"
-
-        print("2{} = ".format(Formatting.superscript(f"(2^{necessary_power})"))
-              + Style.YELLOW + f"{computed_value}" + Style.RESET,
-              end=end_type)
-
-
-def miller_rabin(number: int, expected_sequence_size: int = 5):
-    print("n = " + Style.YELLOW + str(number) + Style.RESET, end="\n\n")
+def miller_rabin_steps(number: int, trace: bool = True) -> Iterator[tuple]:
+    """
+    Runs the Miller-Rabin test with the bases 2, 3 and 5
+        n - 1 = 2^s * t, with t odd
+        n passes the test for the base a if a^t = 1 mod n or a^(2^r * t) = n - 1 mod n for some 0 <= r < s
+    :param trace: if True, a record is emitted for every step, otherwise only the result (or the error) is
+    :return: the step records (see assignments.steps), the last one being a MillerRabinResult, or a
+             MillerRabinError if n does not meet the conditions of the test
+    """
+    if trace:
+        yield MillerRabinStart(number)
 
     if number <= 2:
-        print(Style.RED + "ERROR: Condition not met. (" + Style.CYAN + "n >= 3" + Style.RED + ")" + Style.RESET)
+        yield MillerRabinError("n >= 3")
         return
     elif number % 2 == 0:
-        print(Style.RED + "ERROR: Condition not met. (" + Style.CYAN + "n odd" + Style.RED + ")" + Style.RESET)
+        yield MillerRabinError("n odd")
         return
 
-    print("Decomposition:")
-
     # In order to get s and t, we know that:
     # n - 1 = 2^s * t
     s: int = compute_from_number_exponent_of_factor(number - 1, 2)
-    print("s = " + Style.YELLOW + str(s) + Style.RESET, end="\t\t\t")
-
     t: int = (number - 1) >> s
     # It's similar to (n-1)/2^s.
     # Reference: https://wiki.python.org/moin/BitwiseOperators
-    print("t = " + Style.YELLOW + str(t) + Style.RESET, end="\t\t\t")
-    print("t (in binary) = " + Style.YELLOW + binary_representation_of_number(t) + Style.RESET, end="\n\n")
-
-    iteration_count = 1
-    is_not_prime_lazy_check: bool = False
-    for a in [2, 3, 5]:
-        is_possibly_prime: bool = False
-
-        print("Iteration "
-              + Style.YELLOW + f"k = {iteration_count}" + Style.RESET
-              + " for "
-              + Style.YELLOW + f"a = {a}" + Style.RESET
-              + " (results mod "
-              + Style.YELLOW + "n" + Style.RESET
-              + "):")
+    if trace:
+        yield MillerRabinDecomposition(s, t)
 
-        sequence = []
+    is_prime: bool = True
+    for k, a in enumerate([2, 3, 5], start=1):
+        if metrics.enabled:
+            metrics.count('miller_rabin.iterations')
 
         # we need to compute a^t, a^(2t), a^(4t), ..., a^(2^s * t)
         # Step 2 of https://moodle.cs.ubbcluj.ro/pluginfile.php/46227/mod_resource/content/1/pkc-c03.pdf#page=20
-        if a == 2:
-            print_necessary_powers_of_two(number, t)
-            print()
-
-        # The Sequence Size will ALWAYS BE s + 1.
-        # The quiz contains an expected Sequence Size of 5, but populates the remaining with "x"
-        for r in range(expected_sequence_size):
-            current_sequence_value: string
-            if r < s + 1 and not is_not_prime_lazy_check:
-                current_sequence_value = repeated_squaring_modular_exponentiation(a, 2 ** r * t, number)
-                sequence.append(current_sequence_value)
-            else:
-                current_sequence_value = "x"
-
-            end_type: string
-            if r == expected_sequence_size - 1:
-                end_type = "\n"
-            else:
-                end_type = "\t\t\t"
-
-            print("{}{} = ".format(a, Formatting.superscript(f"2^{r}t"))
-                  + Style.YELLOW + f"{current_sequence_value}" + Style.RESET, end=end_type)
+        if trace and a == 2:
+            yield MillerRabinPowersOfTwo(tuple(pow(2, 2 ** j, number) for j in range(min(10, t.bit_length()))))
+
+        if not is_prime:
+            # n was already proven composite by a previous base
+            yield MillerRabinIteration(k, a, (), False)
+            continue
+        if a % number == 0:
+            # n = 3 or n = 5: the base is a multiple of n, so it cannot witness anything
+            if trace:
+                yield MillerRabinIteration(k, a, (), True)
+            continue
+
+        # The Sequence Size will ALWAYS BE s + 1: the first term is a^t, every next one is the previous one squared.
+        with metrics.phase('miller_rabin.powmod'):
+            value = repeated_squaring_modular_exponentiation(a, t, number)
+        sequence = [value]
+        for _ in range(s):
+            value = value * value % number
+            sequence.append(value)
+        if metrics.enabled:
+            metrics.count('miller_rabin.mulmod', s)
 
         # Step 3 of https://moodle.cs.ubbcluj.ro/pluginfile.php/46227/mod_resource/content/1/pkc-c03.pdf#page=20
-        if not is_not_prime_lazy_check:
-            if sequence[0] == 1:
-                is_possibly_prime = True
-            else:
-                for pair in list(zip(sequence[:-1], sequence[1:])):
-                    if pair[0] == number - 1 and pair[1] == 1:
-                        is_possibly_prime = True
-                        break
-            if not is_possibly_prime:
-                is_not_prime_lazy_check = True
-
-        iteration_count += 1
-        print()
-
-    print("Conclusion:", end="\n\n")
-    print("n is prime (yes/no)= " + Style.YELLOW + ("yes" if is_possibly_prime else "no") + Style.RESET)
-    print(Style.MAGENTA + f"Don't trust me? Try a Miller-Rabin calculator https://planetcalc.com/8995/" + Style.RESET,
-          end="\n\n\n")
+        is_possibly_prime: bool = sequence[0] == 1 or number - 1 in sequence[:-1]
+        if trace:
+            yield MillerRabinIteration(k, a, tuple(sequence), is_possibly_prime)
+        if not is_possibly_prime:
+            is_prime = False
+            if not trace:
+                break
+
+    yield MillerRabinResult(number, is_prime)
+
+
+def miller_rabin(number: int) -> bool:
+    """
+    Runs the Miller-Rabin test with the bases 2, 3 and 5, without tracing it
+    :return: True if n is probably prime, False if it is composite
+    :raises ValueError: if n < 3 or n is even
+    """
+    result = next(miller_rabin_steps(number, trace=False))
+    if isinstance(result, MillerRabinError):
+        raise ValueError(f"Condition not met: {result.condition}")
+    return result.is_prime
 
 
 # This Function is used STRICTLY for solving Assignment A on Moodle,
@@ -155,7 +138,7 @@ def show_ui_exam_version(page_count: int = 2):
                 print(f"PAGE {page + 1}/2")
                 user_input = int(input("Use the Miller-Rabin test to decide whether the number is prime or not. "
                                        "Number: "))
-                miller_rabin(user_input)
+                Renderer().render(miller_rabin_steps(user_input))
                 break
             except ValueError:
                 print(Style.RED + "ERROR: Input is NOT a number." + Style.RESET, end="\n\n")
@@ -166,5 +149,5 @@ if __name__ == '__main__':
     show_ui_exam_version()
 
     # The hardcoded variants as alternative. Uncomment them and replace them with whatever numbers you have.
-    # miller_rabin(7121)
-    # miller_rabin(1521)
+    # Renderer().render(miller_rabin_steps(7121))
+    # Renderer().render(miller_rabin_steps(1521))
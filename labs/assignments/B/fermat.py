@@ -1,56 +1,74 @@
 import math
-from typing import Union
+import time
+from typing import Iterator, Optional, Union
 
-from utils import Style, Formatting
+from assignments.render import Renderer
+from assignments.steps import FermatIteration, FermatResult, FermatStart
+from assignments.utils import Style
+from pkc.instrumentation import metrics
 
 
 class Fermat:
 
     @staticmethod
-    def algorithm(number: int, iteration_count: int = 20):
-        print("n = " + Style.YELLOW + str(number) + Style.RESET, end="\n\n")
-
+    def steps(number: int, iteration_count: int = 20, trace: bool = True) -> Iterator[tuple]:
+        """
+        Runs Fermat's method: for t = t0 + 1, ..., t0 + iteration_count, where t0 = [√n], checks whether t^2 - n
+        is a perfect square s^2, in which case n = (t - s) * (t + s)
+        :param trace: if True, a record is emitted for every step, otherwise only the result is
+        :return: the step records (see assignments.steps), the last one being a FermatResult
+        """
         # math.inqrt() returns the integer square root of the non-negative integer n.
         # Its equivalence would be the floor of the exact square root of n.
         # Reference: https://docs.python.org/3.8/library/math.html#math.isqrt
         t0: int = math.isqrt(number)
-        print("Initialization:")
-        print("t0 = [√n] = " + Style.YELLOW + str(t0) + Style.RESET, end="\n\n")
+        if trace:
+            yield FermatStart(number, t0, iteration_count)
 
         final_s: Union[int, None] = None
         final_t: Union[int, None] = None
-        found: bool = False
 
-        print("Iterations:")
+        iterations = 0
+        # timed by hand, without the yields (the consumer renders the records meanwhile)
+        timed = metrics.enabled
+        search_ns = 0
         for t in range(t0 + 1, t0 + iteration_count + 1):
-            print(f"t = t0 + {t - t0}", end=": ")
-
-            t_squared_minus_n = t ** 2 - number
-            print("t" + Formatting.superscript(str(2)) + " - n = "
-                  + Style.YELLOW + f"{t_squared_minus_n if not found else 'x'}" + Style.RESET,
-                  end="   ")
-
-            s_float = math.sqrt(t_squared_minus_n)
-            s_int = math.isqrt(t_squared_minus_n)
-            print(f"perfect square (yes/no) = "
-                  + Style.YELLOW + f"{'x' if found else 'yes' if s_float == s_int else 'no'}" + Style.RESET)
-            if s_float == s_int:
-                found = True
-                final_s = s_int
+            if timed:
+                start = time.perf_counter_ns()
+            iterations += 1
+            t_squared_minus_n = t * t - number
+            s = math.isqrt(t_squared_minus_n)
+            is_square = s * s == t_squared_minus_n
+            if timed:
+                search_ns += time.perf_counter_ns() - start
+            if trace:
+                yield FermatIteration(t - t0, t_squared_minus_n, is_square)
+            if is_square:
+                final_s = s
                 final_t = t
-        print("")
+                break
 
-        print("Values:")
-        print("s = " + Style.YELLOW + str(final_s) + Style.RESET, end="\t")
-        print("t = " + Style.YELLOW + str(final_t) + Style.RESET, end="\n\n")
+        if timed:
+            metrics.add_time('fermat.search', search_ns)
+            metrics.count('fermat.iterations', iterations)
+            metrics.count('fermat.square', iterations)
+            metrics.count('fermat.isqrt', iterations + 1)
 
-        first_factor: int
-        second_factor: int
-        first_factor, second_factor = sorted((final_t - final_s, final_t + final_s))
-        print("Conclusion:")
-        print("The obtained two factors of are (in increasing order!)", end=" ")
-        print(Style.YELLOW + f"{first_factor}" + Style.RESET + " and " +
-              Style.YELLOW + f"{second_factor}" + Style.RESET)
+        if final_t is None:
+            yield FermatResult(None, None, None, None)
+        else:
+            yield FermatResult(final_s, final_t, final_t - final_s, final_t + final_s)
+
+    @staticmethod
+    def algorithm(number: int, iteration_count: int = 20) -> Optional[tuple[int, int]]:
+        """
+        Runs Fermat's method without tracing it
+        :return: the two factors found (in increasing order), or None if none was found in iteration_count steps
+        """
+        result = next(Fermat.steps(number, iteration_count, trace=False))
+        if result.t is None:
+            return None
+        return result.first_factor, result.second_factor
 
     @staticmethod
     def show_ui_exam_version(page_count: int = 1):
@@ -59,7 +77,7 @@ class Fermat:
                 try:
                     user_input = int(input("Use Fermat's method to determine the decomposition of the number into two "
                                            "factors. Number: "))
-                    Fermat.algorithm(user_input)
+                    Renderer().render(Fermat.steps(user_input))
                     break
                 except ValueError:
                     print(Style.RED + "ERROR: Input is NOT a number." + Style.RESET, end="\n\n")
@@ -1,6 +1,6 @@
-from B.fermat import Fermat
-from B.pollard import Pollard
-from utils import Style
+from assignments.B.fermat import Fermat
+from assignments.B.pollard import Pollard
+from assignments.utils import Style
 
 
 def show_ui_exam_version():
@@ -34,8 +34,8 @@ if __name__ == '__main__':
     show_ui_exam_version()
 
     # The hardcoded variants as alternative. Uncomment them and replace them with whatever numbers you have.
-    # Fermat.algorithm(9699)
-    # Pollard.algorithm(9983)
+    # Renderer().render(Fermat.steps(9699))
+    # Renderer().render(Pollard.steps(9983))
     #
-    # Fermat.algorithm(7097)
-    # Pollard.algorithm(6641)
+    # Renderer().render(Fermat.steps(7097))
+    # Renderer().render(Pollard.steps(6641))
@@ -1,60 +1,86 @@
-from typing import Callable, Union
+import time
+from typing import Callable, Iterator, Optional, Union
 
-from utils import Style, Formatting
-
-
-def greatest_common_divisor(a: int, b: int) -> int:
-    # A more efficient method is the Euclidean algorithm, a variant in which the difference of the two numbers a and
-    # b is replaced by the remainder of the Euclidean division (also called division with remainder) of a by b.
-    if b == 0:
-        return a
-    else:
-        # Denoting this remainder as a mod b, the algorithm replaces (a, b) by (b, a mod b) repeatedly until the pair
-        # is (d, 0), where d is the greatest common divisor.
-        return greatest_common_divisor(b, a % b)
+from assignments.render import Renderer
+from assignments.steps import PollardIteration, PollardResult, PollardStart
+from assignments.utils import Style, Formatting
+from pkc.instrumentation import metrics
+from pkc.numtheory import gcd
 
 
 class Pollard:
 
     @staticmethod
-    def algorithm(number: int, x0: int = 2, f: Callable[[int], int] = lambda x: x ** 2 + 1):
-        print("n = " + Style.YELLOW + str(number) + Style.RESET, end="\n\n")
-
-        x_sequence: dict[int, int] = {0: x0}
-
-        print("Iterations (results mod "
-              + Style.YELLOW + "n" + Style.RESET
-              + "):")
+    def steps(number: int, x0: int = 2, f: Callable[[int], int] = lambda x: x ** 2 + 1, iteration_count: int = 10,
+              trace: bool = True) -> Iterator[tuple]:
+        """
+        Runs Pollard's rho method: x_i = f(x_(i-1)) mod n and, for k = 1, ..., iteration_count, the divisor
+        (x_2k - x_k, n) is computed until it is a proper divisor of n
+        Only x_k and x_2k are kept (Floyd's cycle finding), instead of the whole sequence.
+        :param trace: if True, a record is emitted for every step, otherwise only the result is
+        :return: the step records (see assignments.steps), the last one being a PollardResult
+        """
+        if trace:
+            yield PollardStart(number, iteration_count)
 
         final_divisor: Union[int, None] = None
-        found: bool = False
-
-        for index in range(1, 20 + 1, 2):
-            x_sequence[index] = f(x_sequence[index - 1]) % number
-            print(f"x{Formatting.subscript(str(index))} = "
-                  + Style.YELLOW + f"{x_sequence[index] if not found else 'x'}" + Style.RESET, end="  ")
-
-            x_sequence[index + 1] = f(x_sequence[index]) % number
-            print(f"x{Formatting.subscript(str(index))} = "
-                  + Style.YELLOW + f"{x_sequence[index + 1] if not found else 'x'}" + Style.RESET, end="  ")
-
-            divisor = greatest_common_divisor(abs(x_sequence[index + 1] - x_sequence[(index + 1) // 2]), number)
-
-            print(f"(x{Formatting.subscript(str(index + 1))} - x{Formatting.subscript(str((index + 1) // 2))}, n) = "
-                  + Style.YELLOW + f"{divisor if not found else 'x'}" + Style.RESET)
 
+        # x_k and x_2k
+        tortoise = hare = x0 % number
+        iterations = 0
+        # the computation is timed by hand, without the yields (the consumer renders the records meanwhile), and
+        # only when the instrumentation is on
+        timed = metrics.enabled
+        rho_ns = gcd_ns = 0
+        for k in range(1, iteration_count + 1):
+            if timed:
+                start = time.perf_counter_ns()
+            iterations += 1
+            tortoise = f(tortoise) % number
+            x_odd = f(hare) % number
+            hare = f(x_odd) % number
+
+            if timed:
+                gcd_start = time.perf_counter_ns()
+                divisor = gcd(hare - tortoise, number)
+                end = time.perf_counter_ns()
+                rho_ns += end - start
+                gcd_ns += end - gcd_start
+            else:
+                divisor = gcd(hare - tortoise, number)
+
+            if trace:
+                yield PollardIteration(2 * k - 1, x_odd, hare, divisor)
             if 1 < divisor < number:
-                found = True
                 final_divisor = divisor
-        print("")
+                break
+            if divisor == number and not trace:
+                # x_2k = x_k mod n: the sequence cycled, every next divisor would be n as well
+                break
+
+        if timed:
+            metrics.add_time('pollard.rho', rho_ns)
+            metrics.add_time('pollard.gcd', gcd_ns, iterations)
+            metrics.count('pollard.iterations', iterations)
+            metrics.count('pollard.f', 3 * iterations)
+            metrics.count('pollard.gcd', iterations)
+
+        if final_divisor is None:
+            yield PollardResult(None, None, None)
+        else:
+            yield PollardResult(final_divisor, *sorted((final_divisor, number // final_divisor)))
 
-        first_factor: int
-        second_factor: int
-        first_factor, second_factor = sorted((final_divisor, number // final_divisor))
-        print("Conclusion:")
-        print("The obtained two factors of are (in increasing order!)", end=" ")
-        print(Style.YELLOW + f"{first_factor}" + Style.RESET + " and " +
-              Style.YELLOW + f"{second_factor}" + Style.RESET)
+    @staticmethod
+    def algorithm(number: int, x0: int = 2, f: Callable[[int], int] = lambda x: x ** 2 + 1,
+                  iteration_count: int = 10) -> Optional[tuple[int, int]]:
+        """
+        Runs Pollard's rho method without tracing it
+        :return: the two factors found (in increasing order), or None if none was found in iteration_count steps
+        """
+        result = next(Pollard.steps(number, x0, f, iteration_count, trace=False))
+        if result.divisor is None:
+            return None
+        return result.first_factor, result.second_factor
 
     @staticmethod
     def show_ui_exam_version(page_count: int = 1):
@@ -66,7 +92,7 @@ class Pollard:
                                            + " and "
                                            + "f(x) = x" + Formatting.superscript("2") + " + 1"
                                            + " to determine the decomposition of the number into two factors. Number: "))
-                    Pollard.algorithm(user_input)
+                    Renderer().render(Pollard.steps(user_input))
                     break
                 except ValueError:
                     print(Style.RED + "ERROR: Input is NOT a number." + Style.RESET, end="\n\n")
@@ -0,0 +1,161 @@
+"""
+Renders the step records of the assignments' algorithms (see assignments.steps) as the exam-style output
+The algorithms only compute the values; the ANSI styles, the super/subscripts and the terminal output are all
+done here, so running an algorithm without tracing it does no formatting and no I/O.
+"""
+import sys
+from typing import Iterable, Optional, TextIO
+
+from assignments.steps import FermatIteration, FermatResult, FermatStart, MillerRabinDecomposition, \
+    MillerRabinError, MillerRabinIteration, MillerRabinPowersOfTwo, MillerRabinResult, MillerRabinStart, \
+    PollardIteration, PollardResult, PollardStart
+from assignments.utils import Style, Formatting
+
+
+def _value(value) -> str:
+    return Style.YELLOW + f"{value}" + Style.RESET
+
+
+class Renderer:
+    def __init__(self, file: Optional[TextIO] = None, expected_sequence_size: int = 5):
+        """
+        :param file: where the output is written (default: the standard output)
+        :param expected_sequence_size: how many terms of the Miller-Rabin sequences are shown; the quiz expects 5
+                                       and fills the ones missing with "x"
+        """
+        self.file = file
+        self.expected_sequence_size = expected_sequence_size
+        # the state needed to fill the rows skipped by the algorithms with "x"
+        self.__iteration_count = 0
+        self.__last_iteration = 0
+        self.__powers_of_two: Optional[tuple] = None
+
+    def __print(self, *values, end: str = "\n"):
+        print(*values, end=end, file=self.file or sys.stdout)
+
+    def render(self, steps: Iterable[tuple]) -> Optional[tuple]:
+        """
+        Renders the step records as they are produced
+        :return: the last record (the result of the algorithm)
+        """
+        step = None
+        for step in steps:
+            self.HANDLERS[type(step)](self, step)
+        return step
+
+    # ------------------------------------------------------------------ Miller-Rabin
+
+    def _miller_rabin_start(self, step: MillerRabinStart):
+        self.__print("n = " + _value(step.number), end="\n\n")
+
+    def _miller_rabin_error(self, step: MillerRabinError):
+        self.__print(Style.RED + "ERROR: Condition not met. (" + Style.CYAN + step.condition + Style.RED + ")"
+                     + Style.RESET)
+
+    def _miller_rabin_decomposition(self, step: MillerRabinDecomposition):
+        self.__print("Decomposition:")
+        self.__print("s = " + _value(step.s), end="\t\t\t")
+        self.__print("t = " + _value(step.t), end="\t\t\t")
+        self.__print("t (in binary) = " + _value(bin(step.t)[2:]), end="\n\n")
+
+    def _miller_rabin_powers_of_two(self, step: MillerRabinPowersOfTwo):
+        # shown after the header of the iteration they belong to
+        self.__powers_of_two = step.values
+
+    def _miller_rabin_iteration(self, step: MillerRabinIteration):
+        self.__print("Iteration " + _value(f"k = {step.k}") + " for " + _value(f"a = {step.a}")
+                     + " (results mod " + _value("n") + "):")
+
+        if self.__powers_of_two is not None:
+            for power in range(10):
+                computed_value = self.__powers_of_two[power] if power < len(self.__powers_of_two) else "x"
+                self.__print("2{} = ".format(Formatting.superscript(f"(2^{power})")) + _value(computed_value),
+                             end="\n" if power == 4 or power == 9 else "\t\t\t")
+            self.__print()
+            self.__powers_of_two = None
+
+        for r in range(self.expected_sequence_size):
+            current_sequence_value = step.sequence[r] if r < len(step.sequence) else "x"
+            self.__print("{}{} = ".format(step.a, Formatting.superscript(f"2^{r}t")) + _value(current_sequence_value),
+                         end="\n" if r == self.expected_sequence_size - 1 else "\t\t\t")
+        self.__print()
+
+    def _miller_rabin_result(self, step: MillerRabinResult):
+        self.__print("Conclusion:", end="\n\n")
+        self.__print("n is prime (yes/no)= " + _value("yes" if step.is_prime else "no"))
+        self.__print(Style.MAGENTA + "Don't trust me? Try a Miller-Rabin calculator https://planetcalc.com/8995/"
+                     + Style.RESET, end="\n\n\n")
+
+    # ------------------------------------------------------------------ Fermat
+
+    def _fermat_start(self, step: FermatStart):
+        self.__iteration_count, self.__last_iteration = step.iteration_count, 0
+        self.__print("n = " + _value(step.number), end="\n\n")
+        self.__print("Initialization:")
+        self.__print("t0 = [√n] = " + _value(step.t0), end="\n\n")
+        self.__print("Iterations:")
+
+    def __fermat_row(self, offset: int, t_squared_minus_n, is_square):
+        self.__print(f"t = t0 + {offset}", end=": ")
+        self.__print("t" + Formatting.superscript("2") + " - n = " + _value(t_squared_minus_n), end="   ")
+        self.__print("perfect square (yes/no) = " + _value(is_square))
+
+    def _fermat_iteration(self, step: FermatIteration):
+        self.__last_iteration = step.offset
+        self.__fermat_row(step.offset, step.t_squared_minus_n, "yes" if step.is_square else "no")
+
+    def _fermat_result(self, step: FermatResult):
+        for offset in range(self.__last_iteration + 1, self.__iteration_count + 1):
+            self.__fermat_row(offset, "x", "x")
+        self.__print("")
+
+        self.__print("Values:")
+        self.__print("s = " + _value(step.s), end="\t")
+        self.__print("t = " + _value(step.t), end="\n\n")
+        self.__conclusion(step.first_factor, step.second_factor)
+
+    # ------------------------------------------------------------------ Pollard
+
+    def _pollard_start(self, step: PollardStart):
+        self.__iteration_count, self.__last_iteration = step.iteration_count, 0
+        self.__print("n = " + _value(step.number), end="\n\n")
+        self.__print("Iterations (results mod " + _value("n") + "):")
+
+    def __pollard_row(self, index: int, x_odd, x_even, divisor):
+        self.__print(f"x{Formatting.subscript(str(index))} = " + _value(x_odd), end="  ")
+        self.__print(f"x{Formatting.subscript(str(index + 1))} = " + _value(x_even), end="  ")
+        self.__print(f"(x{Formatting.subscript(str(index + 1))} - x{Formatting.subscript(str((index + 1) // 2))}, n) = "
+                     + _value(divisor))
+
+    def _pollard_iteration(self, step: PollardIteration):
+        self.__last_iteration = (step.index + 1) // 2
+        self.__pollard_row(step.index, step.x_odd, step.x_even, step.divisor)
+
+    def _pollard_result(self, step: PollardResult):
+        for k in range(self.__last_iteration + 1, self.__iteration_count + 1):
+            self.__pollard_row(2 * k - 1, "x", "x", "x")
+        self.__print("")
+        self.__conclusion(step.first_factor, step.second_factor)
+
+    def __conclusion(self, first_factor: Optional[int], second_factor: Optional[int]):
+        self.__print("Conclusion:")
+        if first_factor is None:
+            self.__print(Style.RED + "No factors were found in the given number of iterations." + Style.RESET)
+            return
+        self.__print("The obtained two factors of are (in increasing order!)", end=" ")
+        self.__print(_value(first_factor) + " and " + _value(second_factor))
+
+    HANDLERS = {
+        MillerRabinStart: _miller_rabin_start,
+        MillerRabinError: _miller_rabin_error,
+        MillerRabinDecomposition: _miller_rabin_decomposition,
+        MillerRabinPowersOfTwo: _miller_rabin_powers_of_two,
+        MillerRabinIteration: _miller_rabin_iteration,
+        MillerRabinResult: _miller_rabin_result,
+        FermatStart: _fermat_start,
+        FermatIteration: _fermat_iteration,
+        FermatResult: _fermat_result,
+        PollardStart: _pollard_start,
+        PollardIteration: _pollard_iteration,
+        PollardResult: _pollard_result,
+    }
@@ -0,0 +1,79 @@
+"""
+The step records emitted by the assignments' algorithms when they are traced
+They only hold the values computed by the algorithms; all the formatting is done by render.Renderer.
+"""
+from typing import NamedTuple, Optional
+
+
+class MillerRabinStart(NamedTuple):
+    number: int
+
+
+class MillerRabinError(NamedTuple):
+    # the condition the number does not meet
+    condition: str
+
+
+class MillerRabinDecomposition(NamedTuple):
+    # n - 1 = 2^s * t
+    s: int
+    t: int
+
+
+class MillerRabinPowersOfTwo(NamedTuple):
+    # 2^(2^0), 2^(2^1), ... mod n, for the powers needed to compute 2^t (one for every bit of t)
+    values: tuple
+
+
+class MillerRabinIteration(NamedTuple):
+    k: int
+    a: int
+    # a^t, a^(2t), ..., a^(2^s * t) mod n; empty if n was already proven composite by a previous base
+    sequence: tuple
+    is_possibly_prime: bool
+
+
+class MillerRabinResult(NamedTuple):
+    number: int
+    is_prime: bool
+
+
+class FermatStart(NamedTuple):
+    number: int
+    t0: int
+    iteration_count: int
+
+
+class FermatIteration(NamedTuple):
+    # t = t0 + offset
+    offset: int
+    t_squared_minus_n: int
+    is_square: bool
+
+
+class FermatResult(NamedTuple):
+    # all None if no perfect square was found
+    s: Optional[int]
+    t: Optional[int]
+    first_factor: Optional[int]
+    second_factor: Optional[int]
+
+
+class PollardStart(NamedTuple):
+    number: int
+    iteration_count: int
+
+
+class PollardIteration(NamedTuple):
+    # index is odd: x_index, x_(index + 1) and (x_(index + 1) - x_((index + 1) / 2), n)
+    index: int
+    x_odd: int
+    x_even: int
+    divisor: int
+
+
+class PollardResult(NamedTuple):
+    # all None if no proper divisor was found
+    divisor: Optional[int]
+    first_factor: Optional[int]
+    second_factor: Optional[int]
@@ -11,6 +11,9 @@ the hill cipher (m = 2)
  """
 import random
 
+from pkc import numtheory
+from pkc.instrumentation import metrics
+
 
 def get_input_matrix(plaintext: str) -> list[list]:
     """
@@ -89,21 +92,28 @@ def hill_cipher2(plaintext: str, key_matrix: list[list] = None, n: int = 27) ->
         2. Compute the encryption matrix by multiplying each row in the matrix resulted from Step 1 with the key matrix
         3. Transform the matrix obtained from Step 2 to ciphertext
     """
-    input_matrix = get_input_matrix(plaintext)
+    with metrics.phase('hill.codec'):
+        input_matrix = get_input_matrix(plaintext)
     if not key_matrix:
         key_matrix = generate_key_matrix(n)
 
-    # encryption step
-    encryption_matrix = list()
-    for i in range(len(input_matrix)):
-        encryption_matrix.append(multiply(input_matrix[i], key_matrix))
+    with metrics.phase('hill.multiply'):
+        # encryption step
+        encryption_matrix = list()
+        for i in range(len(input_matrix)):
+            encryption_matrix.append(multiply(input_matrix[i], key_matrix))
 
-    # modulo n step
-    for i in range(len(encryption_matrix)):
-        for j in range(2):
-            encryption_matrix[i][j] %= n
+        # modulo n step
+        for i in range(len(encryption_matrix)):
+            for j in range(2):
+                encryption_matrix[i][j] %= n
+    if metrics.enabled:
+        # every row takes 4 multiplications and 2 reductions modulo n
+        metrics.count('hill.mulmod', 4 * len(input_matrix))
+        metrics.count('hill.iterations', len(input_matrix))
 
-    ciphertext = get_output_string(encryption_matrix)
+    with metrics.phase('hill.codec'):
+        ciphertext = get_output_string(encryption_matrix)
 
     return ciphertext
 
@@ -121,17 +131,10 @@ def get_matrix_determinant(matrix: list[list]) -> int:
 
 
 def gcd_extended(a: int, b: int) -> tuple[int, int, int]:
-    # base case
-    if a == 0:
-        return b, 0, 1
-
-    gcd, x1, y1 = gcd_extended(b % a, a)
-
-    # update x and y using results of the recursive call
-    x = y1 - (b // a) * x1
-    y = x1
-
-    return gcd, x, y
+    """
+    Computes gcd(a, b) and the coefficients x, y such that a*x + b*y = gcd(a, b)
+    """
+    return numtheory.extended_gcd(a, b)
 
 
 def get_adjoint_matrix(matrix: list[list]) -> list[list]:
@@ -153,25 +156,26 @@ def get_modular_inverse(matrix: list[list], n: int) -> list[list]:
         det(K) = a*d - c*b
         K^(-1) % n = det(K)^(-1) % n * [ [d, -b]   % n
                                    [-c, a] ]
-       the problem of det(K)^(-1) % n is solved by using the extended euclidean algorithm
-       to find the modular multiplicative inverse of the matrix determinant
+       the problem of det(K)^(-1) % n is solved by finding the modular multiplicative inverse
+       of the matrix determinant
     """
 
+    if metrics.enabled:
+        metrics.count('hill.inverse')
+
     det = get_matrix_determinant(matrix)
     if not det:
         raise Exception('det of key matrix is 0')
 
     det %= n
-    _, modular_multiplicative_inverse, _ = gcd_extended(det, n)
-    while modular_multiplicative_inverse < 0:
-        modular_multiplicative_inverse += n
+    with metrics.phase('hill.inverse'):
+        modular_multiplicative_inverse = numtheory.inverse_mod(det, n)
 
     # modulo n the matrix of cofactors
     adjoint_matrix = get_adjoint_matrix(matrix)
     for i in range(2):
         for j in range(2):
-            while adjoint_matrix[i][j] < 0:
-                adjoint_matrix[i][j] += n
+            adjoint_matrix[i][j] %= n
 
     # multiplication between the modular_multiplicative_inverse and the adjoint matrix modulo n
     for i in range(2):
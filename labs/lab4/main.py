@@ -2,12 +2,15 @@
 The Rabin Public Key Cryptosystem
     -> key generation:
         - private key: (p, q) where p, q are 2 random large distinct primes of approximately same size
+          (drawn from a small range by default, or of a given number of bits and = 3 mod 4, found by the Baillie-PSW
+          test of pkc.primality)
         - public key: n = p * q
     -> encryption:
         - message: m, where 0 < m < n - 1
         - cypher text: c = m^2 mod n
     -> decryption:
         - with the private key (p, q) determine the 4 square roots m1, m2, m3, m4 of c mod n
+          (for p = 3 mod 4, the square roots of c mod p are +/-c^((p + 1) / 4))
         - decide which message, m1, m2, m3 or m4, is the correct one
 
     P = C = K = Zn
@@ -18,38 +21,39 @@ The Rabin Public Key Cryptosystem
 import math
 import random
 
+from pkc import numtheory, primality, sieve
+from pkc.instrumentation import metrics
+
 LOWER_BOUND = 23
 UPPER_BOUND = 101
 
 
 class Rabin:
-    def __init__(self, private_key: tuple[int, int] = None):
-        self.__private_key = private_key if private_key else self.__generate_private_key()
-        self.__public_key = self.__compute_public_key()
-        self.__len_plaintext_unit, self.__len_ciphertext_unit = self.__compute_lens_message_unit()
-
-    @staticmethod
-    def __is_prime(no: int) -> bool:
+    def __init__(self, private_key: tuple[int, int] = None, bits: int = None):
         """
-        Checks if a number is prime
-        :param no: the number to be checked
-        :return: True if the number is prime, False otherwise
+        :param private_key: the primes (p, q), generated if None
+        :param bits: if given, the generated primes have this number of bits and are = 3 mod 4 (Blum primes),
+                     otherwise they are taken between LOWER_BOUND and UPPER_BOUND
         """
-        if no <= 1:
-            return False
-
-        for i in range(2, int(no ** (1 / 2)) + 1):
-            if no % i == 0:
-                return False
-
-        return True
+        self.__private_key = private_key if private_key else self.__generate_private_key(bits)
+        self.__public_key = self.__compute_public_key()
+        self.__crt = numtheory.CRT(self.__private_key)
+        self.__len_plaintext_unit, self.__len_ciphertext_unit = self.__compute_lens_message_unit()
 
-    def __generate_private_key(self) -> tuple[int, int]:
+    def __generate_private_key(self, bits: int = None) -> tuple[int, int]:
         """
         Generates 2 random large distinct primes of approximately same size
+        :param bits: the number of bits of the primes, None to take them between LOWER_BOUND and UPPER_BOUND
         :return: the tuple containing the 2 primes
         """
-        primes = [i for i in range(LOWER_BOUND, UPPER_BOUND + 1) if self.__is_prime(i)]
+        if bits is not None:
+            p = primality.random_prime(bits, blum=True)
+            q = primality.random_prime(bits, blum=True)
+            while p == q:
+                q = primality.random_prime(bits, blum=True)
+            return p, q
+
+        primes = [p for p in sieve.small_primes(UPPER_BOUND + 1) if p >= LOWER_BOUND]
         p = random.choice(primes)
         q = random.choice(primes)
 
@@ -139,13 +143,19 @@ class Rabin:
         :param plaintext: the text to be encrypted
         :return: the set of all corresponding ciphertexts
         """
-        plaintext_numerical_representation = self.__compute_numerical_representation_of_text(plaintext)
-        ciphertext_numerical_representation = list()
-        for plaintext_numerical_eq in plaintext_numerical_representation:
-            cipher_numerical_eq = plaintext_numerical_eq ** 2 % self.__public_key
-            ciphertext_numerical_representation.append(cipher_numerical_eq)
-
-        ciphertext = self.__compute_text_from_numerical_presentation(ciphertext_numerical_representation)
+        with metrics.phase('rabin.codec'):
+            plaintext_numerical_representation = self.__compute_numerical_representation_of_text(plaintext)
+
+        with metrics.phase('rabin.square'):
+            ciphertext_numerical_representation = list()
+            for plaintext_numerical_eq in plaintext_numerical_representation:
+                cipher_numerical_eq = plaintext_numerical_eq ** 2 % self.__public_key
+                ciphertext_numerical_representation.append(cipher_numerical_eq)
+        if metrics.enabled:
+            metrics.count('rabin.mulmod', len(plaintext_numerical_representation))
+
+        with metrics.phase('rabin.codec'):
+            ciphertext = self.__compute_text_from_numerical_presentation(ciphertext_numerical_representation)
         return ciphertext
 
     @staticmethod
@@ -157,76 +167,81 @@ class Rabin:
         :return: the modular square
         """
         no = no % mod
+        if no == 0:
+            # its only square root, which the search below (starting at 2) misses
+            return 0
+
+        if mod % 4 == 3:
+            # Euler's criterion: if no is a square, (no^((mod + 1) / 4))^2 = no * no^((mod - 1) / 2) = no
+            x = pow(no, (mod + 1) // 4, mod)
+            if metrics.enabled:
+                metrics.count('rabin.powmod')
+            if x * x % mod != no:
+                return None
+            # the root the search below finds, the smallest one from 2 on, so that decrypt pairs the solutions of the
+            # units in the same order whichever way the root is computed
+            x = min(x, mod - x)
+            return x if x > 1 else mod - 1
 
         for x in range(2, mod):
             if (x * x) % mod == no:
+                if metrics.enabled:
+                    metrics.count('rabin.mulmod', x - 1)
                 return x
 
+        if metrics.enabled:
+            metrics.count('rabin.mulmod', max(mod - 2, 0))
         return None
 
-    def __extended_euclid(self, a: int, b: int) -> tuple[int, int]:
-        """
-        Solves the extended euclid equation for a and b
-        :param a: the first number
-        :param b: the second number
-        :return: tuple the found coefficients
-        """
-        if b == 0:
-            return 1, 0
-
-        (x, y) = self.__extended_euclid(b, a % b)
-        k = a // b
-
-        return y, x - k * y
-
     def __chinese_remainder_theorem(self, a1: int, a2: int) -> list[int, int, int, int]:
         """
         Computes the four solutions of the system:
             x = +/-a1 mod p
             x = +/-a2 mod q
         """
-        (x, y) = self.__extended_euclid(self.__private_key[0], self.__private_key[1])
-
-        x1 = a2 * x * self.__private_key[0] + a1 * y * self.__private_key[1]
-        x2 = -a2 * x * self.__private_key[0] + a1 * y * self.__private_key[1]
-        x3 = a2 * x * self.__private_key[0] + -a1 * y * self.__private_key[1]
-        x4 = -a2 * x * self.__private_key[0] + -a1 * y * self.__private_key[1]
-
-        x1 = (x1 % self.__public_key + self.__public_key) % self.__public_key
-        x2 = (x2 % self.__public_key + self.__public_key) % self.__public_key
-        x3 = (x3 % self.__public_key + self.__public_key) % self.__public_key
-        x4 = (x4 % self.__public_key + self.__public_key) % self.__public_key
-
-        return [x1, x2, x3, x4]
+        return [self.__crt.solve((a1, a2)), self.__crt.solve((a1, -a2)),
+                self.__crt.solve((-a1, a2)), self.__crt.solve((-a1, -a2))]
 
     def decrypt(self, ciphertext: str) -> list[str]:
         """
         Decrypts the given text using the Rabin public key cryptosystem
         :param ciphertext: the text to be decrypted
         :return: the corresponding plaintext
+        :raises ValueError: if a unit of the ciphertext has no square root modulo p or q (it was not encrypted with
+                            this key)
         """
-        ciphertext_numerical_representation = self.__compute_numerical_representation_of_text(ciphertext, False)
-        square_root_solutions = list()
-        for ciphertext_numerical_eq in ciphertext_numerical_representation:
-            solution1 = self.__get_modular_square_root(ciphertext_numerical_eq, self.__private_key[0])
-            solution2 = self.__get_modular_square_root(ciphertext_numerical_eq, self.__private_key[1])
-            square_root_solutions.append([solution1, solution2])
-
-        system_solutions = list()
-        for sol in square_root_solutions:
-            all_sols = self.__chinese_remainder_theorem(sol[0], sol[1])
-            # eliminate the solutions which are greater than 27^2
-            system_solutions.append([sol for sol in all_sols if sol < 27**2])
-
-        ciphertexts = list()
-        # associate the units of the solution to construct the possible plaintexts
-        for i in range(len(system_solutions[0])):
-            solution_pair = list()
-            for j in range(len(system_solutions)):
-                solution_pair.append(system_solutions[j][i])
-
-            current_ciphertext = self.__compute_text_from_numerical_presentation(solution_pair, False)
-            ciphertexts.append(current_ciphertext)
+        with metrics.phase('rabin.codec'):
+            ciphertext_numerical_representation = self.__compute_numerical_representation_of_text(ciphertext, False)
+
+        with metrics.phase('rabin.sqrt'):
+            square_root_solutions = list()
+            for ciphertext_numerical_eq in ciphertext_numerical_representation:
+                solution1 = self.__get_modular_square_root(ciphertext_numerical_eq, self.__private_key[0])
+                solution2 = self.__get_modular_square_root(ciphertext_numerical_eq, self.__private_key[1])
+                if solution1 is None or solution2 is None:
+                    raise ValueError(f'{ciphertext_numerical_eq} is not a square modulo {self.__public_key}, the '
+                                     f'ciphertext was not encrypted with this key')
+                square_root_solutions.append([solution1, solution2])
+
+        with metrics.phase('rabin.crt'):
+            system_solutions = list()
+            for sol in square_root_solutions:
+                all_sols = self.__chinese_remainder_theorem(sol[0], sol[1])
+                # eliminate the solutions which are too large to be a plaintext unit (27^k)
+                system_solutions.append([sol for sol in all_sols if sol < 27 ** self.__len_plaintext_unit])
+        if metrics.enabled:
+            metrics.count('rabin.crt', 4 * len(square_root_solutions))
+
+        with metrics.phase('rabin.codec'):
+            ciphertexts = list()
+            # associate the units of the solution to construct the possible plaintexts
+            for i in range(len(system_solutions[0])):
+                solution_pair = list()
+                for j in range(len(system_solutions)):
+                    solution_pair.append(system_solutions[j][i])
+
+                current_ciphertext = self.__compute_text_from_numerical_presentation(solution_pair, False)
+                ciphertexts.append(current_ciphertext)
 
         return ciphertexts
 
@@ -0,0 +1,5 @@
+"""
+Shared tooling for the labs and assignments.
+The modules are imported with the labs directory as the root, e.g. (from labs/):
+    python -m pkc.bench run --output baseline.json
+"""
@@ -0,0 +1,245 @@
+"""
+Bernstein's batch gcd: finds the moduli of a collection which share a prime with any other modulus of the collection
+    -> product tree: the leaves are the moduli N1, ..., Nk, every node is the product of its two children,
+       the root being P = N1 * ... * Nk
+    -> remainder tree of squares: the root keeps P, every node keeps the remainder of its parent modulo the
+       square of its own product, so the leaf i ends up with zi = P mod Ni^2
+    -> gcd(Ni, P / Ni) = gcd(Ni, zi / Ni), which is 1 unless Ni shares a factor with another modulus
+
+It needs O(k log k) multiplications of big numbers instead of the k^2 / 2 gcds of the pairwise scan.
+Every level of the trees is written to a working directory as soon as it is computed, so only the level being
+computed is kept in memory, and the nodes of a level are computed in parallel by a pool of processes.
+If gmpy2 is installed, its multiplication (much faster than Python's for numbers of millions of bits) is used.
+
+usage (from the labs directory):
+    python -m pkc.batch_gcd moduli.txt          (one modulus per line, decimal or 0x-, 0o- or 0b-prefixed)
+"""
+
+import argparse
+import contextlib
+import math
+import os
+import struct
+import sys
+import tempfile
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+CHUNK_SIZE = 256
+LENGTH = struct.Struct('<Q')
+
+
+def _to_number(value: int):
+    return gmpy2.mpz(value) if gmpy2 else value
+
+
+def _gcd(a, b):
+    return gmpy2.gcd(a, b) if gmpy2 else math.gcd(a, b)
+
+
+def _write_level(path: str, numbers: Iterable[int]) -> int:
+    """
+    Writes the numbers of a tree level to a file, each as its length in bytes followed by its bytes
+    :return: how many numbers were written
+    """
+    count = 0
+    with open(path, 'wb') as file:
+        for number in numbers:
+            number = int(number)
+            data = number.to_bytes((number.bit_length() + 7) // 8, 'little')
+            file.write(LENGTH.pack(len(data)))
+            file.write(data)
+            count += 1
+    return count
+
+
+def _read_level(path: str) -> Iterator:
+    """
+    Reads back the numbers of a tree level written by _write_level
+    """
+    with open(path, 'rb') as file:
+        while header := file.read(LENGTH.size):
+            (length,) = LENGTH.unpack(header)
+            yield _to_number(int.from_bytes(file.read(length), 'little'))
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    chunk = list()
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = list()
+    if chunk:
+        yield chunk
+
+
+def _map_chunks(function: Callable[[list], list], chunks: Iterator[list], executor: Optional[Executor],
+                in_flight: int) -> Iterator:
+    """
+    Applies the function to every chunk, in the given executor if there is one, yielding the results in order
+    At most in_flight chunks are submitted at once, so the level is never loaded into memory as a whole.
+    """
+    if executor is None:
+        for chunk in chunks:
+            yield from function(chunk)
+        return
+
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(function, chunk))
+        if len(pending) >= in_flight:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _multiply_pairs(numbers: list) -> list:
+    """
+    Computes the parents of a chunk of nodes (of even length, except for the last chunk of a level)
+    """
+    numbers = [_to_number(number) for number in numbers]
+    parents = [numbers[i] * numbers[i + 1] for i in range(0, len(numbers) - 1, 2)]
+    if len(numbers) % 2:
+        parents.append(numbers[-1])
+    return parents
+
+
+def _reduce_pairs(pairs: list[tuple]) -> list:
+    """
+    Computes the remainders of a chunk of nodes, from (remainder of the parent, node) pairs
+    """
+    return [_to_number(remainder) % (_to_number(node) ** 2) for remainder, node in pairs]
+
+
+def _leaf_gcds(pairs: list[tuple]) -> list[int]:
+    """
+    Computes gcd(Ni, zi / Ni) for a chunk of (zi, Ni) pairs
+    """
+    return [int(_gcd(_to_number(remainder) // _to_number(modulus), modulus)) for remainder, modulus in pairs]
+
+
+def _with_parents(parents: Iterator, nodes: Iterator) -> Iterator[tuple]:
+    """
+    Pairs every node of a level with the remainder of its parent (nodes 2j and 2j + 1 have the parent j)
+    """
+    parent = None
+    for index, node in enumerate(nodes):
+        if index % 2 == 0:
+            parent = next(parents)
+        yield parent, node
+
+
+def batch_gcd(moduli: Iterable[int], workers: Optional[int] = None, workdir: Optional[str] = None,
+              chunk_size: int = CHUNK_SIZE) -> list[int]:
+    """
+    Computes, for every modulus, its gcd with the product of all the other moduli
+    :param moduli: the moduli; they are consumed as a stream, so this can be a generator
+    :param workers: the number of processes computing the levels; 1 computes everything in this process,
+                    None uses one process per CPU
+    :param workdir: the directory where the levels are written; if missing, a temporary directory is used
+    :param chunk_size: how many nodes a worker computes in one task
+    :return: the gcds, in the order of the moduli: 1 if the modulus shares no prime with the others, a proper
+             factor if it shares one of its primes, the modulus itself if it shares both (or appears twice)
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory(dir=workdir, prefix='batch-gcd-') as directory, \
+            (ProcessPoolExecutor(workers) if workers > 1 else contextlib.nullcontext()) as executor:
+        in_flight = 2 * workers
+
+        def level_path(prefix: str, index: int) -> str:
+            return os.path.join(directory, f'{prefix}{index}.bin')
+
+        # product tree, from the leaves up to the root
+        count = _write_level(level_path('product', 0), (_to_number(modulus) for modulus in moduli))
+        if count < 2:
+            return [1] * count
+        levels = [count]
+        while levels[-1] > 1:
+            chunks = _chunks(_read_level(level_path('product', len(levels) - 1)), 2 * chunk_size)
+            parents = _map_chunks(_multiply_pairs, chunks, executor, in_flight)
+            levels.append(_write_level(level_path('product', len(levels)), parents))
+
+        # remainder tree, from the root down to the leaves
+        top = len(levels) - 1
+        os.replace(level_path('product', top), level_path('remainder', top))
+        for index in range(top - 1, -1, -1):
+            pairs = _with_parents(_read_level(level_path('remainder', index + 1)),
+                                  _read_level(level_path('product', index)))
+            remainders = _map_chunks(_reduce_pairs, _chunks(pairs, chunk_size), executor, in_flight)
+            _write_level(level_path('remainder', index), remainders)
+            os.remove(level_path('remainder', index + 1))
+            if index:
+                os.remove(level_path('product', index))
+
+        pairs = zip(_read_level(level_path('remainder', 0)), _read_level(level_path('product', 0)))
+        return list(_map_chunks(_leaf_gcds, _chunks(pairs, chunk_size), executor, in_flight))
+
+
+def find_shared_factors(moduli: list[int], workers: Optional[int] = None,
+                        workdir: Optional[str] = None) -> dict[int, tuple[int, int]]:
+    """
+    Factors the moduli (products of two primes) which share a prime with another modulus of the collection
+    If both primes of a modulus are shared, the batch gcd returns the modulus itself, so such moduli are
+    split by pairwise gcds against the other vulnerable moduli.
+    :return: a dictionary from the index of every factored modulus to its two factors (in increasing order)
+    """
+    gcds = batch_gcd(moduli, workers, workdir)
+    vulnerable = [index for index, divisor in enumerate(gcds) if divisor != 1]
+
+    factors = dict()
+    for index in vulnerable:
+        modulus, divisor = moduli[index], gcds[index]
+        if divisor == modulus:
+            for other in vulnerable:
+                divisor = math.gcd(modulus, moduli[other])
+                if 1 < divisor < modulus:
+                    break
+            else:
+                continue
+        factors[index] = tuple(sorted((divisor, modulus // divisor)))
+
+    return factors
+
+
+def _parse_modulus(line: str) -> int:
+    """
+    :return: the number written on the line, in decimal (leading zeros allowed, as for int) or with a 0x, 0o or 0b
+             prefix
+    :raises ValueError: if the line is not a number
+    """
+    line = line.strip()
+    if line[1:2].lower() in ('x', 'o', 'b') and line[:1] == '0':
+        return int(line, 0)
+    return int(line)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pkc.batch_gcd',
+                                     description='Finds the moduli sharing a prime factor with other moduli.')
+    parser.add_argument('file', nargs='?', help='the file with one modulus per line (default: stdin)')
+    parser.add_argument('--workers', type=int, help='the number of processes (default: one per CPU)')
+    parser.add_argument('--workdir', help='the directory for the tree levels (default: the temporary directory)')
+    args = parser.parse_args(argv)
+
+    # stdin is not closed: it was not opened here
+    with open(args.file) if args.file else contextlib.nullcontext(sys.stdin) as file:
+        moduli = [_parse_modulus(line) for line in file if line.strip()]
+
+    factors = find_shared_factors(moduli, args.workers, args.workdir)
+    for index, (p, q) in sorted(factors.items()):
+        print(f'{index}: {moduli[index]} = {p} * {q}')
+    print(f'{len(factors)} of {len(moduli)} moduli share a prime factor')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,589 @@
+"""
+Reproducible benchmark suite for the algorithms implemented in the labs
+    -> every case generates its inputs by size (bits for the number theory, characters for the ciphers)
+       from a fixed seed, so two runs with the same seed time exactly the same inputs
+    -> every measurement does a number of warm-up runs over the inputs, followed by the timed repeats
+    -> the report contains the median, the 95th percentile, the minimum and the operations per second
+    -> the results are written to JSON and a later run can be compared against a saved baseline,
+       flagging the cases whose median got slower than a given threshold
+
+usage (from the labs directory):
+    python -m pkc.bench list
+    python -m pkc.bench run --output baseline.json
+    python -m pkc.bench run --filter gcd --repeat 30
+    python -m pkc.bench compare baseline.json                   (runs the baseline's cases again)
+    python -m pkc.bench compare baseline.json current.json
+"""
+
+import argparse
+import functools
+import gc
+import importlib
+import json
+import math
+import platform
+import random
+import sys
+import time
+from typing import Callable, Iterable, Optional
+
+from assignments.B.fermat import Fermat
+from assignments.B.pollard import Pollard
+from lab2 import hill_cipher
+from lab3 import main as lab3
+from lab4.main import Rabin
+from pkc import finite_field, numtheory, primality, rho_batch, sieve, tasks
+from pkc.batch_gcd import batch_gcd
+
+# the module's file name contains a dash, so it cannot be imported with an import statement
+miller_rabin_module = importlib.import_module('assignments.A.miller-rabin')
+
+DEFAULT_SEED = 2023
+DEFAULT_REPEAT = 15
+DEFAULT_WARMUP = 3
+DEFAULT_INPUTS = 32
+DEFAULT_THRESHOLD = 0.10
+
+SMALL_PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37]
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+
+
+class Case:
+    def __init__(self, name: str, function: Callable, make_input: Callable[[random.Random, int], tuple],
+                 sizes: Iterable[int], unit: str = 'bits', inputs: int = DEFAULT_INPUTS):
+        """
+        A benchmarked function together with the way its inputs are generated
+        :param name: the name of the case, used in the reports and for filtering
+        :param function: the benchmarked function
+        :param make_input: builds the arguments of one call from a random generator and a size
+        :param sizes: the sizes for which the case is measured
+        :param unit: what the size counts ('bits' or 'chars')
+        :param inputs: how many different inputs are generated for every size
+        """
+        self.name = name
+        self.function = function
+        self.make_input = make_input
+        self.sizes = tuple(sizes)
+        self.unit = unit
+        self.inputs = inputs
+
+
+# ------------------------------------------------------------------ input generation
+
+def _random_bits(rng: random.Random, bits: int) -> int:
+    """
+    :return: a random number with exactly the given number of bits
+    """
+    return rng.getrandbits(bits) | (1 << (bits - 1))
+
+
+def _is_probable_prime(n: int) -> bool:
+    """
+    Miller-Rabin with the first 12 primes as bases, deterministic for n < 3.3 * 10^24
+    """
+    if n < 2:
+        return False
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+
+    s = ((n - 1) & -(n - 1)).bit_length() - 1
+    t = (n - 1) >> s
+    for a in SMALL_PRIMES:
+        x = pow(a, t, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+
+    return True
+
+
+def _next_prime(n: int) -> int:
+    """
+    :return: the smallest prime greater than n
+    """
+    n += 1
+    while not _is_probable_prime(n):
+        n += 1
+    return n
+
+
+def _random_prime(rng: random.Random, bits: int) -> int:
+    """
+    :return: a random prime with exactly the given number of bits
+    """
+    return _next_prime(_random_bits(rng, bits) - 1) if bits > 2 else rng.choice((2, 3))
+
+
+def _close_primes_product(rng: random.Random, bits: int) -> int:
+    """
+    :return: the product of two consecutive primes, having approximately the given number of bits
+    """
+    p = _next_prime(_random_bits(rng, bits // 2) | 1)
+    return p * _next_prime(p)
+
+
+def _pollard_splits(n: int, steps: int = 10) -> bool:
+    """
+    Checks whether the assignment's version of Pollard's rho (x0 = 2, f(x) = x^2 + 1, 10 gcd steps) factors n
+    """
+    x = y = 2
+    for _ in range(steps):
+        x = (x * x + 1) % n
+        y = (y * y + 1) % n
+        y = (y * y + 1) % n
+        if 1 < math.gcd(abs(y - x), n) < n:
+            return True
+    return False
+
+
+def _pollard_input(rng: random.Random, bits: int) -> tuple[int]:
+    while True:
+        p = _random_prime(rng, 6)
+        q = _random_prime(rng, bits - 6)
+        if p != q and _pollard_splits(p * q):
+            return p * q,
+
+
+def _random_text(rng: random.Random, length: int) -> str:
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def _semiprimes(rng: random.Random, bits: int) -> tuple[list[int]]:
+    """
+    :return: RHO_BATCH_SIZE products of two distinct primes of half the given number of bits
+    """
+    return [p * q for p, q in (_distinct_primes(rng, bits // 2) for _ in range(RHO_BATCH_SIZE))],
+
+
+def _hill_key(rng: random.Random, n: int = 27) -> list[list]:
+    """
+    :return: a random 2x2 key matrix which is invertible modulo n
+    """
+    while True:
+        key = [[rng.randrange(n) for _ in range(2)] for _ in range(2)]
+        if math.gcd(hill_cipher.get_matrix_determinant(key) % n, n) == 1:
+            return key
+
+
+def _hill_decrypt(ciphertext: str, key_matrix: list[list], n: int = 27) -> str:
+    return hill_cipher.hill_cipher2(ciphertext, hill_cipher.get_modular_inverse(key_matrix, n), n)
+
+
+def _two_numbers(rng: random.Random, bits: int) -> tuple[int, int]:
+    return _random_bits(rng, bits), _random_bits(rng, bits)
+
+
+def _invertible_pair(rng: random.Random, bits: int) -> tuple[int, int]:
+    """
+    :return: (a, n) such that a is invertible modulo n
+    """
+    while True:
+        a, n = _two_numbers(rng, bits)
+        if math.gcd(a, n) == 1:
+            return a, n
+
+
+@functools.lru_cache(maxsize=None)
+def _binary_field(m: int) -> finite_field.GF2m:
+    return finite_field.GF2m(m)
+
+
+def _field_elements(rng: random.Random, m: int) -> tuple:
+    field = _binary_field(m)
+    return field, field.random(rng, nonzero=True), field.random(rng, nonzero=True)
+
+
+def _field_arrays(rng: random.Random, m: int) -> tuple:
+    field = _binary_field(m)
+    return field, *([field.random(rng) for _ in range(RHO_BATCH_SIZE)] for _ in range(2))
+
+
+def _distinct_primes(rng: random.Random, bits: int) -> tuple[int, int]:
+    while True:
+        p, q = _random_prime(rng, bits), _random_prime(rng, bits)
+        if p != q:
+            return p, q
+
+
+# ------------------------------------------------------------------ implementations replaced by pkc.numtheory
+# kept as they were, as the reference the numtheory functions are measured against
+
+def _legacy_gcd_division(a, b):
+    # lab1: the division step continued with the brute force gcd
+    if b == 0:
+        return a
+    return _legacy_gcd_brute_force(b, a % b)
+
+
+def _legacy_gcd_subtraction(a, b):
+    while a != b:
+        if a > b:
+            a -= b
+        else:
+            b -= a
+    return a
+
+
+def _legacy_gcd_brute_force(a, b):
+    result = min(a, b)
+    while result:
+        if a % result == 0 and b % result == 0:
+            break
+        result -= 1
+    return result
+
+
+def _legacy_pollard_gcd(a: int, b: int) -> int:
+    if b == 0:
+        return a
+    return _legacy_pollard_gcd(b, a % b)
+
+
+def _legacy_hill_gcd_extended(a: int, b: int) -> tuple[int, int, int]:
+    if a == 0:
+        return b, 0, 1
+    gcd, x1, y1 = _legacy_hill_gcd_extended(b % a, a)
+    return gcd, y1 - (b // a) * x1, x1
+
+
+def _legacy_rabin_extended_euclid(a: int, b: int) -> tuple[int, int]:
+    if b == 0:
+        return 1, 0
+    (x, y) = _legacy_rabin_extended_euclid(b, a % b)
+    return y, x - a // b * y
+
+
+def _legacy_hill_inverse(a: int, n: int) -> int:
+    _, inverse, _ = _legacy_hill_gcd_extended(a, n)
+    while inverse < 0:
+        inverse += n
+    return inverse
+
+
+def _legacy_rabin_crt(p: int, q: int, a1: int, a2: int) -> list[int]:
+    (x, y) = _legacy_rabin_extended_euclid(p, q)
+    n = p * q
+    solutions = [a2 * x * p + a1 * y * q, -a2 * x * p + a1 * y * q, a2 * x * p - a1 * y * q, -a2 * x * p - a1 * y * q]
+    return [(solution % n + n) % n for solution in solutions]
+
+
+# ------------------------------------------------------------------ implementations replaced by pkc.sieve
+
+def _legacy_rabin_is_prime(no: int) -> bool:
+    # lab4: trial division by every number up to the square root
+    if no <= 1:
+        return False
+    for i in range(2, int(no ** (1 / 2)) + 1):
+        if no % i == 0:
+            return False
+    return True
+
+
+RABIN_KEY = (31, 53)
+BATCH_SIZE = 256
+# enough numbers to keep the lanes of rho_batch busy
+RHO_BATCH_SIZE = 2048
+
+
+def _rabin_decrypt_input(rng: random.Random, bits: int) -> tuple:
+    """
+    Decryption only handles messages of one unit (2 characters) whose square roots exist modulo p and q,
+    so the inputs are retried until the original message is recovered
+    """
+    while True:
+        p = _random_prime(rng, bits)
+        q = _random_prime(rng, bits)
+        if p == q:
+            continue
+        rabin = Rabin((p, q))
+        message = _random_text(rng, 2)
+        try:
+            ciphertext = rabin.encrypt(message)
+            if message.upper() in rabin.decrypt(ciphertext):
+                return rabin.decrypt, ciphertext
+        except (TypeError, IndexError):
+            pass
+
+
+CASES = [
+    Case('numtheory.gcd', numtheory.gcd, _two_numbers, (16, 64, 1024, 4096)),
+    Case('numtheory.euclid_gcd', numtheory.euclid_gcd, _two_numbers, (16, 1024, 16384), inputs=8),
+    # slower than euclid_gcd above numtheory.SMALL_GCD_BITS (see binary_gcd): it is measured against the gcd by
+    # subtractions it replaces, legacy.gcd_subtraction
+    Case('numtheory.binary_gcd', numtheory.binary_gcd, _two_numbers, (16, 64, 1024, 4096)),
+    Case('numtheory.lehmer_gcd', numtheory.lehmer_gcd, _two_numbers, (16, 1024, 16384), inputs=8),
+    Case('numtheory.extended_gcd', numtheory.extended_gcd, _two_numbers, (16, 64, 1024, 4096)),
+    Case('numtheory.inverse_mod', numtheory.inverse_mod, _invertible_pair, (16, 64, 1024, 4096)),
+    Case('numtheory.crt', lambda crt, a1, a2: [crt.solve((a1, a2)), crt.solve((a1, -a2)),
+                                               crt.solve((-a1, a2)), crt.solve((-a1, -a2))],
+         lambda rng, bits: (numtheory.CRT(_distinct_primes(rng, bits // 2)), *_two_numbers(rng, bits // 2)),
+         (16, 64, 1024)),
+    Case('legacy.gcd_division', _legacy_gcd_division, _two_numbers, (8, 12, 16), inputs=8),
+    Case('legacy.gcd_subtraction', _legacy_gcd_subtraction, _two_numbers, (16, 32, 64, 1024), inputs=8),
+    Case('legacy.gcd_brute_force', _legacy_gcd_brute_force, _two_numbers, (8, 12, 16), inputs=8),
+    Case('legacy.pollard_gcd', _legacy_pollard_gcd, _two_numbers, (16, 64, 1024)),
+    Case('legacy.hill_gcd_extended', _legacy_hill_gcd_extended, _two_numbers, (16, 64, 1024)),
+    Case('legacy.rabin_extended_euclid', _legacy_rabin_extended_euclid, _two_numbers, (16, 64, 1024)),
+    Case('legacy.hill_inverse', _legacy_hill_inverse, _invertible_pair, (16, 64, 1024)),
+    Case('legacy.rabin_crt', _legacy_rabin_crt,
+         lambda rng, bits: (*_distinct_primes(rng, bits // 2), *_two_numbers(rng, bits // 2)), (16, 64, 1024)),
+    Case('legacy.rabin_is_prime', _legacy_rabin_is_prime, lambda rng, bits: (_random_bits(rng, bits) | 1,),
+         (16, 24, 32)),
+    Case('gcd.batch', lambda moduli: batch_gcd(moduli, workers=1),
+         lambda rng, bits: ([_random_bits(rng, bits) for _ in range(BATCH_SIZE)],), (256, 1024), inputs=4),
+    Case('modexp.repeated_squaring', miller_rabin_module.repeated_squaring_modular_exponentiation,
+         lambda rng, bits: (_random_bits(rng, bits), _random_bits(rng, bits), _random_bits(rng, bits) | 1),
+         (64, 256, 1024)),
+    Case('modexp.pow', pow,
+         lambda rng, bits: (_random_bits(rng, bits), _random_bits(rng, bits), _random_bits(rng, bits) | 1),
+         (64, 256, 1024)),
+    Case('primality.miller_rabin', miller_rabin_module.miller_rabin,
+         lambda rng, bits: (_random_bits(rng, bits) | 1,), (16, 32, 64)),
+    Case('primality.jacobi', primality.jacobi,
+         lambda rng, bits: (_random_bits(rng, bits), _random_bits(rng, bits) | 1), (64, 256, 1024)),
+    Case('primality.miller_rabin_rounds', primality.miller_rabin,
+         lambda rng, bits: (_random_prime(rng, bits), primality.DEFAULT_ROUNDS, random.Random(bits)),
+         (64, 256, 1024), inputs=8),
+    Case('primality.solovay_strassen', primality.solovay_strassen,
+         lambda rng, bits: (_random_prime(rng, bits), primality.DEFAULT_ROUNDS, random.Random(bits)),
+         (64, 256, 1024), inputs=8),
+    Case('primality.strong_lucas', primality.strong_lucas, lambda rng, bits: (_random_prime(rng, bits),),
+         (64, 256, 1024), inputs=8),
+    Case('primality.baillie_psw', primality.baillie_psw, lambda rng, bits: (_random_prime(rng, bits),),
+         (64, 256, 1024), inputs=8),
+    Case('primality.baillie_psw_composite', primality.baillie_psw,
+         lambda rng, bits: (_random_bits(rng, bits) | 1,), (64, 256, 1024)),
+    Case('primality.sieve_lookup', sieve.is_small_prime, lambda rng, bits: (_random_bits(rng, bits) | 1,), (16, 24)),
+    Case('primality.sieve_next_prime', sieve.next_prime, lambda rng, bits: (_random_bits(rng, bits),), (16, 23)),
+    Case('factoring.generalized_fermat', lab3.generalized_fermat_algorithm,
+         lambda rng, bits: (_close_primes_product(rng, bits), 50), (16, 24, 32)),
+    Case('factoring.fermat', Fermat.algorithm,
+         lambda rng, bits: (_close_primes_product(rng, bits),), (16, 32, 48)),
+    Case('factoring.pollard', Pollard.algorithm, _pollard_input, (16, 24, 32)),
+    Case('factoring.rho_scalar', lambda numbers: [tasks.split(n, 'pollard', rho_batch.DEFAULT_ITERATIONS)
+                                                  for n in numbers], _semiprimes, (32, 40), inputs=1),
+    Case('factoring.rho_batch', rho_batch.split_batch, _semiprimes, (32, 40), inputs=1),
+    Case('rabin.encrypt', Rabin(RABIN_KEY).encrypt,
+         lambda rng, length: (_random_text(rng, length),), (8, 64, 512), unit='chars'),
+    Case('rabin.decrypt', lambda decrypt, ciphertext: decrypt(ciphertext), _rabin_decrypt_input, (6, 7)),
+    Case('hill.encrypt', hill_cipher.hill_cipher2,
+         lambda rng, length: (_random_text(rng, length), _hill_key(rng)), (8, 64, 512), unit='chars'),
+    Case('hill.decrypt', _hill_decrypt,
+         lambda rng, length: (_random_text(rng, length).upper(), _hill_key(rng)), (8, 64, 512), unit='chars'),
+    Case('finite_field.gf2m_multiply', lambda field, a, b: field.multiply(a, b), _field_elements, (8, 16, 64, 233)),
+    Case('finite_field.gf2m_inverse', lambda field, a, _: field.inverse(a), _field_elements, (8, 16, 64, 233)),
+    Case('finite_field.gf2m_multiply_list', lambda field, a, b: [field.multiply(x, y) for x, y in zip(a, b)],
+         _field_arrays, (8, 16, 32), inputs=4),
+    Case('finite_field.gf2m_multiply_array', lambda field, a, b: field.multiply_array(a, b), _field_arrays,
+         (8, 16, 32), inputs=4),
+]
+
+
+# ------------------------------------------------------------------ measuring
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    """
+    Computes a percentile of already sorted samples, interpolating linearly between the closest ranks
+    """
+    position = (len(ordered) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def measure(case: Case, size: int, seed: int = DEFAULT_SEED, repeat: int = DEFAULT_REPEAT,
+            warmup: int = DEFAULT_WARMUP) -> dict:
+    """
+    Measures one case for one size
+    Every repeat calls the function once for each of the generated inputs, the sample being the average time
+    of a call. The garbage collector is disabled while timing, like timeit does.
+    :return: the statistics of the samples, in nanoseconds per call
+    """
+    rng = random.Random(f'{seed}:{case.name}:{size}')
+    inputs = [case.make_input(rng, size) for _ in range(case.inputs)]
+    function = case.function
+
+    samples = list()
+    gc_was_enabled = gc.isenabled()
+    for _ in range(warmup):
+        for args in inputs:
+            function(*args)
+
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            for args in inputs:
+                function(*args)
+            samples.append((time.perf_counter_ns() - start) / len(inputs))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    samples.sort()
+    median = _percentile(samples, 0.5)
+    return {
+        'name': case.name,
+        'size': size,
+        'unit': case.unit,
+        'median_ns': median,
+        'p95_ns': _percentile(samples, 0.95),
+        'min_ns': samples[0],
+        'ops_per_sec': 1e9 / median if median else math.inf,
+        'samples': len(samples),
+    }
+
+
+def select_cases(patterns: Optional[list[str]] = None) -> list[Case]:
+    """
+    :param patterns: substrings of the case names; if missing, all the cases are selected
+    """
+    if not patterns:
+        return list(CASES)
+    return [case for case in CASES if any(pattern in case.name for pattern in patterns)]
+
+
+def run(cases: list[Case], seed: int = DEFAULT_SEED, repeat: int = DEFAULT_REPEAT, warmup: int = DEFAULT_WARMUP,
+        sizes: Optional[dict[str, list[int]]] = None, verbose: bool = True) -> dict:
+    """
+    Measures the given cases for all of their sizes
+    :param sizes: optionally restricts the measured sizes of a case, by case name
+    :return: the report, containing the parameters of the run and the results keyed by 'name[size]'
+    """
+    results = dict()
+    for case in cases:
+        for size in case.sizes:
+            if sizes is not None and size not in sizes.get(case.name, ()):
+                continue
+            result = measure(case, size, seed, repeat, warmup)
+            key = f'{case.name}[{size}]'
+            results[key] = result
+            if verbose:
+                print(_format_result(key, result))
+
+    return {
+        'meta': {
+            'seed': seed,
+            'repeat': repeat,
+            'warmup': warmup,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """
+    Compares the medians of the results present in both reports
+    :param threshold: the relative slowdown from which a result is flagged as a regression (0.1 = 10% slower)
+    :return: one entry per common result, with the ratio current / baseline and the verdict
+    """
+    comparison = list()
+    for key, result in current['results'].items():
+        if key not in baseline['results']:
+            continue
+        ratio = result['median_ns'] / baseline['results'][key]['median_ns']
+        if ratio > 1 + threshold:
+            verdict = 'regression'
+        elif ratio < 1 - threshold:
+            verdict = 'improvement'
+        else:
+            verdict = 'unchanged'
+        comparison.append({
+            'key': key,
+            'baseline_ns': baseline['results'][key]['median_ns'],
+            'current_ns': result['median_ns'],
+            'ratio': ratio,
+            'verdict': verdict,
+        })
+
+    return comparison
+
+
+# ------------------------------------------------------------------ command line
+
+def _format_time(ns: float) -> str:
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if ns >= scale:
+            return f'{ns / scale:.2f} {unit}'
+    return f'{ns:.0f} ns'
+
+
+def _format_result(key: str, result: dict) -> str:
+    return (f'{key:<40} median {_format_time(result["median_ns"]):>10}   '
+            f'p95 {_format_time(result["p95_ns"]):>10}   {result["ops_per_sec"]:>14,.1f} ops/s')
+
+
+def _write_report(report: dict, path: Optional[str]):
+    if path:
+        with open(path, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f'results written to {path}')
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pkc.bench', description='Benchmarks the labs\' algorithms.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help='list the benchmark cases')
+
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--filter', action='append', help='only run the cases whose name contains this text')
+    run_parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    run_parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP)
+    run_parser.add_argument('--output', help='the JSON file the results are written to')
+
+    compare_parser = commands.add_parser('compare', help='compare results against a saved baseline')
+    compare_parser.add_argument('baseline', help='the JSON file with the baseline results')
+    compare_parser.add_argument('current', nargs='?',
+                                help='the JSON file with the current results; if missing, the baseline\'s '
+                                     'cases are run again with the same parameters')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.add_argument('--output', help='the JSON file the results of the new run are written to')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for case in CASES:
+            print(f'{case.name:<32} sizes ({case.unit}): {", ".join(map(str, case.sizes))}')
+        return 0
+
+    if args.command == 'run':
+        report = run(select_cases(args.filter), args.seed, args.repeat, args.warmup)
+        _write_report(report, args.output)
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if args.current:
+        with open(args.current) as file:
+            current = json.load(file)
+    else:
+        sizes = dict()
+        for result in baseline['results'].values():
+            sizes.setdefault(result['name'], []).append(result['size'])
+        meta = baseline['meta']
+        current = run(select_cases(list(sizes)), meta['seed'], meta['repeat'], meta['warmup'], sizes)
+        _write_report(current, args.output)
+
+    comparison = compare(baseline, current, args.threshold)
+    for entry in comparison:
+        print(f'{entry["key"]:<40} {_format_time(entry["baseline_ns"]):>10} -> {_format_time(entry["current_ns"]):>10}'
+              f'   x{entry["ratio"]:.2f}   {entry["verdict"]}')
+    regressions = [entry for entry in comparison if entry['verdict'] == 'regression']
+    print(f'{len(regressions)} regression(s) out of {len(comparison)} compared result(s)')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Non-interactive bulk primality testing and factoring
+    -> the numbers are read line by line from files or from the standard input (blank lines and lines starting
+       with '#' are skipped), so the input is never loaded as a whole
+    -> the lines are sent in chunks to a pool of worker processes, at most --in-flight chunks at a time
+    -> the results are written as JSON lines, in the order of the input (default) or as soon as they are ready
+       (--unordered); every line has the index of the number in the input, so both orders can be matched back
+    -> every number gets at most --timeout seconds; the ones running out of time are reported with an error
+       (the timeout relies on SIGALRM, so it is not enforced on platforms without it)
+    -> with --cache, the results are kept in an SQLite database (see pkc.cache) shared by the workers and by the
+       later runs; every record then says where its result came from, and the summary has the hit rate
+    -> a throughput summary is written to the standard error at the end
+
+usage (from the labs directory):
+    python -m pkc.bulk is-prime numbers.txt
+    python -m pkc.bulk factor --method pollard --iterations 100000 --timeout 2 < numbers.txt > factors.jsonl
+    python -m pkc.bulk factor --cache results.sqlite moduli.txt
+    seq 1000001 2 2000000 | python -m pkc.bulk is-prime --unordered --workers 8
+
+output lines:
+    {"index": 0, "n": 7123, "is_prime": false, "elapsed_ms": 0.02}
+    {"index": 1, "n": 8051, "factors": [83, 97], "remaining": [], "complete": true, "elapsed_ms": 0.05}
+    {"index": 2, "n": "abc", "error": "invalid number", "elapsed_ms": 0.0}
+"""
+
+import argparse
+import fileinput
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, Optional
+
+from pkc import cache, tasks
+
+DEFAULT_CHUNK_SIZE = 64
+DEFAULT_TIMEOUT = 10.0
+TASKS = ('is-prime', 'factor')
+
+
+def run_item(task: str, index: int, line: str, options: dict, timeout: Optional[float]) -> dict:
+    """
+    Runs the task for one input line
+    :return: the output record of the line
+    """
+    record = {'index': index}
+    start = time.perf_counter_ns()
+    try:
+        number = int(line, 0)
+    except ValueError:
+        record.update({'n': line, 'error': 'invalid number', 'elapsed_ms': 0.0})
+        return record
+
+    record['n'] = number
+    result_cache = tasks.open_cache(options['cache']) if options.get('cache') else None
+    try:
+        with tasks.time_limit(timeout):
+            if task == 'is-prime':
+                record['is_prime'], source = tasks.run('is-prime', {'number': number}, result_cache)
+            else:
+                result, source = tasks.run('factor', {'number': number, 'method': options['method'],
+                                                      'iterations': options['iterations']}, result_cache)
+                record.update(result)
+        if source is not None:
+            record['cache'] = source
+    except tasks.TimeLimitExceeded:
+        record['error'] = 'timeout'
+    except ValueError as error:
+        # e.g. factoring 0 or a negative number
+        record['error'] = str(error)
+    record['elapsed_ms'] = round((time.perf_counter_ns() - start) / 1e6, 3)
+    return record
+
+
+def run_chunk(task: str, chunk: list[tuple[int, str]], options: dict, timeout: Optional[float]) -> list[dict]:
+    records = [run_item(task, index, line, options, timeout) for index, line in chunk]
+    if options.get('cache'):
+        tasks.open_cache(options['cache']).flush()
+    return records
+
+
+def _numbered_lines(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    index = 0
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        yield index, line
+        index += 1
+
+
+def _chunks(items: Iterator, size: int) -> Iterator[list]:
+    chunk = list()
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = list()
+    if chunk:
+        yield chunk
+
+
+def run(task: str, lines: Iterable[str], options: dict, workers: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE,
+        in_flight: Optional[int] = None, ordered: bool = True, timeout: Optional[float] = DEFAULT_TIMEOUT) \
+        -> Iterator[dict]:
+    """
+    Runs the task for every number of the input
+    :param task: 'is-prime' or 'factor'
+    :param lines: the input lines, one number per line
+    :param options: the options of the task ({'method': ..., 'iterations': ...} for 'factor', and 'cache': the
+                    database file of the cache, if any)
+    :param workers: the number of worker processes; 0 runs everything in this process
+    :param chunk_size: how many lines a worker gets at once
+    :param in_flight: the maximum number of chunks submitted and not yet written (default: 2 * workers)
+    :param ordered: if True, the records are yielded in the order of the input, otherwise as they complete
+    :param timeout: the maximum number of seconds for one number, None for no limit
+    :return: the output records
+    """
+    chunks = _chunks(_numbered_lines(lines), chunk_size)
+    if workers == 0:
+        for chunk in chunks:
+            yield from run_chunk(task, chunk, options, timeout)
+        return
+
+    in_flight = in_flight or 2 * workers
+    with ProcessPoolExecutor(workers, initializer=tasks.init_worker) as executor:
+        if ordered:
+            pending: deque[Future] = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(run_chunk, task, chunk, options, timeout))
+                if len(pending) >= in_flight:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        else:
+            running: set[Future] = set()
+            for chunk in chunks:
+                running.add(executor.submit(run_chunk, task, chunk, options, timeout))
+                if len(running) >= in_flight:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+            for future in wait(running).done:
+                yield from future.result()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pkc.bulk',
+                                     description='Tests the primality of or factors numbers read line by line.')
+    parser.add_argument('task', choices=TASKS)
+    parser.add_argument('files', nargs='*', help='the input files (default: the standard input)')
+    parser.add_argument('--output', help='the JSON lines file the results are written to (default: stdout)')
+    parser.add_argument('--method', choices=tasks.METHODS, default='pollard', help='the factoring method')
+    parser.add_argument('--iterations', type=int, default=tasks.DEFAULT_ITERATIONS,
+                        help='the iterations of the factoring method for one split')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='the number of worker processes, 0 to run in this process')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--in-flight', type=int, help='the maximum number of chunks being processed at once')
+    parser.add_argument('--unordered', action='store_true', help='write the results as soon as they are ready')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='the maximum number of seconds for one number, 0 for no limit')
+    parser.add_argument('--cache', help='the SQLite file the results are cached in (created if missing)')
+    args = parser.parse_intermixed_args(argv)
+
+    options = {'method': args.method, 'iterations': args.iterations, 'cache': args.cache}
+    count = errors = timeouts = 0
+    sources = Counter()
+    start = time.perf_counter()
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        with fileinput.input(args.files or ('-',)) as lines:
+            for record in run(args.task, lines, options, args.workers, args.chunk_size, args.in_flight,
+                              not args.unordered, args.timeout or None):
+                output.write(json.dumps(record) + '\n')
+                count += 1
+                if 'cache' in record:
+                    sources[record['cache']] += 1
+                if 'error' in record:
+                    errors += 1
+                    timeouts += record['error'] == 'timeout'
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    print(f'{count} numbers in {elapsed:.2f} s ({count / elapsed if elapsed else 0:,.1f} numbers/s), '
+          f'{errors} errors ({timeouts} timeouts)', file=sys.stderr)
+    if args.cache:
+        lookups = sum(sources.values())
+        hits = sources['memory'] + sources['disk']
+        print(f'cache: {hits / lookups if lookups else 0:.1%} hits ('
+              + ', '.join(f'{source} {sources[source]}' for source in cache.SOURCES) + ')', file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+A two-tier cache of primality verdicts and factorizations, keyed by n
+    -> tier 1: an LRU dictionary in the process, holding at most `capacity` entries
+    -> tier 2 (optional): an SQLite database, shared by all the processes using the same file; the entries read
+       from it are promoted to tier 1, the new ones are written to both (to the database in batches, see flush)
+    -> an entry holds the primality verdict (if known) and the factorization found so far: the prime factors and
+       the composite parts which could not be split yet, with the largest number of iterations tried per method
+    -> a partial factorization is resumed instead of being restarted: only its remaining parts are split again,
+       and only if the new attempt is stronger (another method or more iterations) than the ones already made;
+       the parts which were factored on their own in the meantime are taken from the cache as well, even when the
+       new attempt is not stronger (an incomplete entry is only returned as it is if none of its parts progressed)
+    -> every lookup is counted as a memory hit, a disk hit, a resumed entry or a miss (see hit_rates)
+
+The values are computed by the functions given to is_prime / factor (see pkc.tasks), the cache only stores them.
+"""
+
+import json
+import sqlite3
+from collections import Counter, OrderedDict
+from typing import Callable, NamedTuple, Optional
+
+from pkc.instrumentation import metrics
+
+DEFAULT_CAPACITY = 100000
+# the number of new entries kept in memory before they are written to the database
+FLUSH_EVERY = 256
+SOURCES = ('memory', 'disk', 'resumed', 'miss')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    n TEXT PRIMARY KEY,
+    is_prime INTEGER,
+    factors TEXT,
+    remaining TEXT,
+    attempts TEXT
+)
+'''
+
+
+class CacheEntry(NamedTuple):
+    # None if unknown
+    is_prime: Optional[bool] = None
+    # the prime factors found, None if n was never factored
+    factors: Optional[tuple] = None
+    # the composite parts which could not be split
+    remaining: tuple = ()
+    # method -> the largest number of iterations tried on the remaining parts, None if nothing was tried (not a
+    # dictionary default, which would be shared by every entry)
+    attempts: Optional[dict] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.factors is not None and not self.remaining
+
+    def is_enough(self, method: str, iterations: int) -> bool:
+        """
+        :return: True if factoring n again with the method and the number of iterations cannot do better
+        """
+        return self.factors is not None and (not self.remaining or (self.attempts or {}).get(method, 0) >= iterations)
+
+    def as_factorization(self) -> dict:
+        # the same dictionary as pkc.tasks.factor
+        return {'factors': sorted(self.factors), 'remaining': sorted(self.remaining), 'complete': self.complete}
+
+
+class ResultCache:
+    def __init__(self, path: Optional[str] = None, capacity: int = DEFAULT_CAPACITY):
+        """
+        :param path: the SQLite database file, None to keep the cache in memory only
+        :param capacity: the maximum number of entries kept in memory
+        """
+        self.path = path
+        self.capacity = capacity
+        self.stats: Counter = Counter()
+        self.__memory: OrderedDict[int, CacheEntry] = OrderedDict()
+        self.__unwritten: dict[int, CacheEntry] = dict()
+        self.__database = None
+        if path is not None:
+            # several worker processes may use the same file: WAL lets them read while one of them writes
+            self.__database = sqlite3.connect(path, timeout=30)
+            self.__database.execute('PRAGMA journal_mode=WAL')
+            self.__database.execute('PRAGMA synchronous=NORMAL')
+            self.__database.execute(SCHEMA)
+            self.__database.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # ------------------------------------------------------------------ storage
+
+    def get(self, number: int) -> tuple[Optional[CacheEntry], Optional[str]]:
+        """
+        :return: the entry of the number and the tier it was found in ('memory' or 'disk'), or (None, None)
+        """
+        entry = self.__memory.get(number)
+        if entry is not None:
+            self.__memory.move_to_end(number)
+            return entry, 'memory'
+        if self.__database is None:
+            return None, None
+
+        row = self.__database.execute('SELECT is_prime, factors, remaining, attempts FROM results WHERE n = ?',
+                                      (str(number),)).fetchone()
+        if row is None:
+            return None, None
+        is_prime, factors, remaining, attempts = row
+        entry = CacheEntry(None if is_prime is None else bool(is_prime),
+                           None if factors is None else tuple(json.loads(factors)),
+                           tuple(json.loads(remaining)), json.loads(attempts))
+        self.__remember(number, entry)
+        return entry, 'disk'
+
+    def put(self, number: int, entry: CacheEntry):
+        self.__remember(number, entry)
+        if self.__database is not None:
+            self.__unwritten[number] = entry
+            if len(self.__unwritten) >= FLUSH_EVERY:
+                self.flush()
+
+    def __remember(self, number: int, entry: CacheEntry):
+        self.__memory[number] = entry
+        self.__memory.move_to_end(number)
+        if len(self.__memory) > self.capacity:
+            self.__memory.popitem(last=False)
+
+    def flush(self):
+        """
+        Writes the new entries to the database, in one transaction
+        """
+        if self.__database is None or not self.__unwritten:
+            return
+        with self.__database:
+            self.__database.executemany(
+                'INSERT OR REPLACE INTO results (n, is_prime, factors, remaining, attempts) VALUES (?, ?, ?, ?, ?)',
+                [(str(number), entry.is_prime, None if entry.factors is None else json.dumps(entry.factors),
+                  json.dumps(entry.remaining), json.dumps(entry.attempts or {}))
+                 for number, entry in self.__unwritten.items()])
+        self.__unwritten.clear()
+
+    def close(self):
+        self.flush()
+        if self.__database is not None:
+            self.__database.close()
+            self.__database = None
+
+    # ------------------------------------------------------------------ cached computations
+
+    def __count(self, source: str):
+        self.stats[source] += 1
+        if metrics.enabled:
+            metrics.count(f'cache.{source}')
+
+    def is_prime(self, number: int, test: Callable[[int], bool]) -> tuple[bool, str]:
+        """
+        :param test: computes the verdict when it is not cached
+        :return: the verdict and where it came from ('memory', 'disk' or 'miss')
+        """
+        entry, tier = self.get(number)
+        if entry is not None and entry.is_prime is not None:
+            self.__count(tier)
+            return entry.is_prime, tier
+
+        verdict = test(number)
+        self.put(number, (entry or CacheEntry())._replace(is_prime=verdict))
+        self.__count('miss')
+        return verdict, 'miss'
+
+    def __progressed(self, part: int) -> bool:
+        """
+        :return: True if the part has an entry of its own which splits it further than being left whole
+        """
+        entry = self.get(part)[0]
+        return entry is not None and entry.factors is not None and entry.remaining != (part,)
+
+    def factor(self, number: int, method: str, iterations: int,
+               factorize: Callable[[int, str, int], dict]) -> tuple[dict, str]:
+        """
+        :param factorize: computes the factorization of a part (see pkc.tasks.factor)
+        :return: the factorization (as returned by factorize) and where it came from ('memory', 'disk', 'resumed'
+                 if a partial factorization was continued, 'miss' if it was computed from scratch)
+        """
+        entry, tier = self.get(number)
+        # the attempts recorded for n already cover this one, only the parts factored since on their own can help
+        tried = entry is not None and entry.is_enough(method, iterations)
+        if tried and not any(self.__progressed(part) for part in entry.remaining):
+            self.__count(tier)
+            return entry.as_factorization(), tier
+
+        if entry is not None and entry.factors is not None:
+            source, factors, parts, attempts = 'resumed', list(entry.factors), list(entry.remaining), \
+                dict(entry.attempts or {})
+        else:
+            source, factors, parts, attempts = 'miss', list(), [number], dict()
+
+        remaining = list()
+        while parts:
+            part = parts.pop()
+            part_entry = self.get(part)[0] if part != number else None
+            if part_entry is not None and part_entry.factors is not None:
+                # the part was (at least partially) factored on its own
+                factors.extend(part_entry.factors)
+                if tried or part_entry.is_enough(method, iterations):
+                    remaining.extend(part_entry.remaining)
+                    continue
+                to_split = part_entry.remaining
+            elif tried:
+                remaining.append(part)
+                continue
+            else:
+                to_split = (part,)
+            for composite in to_split:
+                result = factorize(composite, method, iterations)
+                factors.extend(result['factors'])
+                remaining.extend(result['remaining'])
+
+        attempts[method] = max(attempts.get(method, 0), iterations)
+        result = CacheEntry(tuple(factors) == (number,), tuple(sorted(factors)), tuple(sorted(remaining)),
+                            attempts if remaining else None)
+        self.put(number, result)
+        # the parts which could not be split are remembered too, so that factoring them alone is not redone
+        for part in result.remaining:
+            if part != number:
+                self.put(part, CacheEntry(False, (), (part,), {method: iterations}))
+        self.__count(source)
+        return result.as_factorization(), source
+
+    def hit_rates(self) -> dict:
+        """
+        :return: the number of lookups per source and the fraction of them answered without computing anything
+        """
+        lookups = sum(self.stats.values())
+        return {'lookups': lookups, **{source: self.stats[source] for source in SOURCES},
+                'hit_rate': (self.stats['memory'] + self.stats['disk']) / lookups if lookups else 0.0}
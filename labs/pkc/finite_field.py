@@ -0,0 +1,796 @@
+"""
+Finite fields GF(p^n), in the polynomial basis: GF(p)[x] / (f) for a monic irreducible polynomial f of degree n
+    -> GF(2^m) (GF2m): an element is an int whose bit i is the coefficient of x^i; addition is xor and
+       multiplication is the carry-less shift-and-xor product, reduced by xor-ing shifted copies of f
+    -> GF(p^n) (GFpn): an element is a tuple of its n coefficients, lowest degree first
+    -> the fields of at most TABLE_SIZE elements precompute, for a generator g of the multiplicative group, the
+       antilog table (k -> g^k) and the log table (a -> k with g^k = a), so that a * b = g^(log a + log b), a^(-1) and
+       a^e are table lookups; the antilog table is stored twice in a row, so log a + log b is never reduced; the Zech
+       logarithms (Z(k) = log(1 + g^k)) are derived from them
+    -> the larger fields multiply polynomials directly, GF(2^m) inverts by the extended Euclidean algorithm on bit
+       vectors and GF(p^n) by a^(p^n - 2)
+    -> the *_array methods work on whole NumPy arrays of elements at once (ints for GF(2^m), arrays whose last axis
+       holds the coefficients for GF(p^n)): gathers in the tables, or the shift-and-xor product done on all the
+       elements in lock-step for GF(2^m) with m <= 63; without NumPy they fall back to lists
+    -> log: the discrete logarithm, by lookup in the tables or else by baby-step giant-step (O(sqrt(p^n)) time and
+       memory, so fields up to about 2^50 elements)
+    -> is_irreducible / is_primitive / find_irreducible: Rabin's irreducibility test (f of degree n is irreducible
+       iff x^(p^n) = x mod f and gcd(x^(p^(n/r)) - x, f) = 1 for every prime r dividing n), and the order of x
+       modulo f for primitivity, which needs the factorization of p^n - 1 (done by pkc.tasks)
+
+The polynomials over GF(2) are given as bit vectors (ints), the others as tuples of coefficients, lowest degree first
+(e.g. x^2 + 2 over GF(3) is (2, 0, 1)).
+
+usage (from the labs directory):
+    python -m pkc.finite_field find 2 8 --primitive
+    python -m pkc.finite_field find 3 5 --count 4
+    python -m pkc.finite_field log 2 8 0x53
+    python -m pkc.finite_field log 2 8 0x53 --modulus 0x11b --base 0x03
+"""
+
+import argparse
+import functools
+import math
+import random
+import sys
+from typing import Iterable, Iterator, Optional, Union
+
+from pkc import tasks
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# the number of bits of a factor handled at once by clmul
+WINDOW_BITS = 4
+# the fields with at most this many elements get log/antilog tables
+TABLE_SIZE = 1 << 16
+# the largest field for which log tries the baby-step giant-step algorithm
+MAX_LOG_ORDER = 1 << 50
+# the number of iterations of Pollard's rho when factoring p^n - 1 (the orders of the multiplicative groups)
+FACTOR_ITERATIONS = 1 << 20
+
+Polynomial = Union[int, tuple]
+
+
+# ------------------------------------------------------------------ polynomials over GF(2), as bit vectors
+
+
+def clmul(a: int, b: int) -> int:
+    """
+    Carry-less multiplication: the product of two polynomials over GF(2), by shifts and xors
+    The smaller factor is read 4 bits at a time, the 16 multiples of the other one by the polynomials of degree < 4
+    being computed first.
+    """
+    if a.bit_length() < b.bit_length():
+        a, b = b, a
+    result = 0
+    if b.bit_length() <= 2 * WINDOW_BITS:
+        while b:
+            if b & 1:
+                result ^= a
+            a <<= 1
+            b >>= 1
+        return result
+
+    multiples = [0, a]
+    for i in range(2, 1 << WINDOW_BITS):
+        multiples.append(multiples[i >> 1] << 1 if i % 2 == 0 else multiples[i - 1] ^ a)
+    window, shift = (1 << WINDOW_BITS) - 1, 0
+    while b:
+        result ^= multiples[b & window] << shift
+        b >>= WINDOW_BITS
+        shift += WINDOW_BITS
+    return result
+
+
+def clmod(a: int, modulus: int) -> int:
+    """
+    :return: the remainder of the division of two polynomials over GF(2)
+    x^n = f - x^n mod f, for f of degree n: the part of a above x^n is folded down by a product with the low terms of
+    f, which for the usual sparse f (trinomials, pentanomials) takes a few rounds instead of one per extra bit.
+    """
+    degree = modulus.bit_length() - 1
+    if degree < 0:
+        raise ZeroDivisionError('division by the zero polynomial')
+    low, mask = modulus ^ (1 << degree), (1 << degree) - 1
+    if low.bit_length() > degree // 2:
+        # a dense modulus: folding would not shorten a much
+        while a.bit_length() > degree:
+            a ^= modulus << (a.bit_length() - 1 - degree)
+        return a
+    while a.bit_length() > degree:
+        a = (a & mask) ^ clmul(a >> degree, low)
+    return a
+
+
+def _binary_gcd(a: int, b: int) -> int:
+    while b:
+        a, b = b, clmod(a, b)
+    return a
+
+
+def _binary_power_mod(base: int, exponent: int, modulus: int) -> int:
+    result, base = clmod(1, modulus), clmod(base, modulus)
+    while exponent:
+        if exponent & 1:
+            result = clmod(clmul(result, base), modulus)
+        base = clmod(clmul(base, base), modulus)
+        exponent >>= 1
+    return result
+
+
+# ------------------------------------------------------------------ polynomials over GF(p), as lists of coefficients
+
+
+def _trim(coefficients: list) -> list:
+    while coefficients and coefficients[-1] == 0:
+        coefficients.pop()
+    return coefficients
+
+
+def _poly_mod(a: Iterable[int], b: list, p: int) -> list:
+    """
+    :return: a mod b, for a trimmed non-zero b
+    """
+    a = _trim([c % p for c in a])
+    inverse = pow(b[-1], -1, p)
+    while len(a) >= len(b):
+        factor, shift = a[-1] * inverse % p, len(a) - len(b)
+        for i, c in enumerate(b):
+            a[shift + i] = (a[shift + i] - factor * c) % p
+        _trim(a)
+    return a
+
+
+def _poly_multiply_mod(a: list, b: list, modulus: list, p: int) -> list:
+    product = [0] * max(len(a) + len(b) - 1, 0)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                product[i + j] += x * y
+    return _poly_mod(product, modulus, p)
+
+
+def _poly_power_mod(base: list, exponent: int, modulus: list, p: int) -> list:
+    result, base = _poly_mod([1], modulus, p), _poly_mod(base, modulus, p)
+    while exponent:
+        if exponent & 1:
+            result = _poly_multiply_mod(result, base, modulus, p)
+        base = _poly_multiply_mod(base, base, modulus, p)
+        exponent >>= 1
+    return result
+
+
+def _poly_gcd(a: list, b: list, p: int) -> list:
+    a, b = _trim([c % p for c in a]), _trim([c % p for c in b])
+    while b:
+        a, b = b, _poly_mod(a, b, p)
+    return a
+
+
+# ------------------------------------------------------------------ irreducible and primitive polynomials
+
+
+@functools.lru_cache(maxsize=64)
+def _prime_divisors(number: int) -> tuple[int, ...]:
+    """
+    :raises ValueError: if the number could not be factored completely
+    """
+    factorization = tasks.factor(number, 'pollard', FACTOR_ITERATIONS)
+    if not factorization['complete']:
+        raise ValueError(f'{number} could not be factored (remaining: {factorization["remaining"]})')
+    return tuple(sorted(set(factorization['factors'])))
+
+
+def _check_characteristic(p: int):
+    """
+    :raises ValueError: if p is not prime
+    """
+    if p < 2 or not tasks.is_prime(p):
+        raise ValueError(f'the characteristic must be prime, not {p}')
+
+
+def _check(polynomial: Polynomial, p: int) -> Polynomial:
+    """
+    :return: the polynomial as an int for p = 2, as a trimmed tuple otherwise
+    :raises ValueError: if p is not prime or the polynomial is not monic
+    """
+    _check_characteristic(p)
+    if isinstance(polynomial, int):
+        if p != 2:
+            raise ValueError('only the polynomials over GF(2) can be given as bit vectors')
+        return polynomial
+    coefficients = tuple(_trim([c % p for c in polynomial]))
+    if not coefficients or coefficients[-1] != 1:
+        raise ValueError(f'the polynomial {polynomial} is not monic')
+    if p == 2:
+        return sum(c << i for i, c in enumerate(coefficients))
+    return coefficients
+
+
+def is_irreducible(polynomial: Polynomial, p: int = 2) -> bool:
+    """
+    Rabin's irreducibility test, see the module's documentation
+    :param polynomial: a monic polynomial over GF(p), as a bit vector for p = 2 or as a tuple of coefficients
+    :return: True if the polynomial is irreducible over GF(p), False otherwise
+    """
+    polynomial = _check(polynomial, p)
+    if p == 2:
+        degree = polynomial.bit_length() - 1
+        if degree < 1:
+            return False
+        x = clmod(0b10, polynomial)
+        power, powers = x, dict()
+        for k in range(1, degree + 1):
+            power = clmod(clmul(power, power), polynomial)
+            powers[k] = power
+        return power == x and all(_binary_gcd(powers[degree // r] ^ x, polynomial) == 1
+                                  for r in _prime_divisors(degree))
+
+    modulus = list(polynomial)
+    degree = len(modulus) - 1
+    if degree < 1:
+        return False
+    x = _poly_mod([0, 1], modulus, p)
+    power, powers = x, dict()
+    for k in range(1, degree + 1):
+        power = _poly_power_mod(power, p, modulus, p)
+        powers[k] = power
+    if power != x:
+        return False
+    for r in _prime_divisors(degree):
+        difference = [a - b for a, b in zip(powers[degree // r] + [0] * degree, x + [0] * degree)]
+        if len(_poly_gcd(difference, modulus, p)) != 1:
+            return False
+    return True
+
+
+def is_primitive(polynomial: Polynomial, p: int = 2) -> bool:
+    """
+    :param polynomial: a monic polynomial over GF(p), as a bit vector for p = 2 or as a tuple of coefficients
+    :return: True if the polynomial is irreducible and x generates the multiplicative group of GF(p)[x] / (f)
+    :raises ValueError: if p^n - 1 could not be factored
+    """
+    if not is_irreducible(polynomial, p):
+        return False
+    polynomial = _check(polynomial, p)
+    if p == 2:
+        degree = polynomial.bit_length() - 1
+        order = (1 << degree) - 1
+        return all(_binary_power_mod(0b10, order // r, polynomial) != 1 for r in _prime_divisors(order))
+    modulus = list(polynomial)
+    order = p ** (len(modulus) - 1) - 1
+    return all(_poly_power_mod([0, 1], order // r, modulus, p) != [1] for r in _prime_divisors(order))
+
+
+def irreducible_polynomials(p: int, degree: int, primitive: bool = False) -> Iterator[Polynomial]:
+    """
+    :return: the monic irreducible (or primitive) polynomials of the degree over GF(p) with a non-zero constant
+             term, in increasing order of their coefficients read as a number in base p (x^n + ... + c1 x + c0 is
+             c0 + c1 p + ... + p^n), as bit vectors for p = 2 and tuples otherwise
+    :raises ValueError: if p is not prime or the degree is not positive
+    """
+    _check_characteristic(p)
+    if degree < 1:
+        raise ValueError(f'the degree must be positive, not {degree}')
+    test = is_primitive if primitive else is_irreducible
+    for number in range(p ** degree + 1, 2 * p ** degree):
+        if number % p == 0:
+            continue
+        candidate = number
+        if p != 2:
+            candidate = tuple(number // p ** i % p for i in range(degree + 1))
+        if test(candidate, p):
+            yield candidate
+
+
+@functools.lru_cache(maxsize=None)
+def find_irreducible(p: int, degree: int, primitive: bool = False) -> Polynomial:
+    """
+    :return: the first of irreducible_polynomials (e.g. x^8 + x^4 + x^3 + x + 1 for GF(2^8), the one of AES, or
+             x^8 + x^4 + x^3 + x^2 + 1 if primitive)
+    :raises ValueError: if p is not prime or the degree is not positive
+    """
+    polynomial = next(irreducible_polynomials(p, degree, primitive), None)
+    if polynomial is None:
+        # there is one of every positive degree over every GF(p), the search cannot end without one
+        raise ValueError(f'no {"primitive" if primitive else "irreducible"} polynomial of degree {degree} over GF({p})')
+    return polynomial
+
+
+def format_polynomial(polynomial: Polynomial) -> str:
+    """
+    :return: the polynomial written with powers of x, e.g. 'x^8 + x^4 + x^3 + x + 1' or 'x^2 + 2'
+    """
+    if isinstance(polynomial, int):
+        coefficients = [polynomial >> i & 1 for i in range(polynomial.bit_length())]
+    else:
+        coefficients = list(polynomial)
+    terms = list()
+    for i in reversed(range(len(coefficients))):
+        c = coefficients[i]
+        if c:
+            power = '1' if i == 0 else 'x' if i == 1 else f'x^{i}'
+            terms.append(power if c == 1 else str(c) if i == 0 else f'{c}{power}')
+    return ' + '.join(terms) or '0'
+
+
+# ------------------------------------------------------------------ the fields
+
+
+class _Field:
+    def __init__(self, p: int, degree: int, modulus: Polynomial):
+        """
+        The operations shared by GF(2^m) and GF(p^n): the tables and everything derived from multiply and inverse
+        The subclasses define zero, one, x, element, add, subtract, _index, _element, _multiply and _inverse.
+        """
+        self.characteristic = p
+        self.degree = degree
+        self.order = p ** degree
+        self.modulus = modulus
+        self._exp: Optional[list] = None
+        self._log: Optional[list] = None
+        self._zech: Optional[list] = None
+        if self.order <= TABLE_SIZE:
+            self.__build_tables()
+
+    def __repr__(self):
+        return f'GF({self.characteristic}^{self.degree}) modulo {format_polynomial(self.modulus)}'
+
+    def __build_tables(self):
+        generator = self.generator
+        exp, log = list(), [0] * self.order
+        element = self.one
+        for k in range(self.order - 1):
+            exp.append(element)
+            log[self._index(element)] = k
+            element = self._multiply(element, generator)
+        self._exp, self._log = exp + exp, log
+        # 1 + g^k = g^Z(k), None when 1 + g^k = 0
+        self._zech = [None if (total := self.add(self.one, exp[k])) == self.zero else log[self._index(total)]
+                      for k in range(self.order - 1)]
+
+    @property
+    def has_tables(self) -> bool:
+        return self._log is not None
+
+    @functools.cached_property
+    def generator(self):
+        """
+        The generator of the multiplicative group the tables and log are based on: the class of x if it is one (the
+        modulus being primitive), otherwise the first x + a which is one, a going through the elements in order (the
+        elements of GF(p) come first, and they are not generators for n > 1)
+        :raises ValueError: if p^n - 1 could not be factored
+        """
+        group_order = self.order - 1
+        divisors = _prime_divisors(group_order) if group_order > 1 else ()
+        for candidate in (self.add(self.x, self._element(i)) for i in range(self.order)):
+            if candidate != self.zero and all(self.__power(candidate, group_order // r) != self.one
+                                              for r in divisors):
+                return candidate
+        raise AssertionError('the multiplicative group of a finite field is cyclic')
+
+    def __power(self, base, exponent: int):
+        result = self.one
+        while exponent:
+            if exponent & 1:
+                result = self._multiply(result, base)
+            base = self._multiply(base, base)
+            exponent >>= 1
+        return result
+
+    def multiply(self, a, b):
+        if self._log is None:
+            return self._multiply(a, b)
+        if a == self.zero or b == self.zero:
+            return self.zero
+        return self._exp[self._log[self._index(a)] + self._log[self._index(b)]]
+
+    def inverse(self, a):
+        """
+        :raises ZeroDivisionError: if a is 0
+        """
+        if a == self.zero:
+            raise ZeroDivisionError('0 has no inverse')
+        if self._log is None:
+            return self._inverse(a)
+        return self._exp[self.order - 1 - self._log[self._index(a)]]
+
+    def divide(self, a, b):
+        return self.multiply(a, self.inverse(b))
+
+    def power(self, a, exponent: int):
+        """
+        :return: a^exponent, the exponent being any integer (a^0 = 1, negative ones only for a != 0)
+        """
+        if exponent < 0:
+            a, exponent = self.inverse(a), -exponent
+        if a == self.zero:
+            return self.one if exponent == 0 else self.zero
+        if self._log is not None:
+            return self._exp[self._log[self._index(a)] * exponent % (self.order - 1)]
+        return self.__power(a, exponent)
+
+    def zech_log(self, k: int) -> Optional[int]:
+        """
+        :return: the Zech logarithm Z(k), such that 1 + g^k = g^Z(k), None if 1 + g^k = 0 (only in the fields with
+                 tables)
+        """
+        if self._zech is None:
+            raise ValueError(f'{self} has no tables')
+        return self._zech[k % (self.order - 1)]
+
+    def log(self, a, base=None) -> int:
+        """
+        The discrete logarithm: the smallest k >= 0 with base^k = a
+        :param base: the generator of the field if None
+        :raises ValueError: if a is not a power of the base, or if the field is too large
+        """
+        if a == self.zero:
+            raise ValueError('0 is not a power of any element')
+        if self._log is not None and (base is None or base == self.generator):
+            return self._log[self._index(a)]
+        base = self.generator if base is None else base
+        if self.order > MAX_LOG_ORDER:
+            raise ValueError(f'{self} is too large for the baby-step giant-step algorithm')
+
+        # baby steps: base^j for 0 <= j < m; giant steps: a * base^(-im)
+        steps = math.isqrt(self.order - 1) + 1
+        baby = dict()
+        element = self.one
+        for j in range(steps):
+            baby.setdefault(element, j)
+            element = self.multiply(element, base)
+        giant = self.inverse(self.power(base, steps))
+        element = a
+        for i in range(steps):
+            if element in baby:
+                return i * steps + baby[element]
+            element = self.multiply(element, giant)
+        raise ValueError(f'{a} is not a power of {base}')
+
+    def random(self, rng: Optional[random.Random] = None, nonzero: bool = False):
+        index = (rng or random).randrange(1 if nonzero else 0, self.order)
+        return self._element(index)
+
+    def elements(self) -> Iterator:
+        return (self._element(i) for i in range(self.order))
+
+    @functools.cached_property
+    def _array_tables(self):
+        """
+        The tables as NumPy arrays of element indices
+        """
+        return (np.array([self._index(e) for e in self._exp], dtype=np.int64),
+                np.array(self._log, dtype=np.int64))
+
+    def _multiply_indices(self, a, b):
+        # a, b: NumPy arrays of element indices, in a field with tables
+        exp, log = self._array_tables
+        return np.where((a == 0) | (b == 0), 0, exp[log[a] + log[b]])
+
+    def _inverse_indices(self, a):
+        if (a == 0).any():
+            raise ZeroDivisionError('0 has no inverse')
+        exp, log = self._array_tables
+        return exp[self.order - 1 - log[a]]
+
+    def _power_indices(self, a, exponent: int):
+        exp, log = self._array_tables
+        if exponent < 0:
+            a, exponent = self._inverse_indices(a), -exponent
+        if exponent == 0:
+            return np.ones_like(a)
+        return np.where(a == 0, 0, exp[log[a] * (exponent % (self.order - 1)) % (self.order - 1)])
+
+
+class GF2m(_Field):
+    def __init__(self, m: int, modulus: Optional[int] = None):
+        """
+        The field GF(2^m), its elements being the ints below 2^m
+        :param modulus: a monic irreducible polynomial of degree m, as a bit vector (by default, the first primitive
+                        one for the fields with tables, the first irreducible one otherwise, see find_irreducible)
+        :raises ValueError: if the modulus is not irreducible or not of degree m
+        """
+        if modulus is None:
+            modulus = find_irreducible(2, m, primitive=2 ** m <= TABLE_SIZE)
+        elif modulus.bit_length() - 1 != m or not is_irreducible(modulus):
+            raise ValueError(f'{format_polynomial(modulus)} is not an irreducible polynomial of degree {m}')
+        self.zero, self.one, self.x = 0, 1, clmod(0b10, modulus)
+        super().__init__(2, m, modulus)
+
+    @staticmethod
+    def _index(element: int) -> int:
+        return element
+
+    @staticmethod
+    def _element(index: int) -> int:
+        return index
+
+    def element(self, value: int) -> int:
+        """
+        :return: the polynomial given as a bit vector, reduced modulo the modulus
+        """
+        return clmod(value, self.modulus)
+
+    @staticmethod
+    def add(a: int, b: int) -> int:
+        return a ^ b
+
+    subtract = add
+
+    def _multiply(self, a: int, b: int) -> int:
+        return clmod(clmul(a, b), self.modulus)
+
+    def _inverse(self, a: int) -> int:
+        # the extended Euclidean algorithm, keeping only the coefficient of a: u = g1 * a, v = g2 * a mod f
+        u, v, g1, g2 = a, self.modulus, 1, 0
+        while u != 1:
+            shift = u.bit_length() - v.bit_length()
+            if shift < 0:
+                u, v, g1, g2 = v, u, g2, g1
+                shift = -shift
+            u ^= v << shift
+            g1 ^= g2 << shift
+        return g1
+
+    def multiply(self, a: int, b: int) -> int:
+        # the lookups inlined, this being the hot path
+        if self._log is None:
+            return clmod(clmul(a, b), self.modulus)
+        if a == 0 or b == 0:
+            return 0
+        return self._exp[self._log[a] + self._log[b]]
+
+    # ------------------------------------------------------------------ arrays of elements
+
+    def add_array(self, a, b):
+        if np is None:
+            return [x ^ y for x, y in zip(a, b)]
+        return np.bitwise_xor(np.asarray(a, dtype=np.uint64), np.asarray(b, dtype=np.uint64))
+
+    def multiply_array(self, a, b):
+        """
+        Multiplies the elements of two arrays (broadcast together) pairwise
+        :raises ValueError: if the field has neither tables nor m <= 63
+        """
+        if np is None:
+            return [self.multiply(x, y) for x, y in zip(a, b)]
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=np.uint64), np.asarray(b, dtype=np.uint64))
+        if self._log is not None:
+            return self._multiply_indices(a.astype(np.int64), b.astype(np.int64)).astype(np.uint64)
+        if self.degree > 63:
+            raise ValueError(f'the elements of {self} do not fit in 64 bits')
+
+        # shift-and-xor, a being multiplied by x and reduced at every step, so that it stays below 2^m
+        top, low = np.uint64(self.degree - 1), np.uint64(self.modulus ^ (1 << self.degree))
+        one, zero = np.uint64(1), np.uint64(0)
+        result, a, b = np.zeros_like(a), a.copy(), b.copy()
+        for _ in range(self.degree):
+            result ^= np.where(b & one, a, zero)
+            b >>= one
+            a = ((a << one) & np.uint64((1 << self.degree) - 1)) ^ np.where((a >> top) & one, low, zero)
+        return result
+
+    def power_array(self, a, exponent: int):
+        if np is None:
+            return [self.power(x, exponent) for x in a]
+        a = np.asarray(a, dtype=np.uint64)
+        if self._log is not None:
+            return self._power_indices(a.astype(np.int64), exponent).astype(np.uint64)
+        if exponent < 0:
+            a, exponent = self.inverse_array(a), -exponent
+        result = np.ones_like(a)
+        while exponent:
+            if exponent & 1:
+                result = self.multiply_array(result, a)
+            a = self.multiply_array(a, a)
+            exponent >>= 1
+        return result
+
+    def inverse_array(self, a):
+        """
+        :raises ZeroDivisionError: if an element is 0
+        """
+        if np is None:
+            return [self.inverse(x) for x in a]
+        a = np.asarray(a, dtype=np.uint64)
+        if self._log is not None:
+            return self._inverse_indices(a.astype(np.int64)).astype(np.uint64)
+        if (a == 0).any():
+            raise ZeroDivisionError('0 has no inverse')
+        # a^(2^m - 2) = a^(-1)
+        return self.power_array(a, self.order - 2)
+
+
+class GFpn(_Field):
+    def __init__(self, p: int, n: int, modulus: Optional[tuple] = None):
+        """
+        The field GF(p^n), its elements being tuples of n coefficients in [0, p), lowest degree first
+        :param modulus: a monic irreducible polynomial of degree n, as a tuple of its n + 1 coefficients (by
+                        default, the first primitive one for the fields with tables, the first irreducible one
+                        otherwise, see find_irreducible)
+        :raises ValueError: if p is not prime, or the modulus is not irreducible or not of degree n
+        """
+        if modulus is None:
+            modulus = find_irreducible(p, n, primitive=p ** n <= TABLE_SIZE)
+        if isinstance(modulus, int):
+            # the default modulus over GF(2) is a bit vector
+            modulus = tuple(modulus >> i & 1 for i in range(modulus.bit_length()))
+        modulus = tuple(c % p for c in modulus)
+        if len(modulus) != n + 1 or not is_irreducible(modulus, p):
+            raise ValueError(f'{format_polynomial(modulus)} is not an irreducible polynomial of degree {n}')
+        self.__polynomial = list(modulus)
+        self.zero, self.one = (0,) * n, (1,) + (0,) * (n - 1)
+        x = _poly_mod((0, 1), self.__polynomial, p)
+        self.x = tuple(x) + (0,) * (n - len(x))
+        super().__init__(p, n, modulus)
+
+    def _index(self, element: tuple) -> int:
+        index = 0
+        for c in reversed(element):
+            index = index * self.characteristic + c
+        return index
+
+    def _element(self, index: int) -> tuple:
+        coefficients = list()
+        for _ in range(self.degree):
+            index, c = divmod(index, self.characteristic)
+            coefficients.append(c)
+        return tuple(coefficients)
+
+    def __pad(self, coefficients: list) -> tuple:
+        return tuple(coefficients) + (0,) * (self.degree - len(coefficients))
+
+    def element(self, coefficients: Iterable[int]) -> tuple:
+        """
+        :return: the polynomial given by its coefficients (lowest degree first, any number of them), reduced
+                 modulo the modulus
+        """
+        return self.__pad(_poly_mod(coefficients, self.__polynomial, self.characteristic))
+
+    def to_int(self, element: tuple) -> int:
+        """
+        :return: the element as a number in [0, p^n), its coefficients being the digits in base p
+        """
+        return self._index(element)
+
+    def from_int(self, number: int) -> tuple:
+        return self._element(number % self.order)
+
+    def add(self, a: tuple, b: tuple) -> tuple:
+        p = self.characteristic
+        return tuple((x + y) % p for x, y in zip(a, b))
+
+    def subtract(self, a: tuple, b: tuple) -> tuple:
+        p = self.characteristic
+        return tuple((x - y) % p for x, y in zip(a, b))
+
+    def negative(self, a: tuple) -> tuple:
+        return tuple(-x % self.characteristic for x in a)
+
+    def _multiply(self, a: tuple, b: tuple) -> tuple:
+        return self.__pad(_poly_multiply_mod(list(a), list(b), self.__polynomial, self.characteristic))
+
+    def _inverse(self, a: tuple) -> tuple:
+        # a^(p^n - 1) = 1
+        return self.power(a, self.order - 2)
+
+    # ------------------------------------------------------------------ arrays of elements
+
+    def add_array(self, a, b):
+        """
+        :param a, b: arrays whose last axis holds the n coefficients of the elements
+        """
+        if np is None:
+            return [self.add(x, y) for x, y in zip(a, b)]
+        return (np.asarray(a, dtype=np.int64) + np.asarray(b, dtype=np.int64)) % self.characteristic
+
+    def __to_indices(self, a):
+        return np.asarray(a, dtype=np.int64) @ (self.characteristic ** np.arange(self.degree, dtype=np.int64))
+
+    def __from_indices(self, indices):
+        return indices[..., np.newaxis] // self.characteristic ** np.arange(self.degree, dtype=np.int64) \
+            % self.characteristic
+
+    def multiply_array(self, a, b):
+        """
+        Multiplies the elements of two arrays (broadcast together) pairwise
+        :param a, b: arrays whose last axis holds the n coefficients of the elements
+        :raises ValueError: if the field has no tables and the products of coefficients do not fit in 64 bits
+        """
+        if np is None:
+            return [self.multiply(x, y) for x, y in zip(a, b)]
+        if self._log is not None:
+            return self.__from_indices(self._multiply_indices(self.__to_indices(a), self.__to_indices(b)))
+
+        p, n = self.characteristic, self.degree
+        if (p - 1) ** 2 * n >= 1 << 63:
+            raise ValueError(f'the products of the coefficients of {self} do not fit in 64 bits')
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64))
+        product = np.zeros(a.shape[:-1] + (2 * n - 1,), dtype=np.int64)
+        for i in range(n):
+            product[..., i:i + n] += a[..., i:i + 1] * b
+        product %= p
+        # the terms of degree >= n are replaced by their value modulo the modulus, from the highest one down
+        modulus = np.array(self.modulus[:n], dtype=np.int64)
+        for k in range(2 * n - 2, n - 1, -1):
+            product[..., k - n:k] = (product[..., k - n:k] - product[..., k:k + 1] * modulus) % p
+        return product[..., :n]
+
+    def power_array(self, a, exponent: int):
+        if np is None:
+            return [self.power(x, exponent) for x in a]
+        if self._log is not None:
+            return self.__from_indices(self._power_indices(self.__to_indices(a), exponent))
+        a = np.asarray(a, dtype=np.int64)
+        if exponent < 0:
+            a, exponent = self.inverse_array(a), -exponent
+        result = np.zeros_like(a)
+        result[..., 0] = 1
+        while exponent:
+            if exponent & 1:
+                result = self.multiply_array(result, a)
+            a = self.multiply_array(a, a)
+            exponent >>= 1
+        return result
+
+    def inverse_array(self, a):
+        """
+        :raises ZeroDivisionError: if an element is 0
+        """
+        if np is None:
+            return [self.inverse(x) for x in a]
+        if self._log is not None:
+            return self.__from_indices(self._inverse_indices(self.__to_indices(a)))
+        a = np.asarray(a, dtype=np.int64)
+        if (a == 0).all(axis=-1).any():
+            raise ZeroDivisionError('0 has no inverse')
+        return self.power_array(a, self.order - 2)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pkc.finite_field',
+                                     description='Irreducible polynomials and discrete logarithms in GF(p^n).')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    find_parser = commands.add_parser('find', help='list the first irreducible polynomials of a degree')
+    find_parser.add_argument('p', type=int)
+    find_parser.add_argument('n', type=int)
+    find_parser.add_argument('--primitive', action='store_true')
+    find_parser.add_argument('--count', type=int, default=1)
+
+    log_parser = commands.add_parser('log', help='the discrete logarithm of an element of GF(p^n)')
+    log_parser.add_argument('p', type=int)
+    log_parser.add_argument('n', type=int)
+    log_parser.add_argument('element', type=lambda value: int(value, 0),
+                            help='a bit vector for p = 2, the number of the element in base p otherwise')
+    log_parser.add_argument('--modulus', type=lambda value: int(value, 0),
+                            help='a bit vector for p = 2 (default: the first primitive polynomial)')
+    log_parser.add_argument('--base', type=lambda value: int(value, 0), help='default: the generator of the field')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'find':
+            polynomials = irreducible_polynomials(args.p, args.n, args.primitive)
+            for _, polynomial in zip(range(args.count), polynomials):
+                print(format_polynomial(polynomial))
+            return 0
+
+        field = GF2m(args.n, args.modulus) if args.p == 2 else GFpn(args.p, args.n)
+        element = field.element(args.element) if args.p == 2 else field.from_int(args.element)
+        base = None
+        if args.base is not None:
+            base = field.element(args.base) if args.p == 2 else field.from_int(args.base)
+        print(f'{field}, generator {field.generator}')
+        print(field.log(element, base))
+    except ValueError as error:
+        print(f'error: {error}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Opt-in instrumentation of the hot paths: operation counters and per-phase timers
+    -> counters: how many modular multiplications, modular exponentiations, gcds, iterations, ... an algorithm
+       did, named '<algorithm>.<operation>' (e.g. 'pollard.gcd', 'rabin.mulmod')
+    -> phases: the time spent in the named parts of an algorithm (e.g. 'rabin.sqrt', 'rabin.crt', 'rabin.codec'),
+       measured with perf_counter_ns, together with how many times each phase was entered
+    -> the metrics can be exported as a dictionary or as JSON
+
+The instrumentation is disabled by default. The instrumented code checks metrics.enabled before counting and,
+where it can, counts once after a loop instead of once per iteration, while metrics.phase() returns a shared
+no-op context manager, so the disabled instrumentation costs an attribute lookup per counter and a call per phase.
+Phases are never entered inside a hot loop: a loop times its parts itself, under a check of metrics.enabled made
+once, and adds the totals with add_time() after it.
+
+usage:
+    with instrumented() as collected:
+        Rabin((31, 53)).decrypt('BED_HI')
+    print(collected.to_json())
+"""
+
+import contextlib
+import json
+import time
+from typing import Iterator
+
+_NO_PHASE = contextlib.nullcontext()
+
+
+class _Phase:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics: 'Metrics', name: str):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        self.metrics.add_time(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.counters: dict[str, int] = dict()
+        # phase name -> [number of times entered, total time in nanoseconds]
+        self.phases: dict[str, list[int]] = dict()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.counters.clear()
+        self.phases.clear()
+
+    def count(self, name: str, amount: int = 1):
+        """
+        Adds to a counter; callers check self.enabled first, so this is only reached when it is enabled
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_time(self, name: str, elapsed_ns: int, calls: int = 1):
+        """
+        Adds to a phase the time measured by the caller, for the code a with block cannot wrap: a generator's loop
+        is timed without its yields, which run the consumer's code
+        """
+        timing = self.phases.get(name)
+        if timing is None:
+            self.phases[name] = [calls, elapsed_ns]
+        else:
+            timing[0] += calls
+            timing[1] += elapsed_ns
+
+    def phase(self, name: str):
+        """
+        :return: a context manager timing the code it wraps as the given phase (or doing nothing if disabled)
+        """
+        if not self.enabled:
+            return _NO_PHASE
+        return _Phase(self, name)
+
+    def as_dict(self) -> dict:
+        return {
+            'counters': dict(sorted(self.counters.items())),
+            'phases': {name: {'calls': calls, 'total_ns': total_ns, 'mean_ns': total_ns / calls}
+                       for name, (calls, total_ns) in sorted(self.phases.items())},
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
+
+
+metrics = Metrics()
+
+
+@contextlib.contextmanager
+def instrumented(reset: bool = True) -> Iterator[Metrics]:
+    """
+    Enables the instrumentation for the duration of a with block
+    :param reset: if True, the metrics collected before are discarded
+    :return: the metrics being collected
+    """
+    if reset:
+        metrics.reset()
+    was_enabled = metrics.enabled
+    metrics.enable()
+    try:
+        yield metrics
+    finally:
+        metrics.enabled = was_enabled
@@ -0,0 +1,166 @@
+"""
+The number theory core used by the labs and assignments
+    -> gcd: Euclid's algorithm by divisions (iterative), Stein's binary algorithm and Lehmer's algorithm,
+       which does most of the division steps on the leading 64 bits of the numbers only (in Python, this
+       pays off for numbers of several thousands of bits, the smaller ones being left to Euclid's algorithm);
+       for operands of at most SMALL_GCD_BITS bits, the interpreted loop of Stein's algorithm costs more than the
+       whole gcd, so it hands them to math.gcd, and above that size it is slower than Euclid's algorithm (it is
+       the replacement of the gcd by subtractions, not a faster gcd)
+    -> the extended Euclidean algorithm (iterative): a * x + b * y = gcd(a, b)
+    -> the modular inverse: a^(-1) mod n
+    -> the Chinese remainder theorem for any number of pairwise coprime moduli, with the constants
+       depending only on the moduli computed once
+
+gcd() is the one to use when only the result is needed: math.gcd is implemented in C (using Lehmer's
+algorithm for big numbers) and is faster than any of the Python versions.
+"""
+
+import math
+import operator
+from typing import Iterable
+
+LEHMER_BITS = 64
+LEHMER_THRESHOLD = 4096
+# the operands up to this size are left to math.gcd by binary_gcd
+SMALL_GCD_BITS = 64
+
+
+def gcd(a: int, b: int) -> int:
+    """
+    Computes the greatest common divisor of two integers
+    :return: gcd(|a|, |b|)
+    """
+    return math.gcd(a, b)
+
+
+def euclid_gcd(a: int, b: int) -> int:
+    """
+    Euclid's algorithm: (a, b) is replaced by (b, a mod b) until b becomes 0
+    :return: gcd(|a|, |b|)
+    """
+    a, b = abs(a), abs(b)
+    while b:
+        a, b = b, a % b
+    return a
+
+
+def binary_gcd(a: int, b: int) -> int:
+    """
+    Stein's algorithm: the common powers of 2 are removed with shifts, then the smaller number is repeatedly
+    subtracted from the bigger one, dropping all the trailing zeros of the difference at once
+    It is the replacement of lab 1's gcd by subtractions, which it beats at every size (about 240 us against 560 us
+    at 1024 bits), but above SMALL_GCD_BITS it is slower than euclid_gcd (about 1.4 steps per bit against 0.6, each
+    step being a full operation on big integers: 240 us against 85 us at 1024 bits) and much slower than gcd; use
+    those when the algorithm does not matter.
+    :return: gcd(|a|, |b|)
+    """
+    a, b = abs(a), abs(b)
+    if a == 0 or b == 0:
+        return a | b
+    if (a | b).bit_length() <= SMALL_GCD_BITS:
+        return math.gcd(a, b)
+
+    # the lowest set bit of x is x & -x
+    shift = ((a | b) & -(a | b)).bit_length() - 1
+    a >>= (a & -a).bit_length() - 1
+    while b:
+        b >>= (b & -b).bit_length() - 1
+        if a > b:
+            a, b = b, a
+        b -= a
+
+    return a << shift
+
+
+def lehmer_gcd(a: int, b: int) -> int:
+    """
+    Lehmer's algorithm: the quotients of Euclid's algorithm are computed from the leading LEHMER_BITS bits of
+    the numbers for as long as they are guaranteed to be the right ones, and the accumulated transformation
+    is then applied once to the whole numbers; the last LEHMER_THRESHOLD bits are left to Euclid's algorithm
+    :return: gcd(|a|, |b|)
+    """
+    a, b = abs(a), abs(b)
+    if a < b:
+        a, b = b, a
+
+    while b.bit_length() > LEHMER_THRESHOLD:
+        shift = a.bit_length() - LEHMER_BITS
+        x, y = a >> shift, b >> shift
+
+        # the transformation [[A, B], [C, D]] maps (a, b) to the numbers reached after the simulated steps
+        A, B, C, D = 1, 0, 0, 1
+        while y + C and y + D:
+            q = (x + A) // (y + C)
+            if q != (x + B) // (y + D):
+                break
+            A, B, C, D = C, D, A - q * C, B - q * D
+            x, y = y, x - q * y
+
+        if B == 0:
+            # not a single step could be simulated, so one step is done on the whole numbers
+            a, b = b, a % b
+        else:
+            a, b = A * a + B * b, C * a + D * b
+
+    return euclid_gcd(a, b)
+
+
+def extended_gcd(a: int, b: int) -> tuple[int, int, int]:
+    """
+    The extended Euclidean algorithm, computed iteratively
+    :return: (d, x, y) such that a * x + b * y = d = gcd(a, b), d >= 0
+    """
+    # only the coefficient of a is tracked, the one of b follows from a * x + b * y = d at the end
+    original_a, original_b = a, b
+    x0, x1 = 1, 0
+    while b:
+        q = a // b
+        a, b = b, a - q * b
+        x0, x1 = x1, x0 - q * x1
+
+    # with negative inputs, the last remainder can be -gcd(a, b)
+    if a < 0:
+        a, x0 = -a, -x0
+    return a, x0, (a - original_a * x0) // original_b if original_b else 0
+
+
+def inverse_mod(a: int, n: int) -> int:
+    """
+    Computes the modular multiplicative inverse
+    :return: x in [0, n) such that a * x = 1 mod n
+    :raises ValueError: if gcd(a, n) != 1
+    """
+    return pow(a, -1, n)
+
+
+class CRT:
+    def __init__(self, moduli: Iterable[int]):
+        """
+        Prepares the solving of systems x = ai mod mi, for the given pairwise coprime moduli
+            M = m1 * m2 * ... * mk,  Mi = M / mi
+            x = a1 * c1 + ... + ak * ck mod M,  where ci = Mi * (Mi^(-1) mod mi)
+        :raises ValueError: if the moduli are not pairwise coprime
+        """
+        self.moduli = tuple(moduli)
+        self.modulus = math.prod(self.moduli)
+
+        self.__coefficients = list()
+        for m in self.moduli:
+            partial = self.modulus // m
+            try:
+                self.__coefficients.append(partial * inverse_mod(partial, m) % self.modulus)
+            except ValueError:
+                raise ValueError(f'the moduli {self.moduli} are not pairwise coprime') from None
+        # two moduli (Rabin's p and q) is the usual case: solved without iterating
+        self.__pair = tuple(self.__coefficients) if len(self.moduli) == 2 else None
+
+    def solve(self, residues: Iterable[int]) -> int:
+        """
+        Solves the system x = ai mod mi
+        :param residues: a1, ..., ak, in the order of the moduli
+        :return: the solution x in [0, M)
+        """
+        if self.__pair is not None:
+            a1, a2 = residues
+            return (a1 * self.__pair[0] + a2 * self.__pair[1]) % self.modulus
+        return sum(map(operator.mul, residues, self.__coefficients)) % self.modulus
@@ -0,0 +1,274 @@
+"""
+Probabilistic primality tests for large numbers
+    -> every test starts with trial division by the primes below TRIAL_DIVISION_BOUND (taken from pkc.sieve), done
+       as a single gcd with their product: most composites are rejected there, and the numbers below the square of
+       the bound are settled by it
+    -> jacobi: the binary algorithm for the Jacobi symbol (a/n), n odd: the factors of 2 of a are removed with
+       (2/n) = (-1)^((n^2 - 1) / 8) and the symbol is flipped by the reciprocity law, (a/n) = (n/a) unless
+       a = n = 3 mod 4; no factorization and no exponentiation are needed
+    -> miller_rabin: the strong probable prime test for k random bases, a composite passing a round with
+       probability at most 1/4
+    -> strong_lucas: the strong Lucas probable prime test with Selfridge's parameters (D the first of 5, -7, 9,
+       -11, ... with (D/n) = -1, P = 1, Q = (1 - D) / 4); with n + 1 = 2^s * d, d odd, n passes if U_d = 0 or
+       V_(d * 2^r) = 0 mod n for some 0 <= r < s; U_d and V_d are computed by the doubling formulas
+       U_2k = U_k * V_k, V_2k = V_k^2 - 2Q^k on the bits of d, in O(log n) multiplications
+    -> baillie_psw: the strong probable prime test for the base 2 followed by the strong Lucas test; the
+       pseudoprimes of the two tests are very different and no composite is known to pass both (there is none
+       below 2^64), so one round is enough where Miller-Rabin needs dozens
+    -> solovay_strassen: a^((n - 1) / 2) = (a/n) mod n for k random bases, a composite passing a round with
+       probability at most 1/2
+    -> random_prime: random primes of a given number of bits (optionally = 3 mod 4, for the Rabin cryptosystem)
+
+usage (from the labs directory):
+    python -m pkc.primality test 2305843009213693951 2305843009213693953 --test solovay-strassen
+    python -m pkc.primality generate 512 --count 2 --blum
+"""
+
+import argparse
+import math
+import random
+import sys
+from typing import Callable, Optional
+
+from pkc import sieve
+
+TRIAL_DIVISION_BOUND = 1000
+DEFAULT_ROUNDS = 20
+
+SMALL_PRIMES = frozenset(sieve.small_primes(TRIAL_DIVISION_BOUND))
+SMALL_PRIMES_PRODUCT = math.prod(SMALL_PRIMES)
+
+
+def jacobi(a: int, n: int) -> int:
+    """
+    Computes the Jacobi symbol (a/n) by the binary algorithm
+    :param n: an odd positive integer
+    :return: 1, -1, or 0 if gcd(a, n) > 1
+    :raises ValueError: if n is not odd and positive
+    """
+    if n < 1 or n % 2 == 0:
+        raise ValueError(f'the Jacobi symbol is only defined for odd positive n, not {n}')
+    a %= n
+    result = 1
+    while a:
+        # (2/n) = -1 exactly when n = 3 or 5 mod 8
+        zeros = (a & -a).bit_length() - 1
+        a >>= zeros
+        if zeros % 2 and n % 8 in (3, 5):
+            result = -result
+        # both odd now: (a/n) = (n/a), unless a = n = 3 mod 4
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a, n = n % a, a
+    return result if n == 1 else 0
+
+
+def _trial_division(number: int) -> Optional[bool]:
+    """
+    :return: the verdict if the small primes settle it, None otherwise
+    """
+    if number < 2:
+        return False
+    if math.gcd(number, SMALL_PRIMES_PRODUCT) != 1:
+        return number in SMALL_PRIMES
+    if number < TRIAL_DIVISION_BOUND * TRIAL_DIVISION_BOUND:
+        return True
+    return None
+
+
+def _random_bases(number: int, rounds: int, rng: Optional[random.Random]) -> list[int]:
+    rng = rng or random
+    return [rng.randrange(2, number - 1) for _ in range(rounds)]
+
+
+# ------------------------------------------------------------------ the tests without trial division
+
+
+def is_strong_probable_prime(number: int, base: int) -> bool:
+    """
+    One round of Miller-Rabin: with n - 1 = 2^s * t, t odd, n passes if a^t = 1 or a^(2^r * t) = -1 mod n for
+    some 0 <= r < s
+    :param number: an odd number greater than 2
+    """
+    s = ((number - 1) & (1 - number)).bit_length() - 1
+    value = pow(base, (number - 1) >> s, number)
+    if value == 1 or value == number - 1:
+        return True
+    for _ in range(s - 1):
+        value = value * value % number
+        if value == number - 1:
+            return True
+        if value == 1:
+            return False
+    return False
+
+
+def _selfridge_parameter(number: int) -> Optional[int]:
+    """
+    :return: the first D of 5, -7, 9, -11, ... with (D/n) = -1, None if n is found to be composite on the way
+             (a D sharing a factor with n, or n being a perfect square, for which there is no such D)
+    """
+    d = 5
+    while True:
+        symbol = jacobi(d, number)
+        if symbol == -1:
+            return d
+        if symbol == 0 and abs(d) != number:
+            return None
+        # (D/n) = 1 for every D when n is a square: checked once, after a few values failed
+        if d == 13 and math.isqrt(number) ** 2 == number:
+            return None
+        d = -d - 2 if d > 0 else -d + 2
+
+
+def is_strong_lucas_probable_prime(number: int) -> bool:
+    """
+    The strong Lucas test with Selfridge's parameters, see the module's documentation
+    :param number: an odd number greater than 2
+    """
+    d_parameter = _selfridge_parameter(number)
+    if d_parameter is None:
+        return False
+    p, q = 1, (1 - d_parameter) // 4
+
+    s = ((number + 1) & -(number + 1)).bit_length() - 1
+    d = (number + 1) >> s
+
+    def half(x: int) -> int:
+        # x / 2 mod n, n being odd
+        return (x + number if x & 1 else x) >> 1
+
+    # U_1, V_1 and Q^1, then the bits of d after the leading one
+    u, v, q_power = 1, p, q % number
+    for bit in bin(d)[3:]:
+        u, v = u * v % number, (v * v - 2 * q_power) % number
+        q_power = q_power * q_power % number
+        if bit == '1':
+            u, v = half(p * u + v) % number, half(d_parameter * u + p * v) % number
+            q_power = q_power * q % number
+
+    if u == 0 or v == 0:
+        return True
+    for _ in range(s - 1):
+        v = (v * v - 2 * q_power) % number
+        q_power = q_power * q_power % number
+        if v == 0:
+            return True
+    return False
+
+
+# ------------------------------------------------------------------ the tests
+
+
+def miller_rabin(number: int, rounds: int = DEFAULT_ROUNDS, rng: Optional[random.Random] = None) -> bool:
+    """
+    The Miller-Rabin test for random bases
+    :param rounds: the number of bases tried (a composite passes with probability at most 4^(-rounds))
+    :param rng: the source of the bases (the random module if None)
+    :return: True if the number is probably prime, False if it is composite
+    """
+    verdict = _trial_division(number)
+    if verdict is not None:
+        return verdict
+    return all(is_strong_probable_prime(number, base) for base in _random_bases(number, rounds, rng))
+
+
+def strong_lucas(number: int) -> bool:
+    """
+    The strong Lucas probable prime test alone
+    :return: True if the number is probably prime, False if it is composite
+    """
+    verdict = _trial_division(number)
+    if verdict is not None:
+        return verdict
+    return is_strong_lucas_probable_prime(number)
+
+
+def baillie_psw(number: int) -> bool:
+    """
+    The Baillie-PSW test: the strong probable prime test for the base 2, then the strong Lucas test
+    :return: True if the number is prime (certainly below 2^64, with no known counterexample above), False if it
+             is composite
+    """
+    verdict = _trial_division(number)
+    if verdict is not None:
+        return verdict
+    return is_strong_probable_prime(number, 2) and is_strong_lucas_probable_prime(number)
+
+
+def solovay_strassen(number: int, rounds: int = DEFAULT_ROUNDS, rng: Optional[random.Random] = None) -> bool:
+    """
+    The Solovay-Strassen test for random bases: a^((n - 1) / 2) = (a/n) mod n
+    :param rounds: the number of bases tried (a composite passes with probability at most 2^(-rounds))
+    :param rng: the source of the bases (the random module if None)
+    :return: True if the number is probably prime, False if it is composite
+    """
+    verdict = _trial_division(number)
+    if verdict is not None:
+        return verdict
+    for base in _random_bases(number, rounds, rng):
+        symbol = jacobi(base, number)
+        if symbol == 0 or pow(base, (number - 1) >> 1, number) != symbol % number:
+            return False
+    return True
+
+
+TESTS: dict[str, Callable[[int], bool]] = {
+    'baillie-psw': baillie_psw,
+    'miller-rabin': miller_rabin,
+    'solovay-strassen': solovay_strassen,
+    'strong-lucas': strong_lucas,
+}
+
+
+def random_prime(bits: int, rng: Optional[random.Random] = None, blum: bool = False,
+                 test: Callable[[int], bool] = baillie_psw) -> int:
+    """
+    :param bits: the exact number of bits of the prime (at least 2, at least 3 for a Blum prime)
+    :param rng: the source of the candidates (the random module if None)
+    :param blum: if True, the prime is = 3 mod 4
+    :param test: the primality test of the candidates
+    :return: a random prime with the given number of bits
+    :raises ValueError: if there is no such prime
+    """
+    if bits < (3 if blum else 2):
+        raise ValueError(f'there is no {"Blum " if blum else ""}prime of {bits} bits')
+    rng = rng or random
+    # the top bit makes the size exact, the low bits make the candidate odd (and = 3 mod 4 for a Blum prime)
+    low_bits = 3 if blum else 1
+    while True:
+        candidate = rng.getrandbits(bits) | (1 << (bits - 1)) | low_bits
+        if test(candidate):
+            return candidate
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pkc.primality', description='Tests and generates primes.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    test_parser = commands.add_parser('test', help='test the primality of numbers')
+    test_parser.add_argument('numbers', nargs='+', type=lambda value: int(value, 0))
+    test_parser.add_argument('--test', choices=sorted(TESTS), default='baillie-psw')
+
+    generate_parser = commands.add_parser('generate', help='generate random primes')
+    generate_parser.add_argument('bits', type=int)
+    generate_parser.add_argument('--count', type=int, default=1)
+    generate_parser.add_argument('--blum', action='store_true', help='only primes = 3 mod 4')
+    args = parser.parse_args(argv)
+
+    if args.command == 'test':
+        for number in args.numbers:
+            print(f'{number}: {"probably prime" if TESTS[args.test](number) else "composite"}')
+        return 0
+
+    try:
+        for _ in range(args.count):
+            print(random_prime(args.bits, blum=args.blum))
+    except ValueError as error:
+        print(f'error: {error}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""
+Pollard's rho for many small composites at once, in NumPy uint64 lanes
+    -> every lane holds one number n < 2^62 and its rho state; all the lanes do the same operation at the same time
+       (y = f(y) with f(x) = x^2 + c, compared with the value x that y had at the last power of 2 steps: Brent's
+       cycle detection, one f per step instead of the three of Floyd's in assignment B), so one NumPy call advances
+       all of them and the interpreter overhead is paid once per step instead of once per step and number
+    -> below 2^FLOAT_BITS, a * b mod n is a * b - q * n computed modulo 2^64, the quotient q being estimated in
+       float64 (off by at most 1, which the two final corrections absorb): no division and about a dozen NumPy
+       calls
+    -> above, up to 2^MAX_BITS, the numbers are kept in Montgomery form (x is stored as xR mod n, R = 2^64): a
+       modular multiplication is then two 64 x 64 -> 128-bit products, done on 32-bit limbs since NumPy has no
+       128-bit integers, and no division
+    -> instead of one gcd per step, the differences x - y are multiplied together and the gcd of the product with n
+       is computed every GCD_EVERY steps, for all the lanes in one np.gcd call
+    -> a lane whose product became a multiple of n (several factors, or the cycle, found within the same GCD_EVERY
+       steps) is replayed step by step from its last checkpoint; if it really cycled, it restarts with the next c
+    -> a lane is retired as soon as it found a divisor (or ran out of iterations) and refilled with the next number,
+       so the lanes stay busy until the queue is empty
+
+Without NumPy, or for the numbers of 62 bits or more, every number is split by the scalar loop of pkc.tasks.
+
+usage (from the labs directory):
+    python -m pkc.rho_batch numbers.txt --lanes 4096 > factors.jsonl
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from typing import Iterable, Optional
+
+from pkc import tasks
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_LANES = 4096
+# the number of steps between two gcds (a power of 2)
+GCD_EVERY = 64
+# the maximum number of steps for one value of c
+DEFAULT_ITERATIONS = 1 << 18
+# below this number of busy lanes, the last numbers are finished one by one
+SCALAR_LANES = 32
+MAX_BITS = 62
+# below this number of bits, the quotients estimated in float64 are exact to +-1
+FLOAT_BITS = 50
+R = 1 << 64
+
+
+# ------------------------------------------------------------------ modular arithmetic on uint64 lanes
+
+
+MASK = SHIFT = None
+if np is not None:
+    MASK, SHIFT = np.uint64(0xFFFFFFFF), np.uint64(32)
+
+
+def _high(low_low, low_high, high_low, high_high):
+    """
+    :return: the high 64 bits of a 128-bit product, from the 4 products of its 32-bit limbs
+    """
+    # the carry out of the middle 32 bits (at most 3 * (2^32 - 1), so it cannot overflow)
+    middle = (low_low >> SHIFT) + (low_high & MASK) + (high_low & MASK)
+    return high_high + (low_high >> SHIFT) + (high_low >> SHIFT) + (middle >> SHIFT)
+
+
+def _redc(high, low, lanes: '_Lanes'):
+    """
+    :return: (high * R + low) / R mod n, for high < n < 2^62
+    """
+    # m * n has the same low half as the product, so the difference of the high halves is exactly the quotient
+    m = low * lanes.n_inverse
+    m_low, m_high = m & MASK, m >> SHIFT
+    t = high - _high(m_low * lanes.n_low, m_low * lanes.n_high, m_high * lanes.n_low, m_high * lanes.n_high)
+    # -n < t < n: if t is negative, t + n wraps around to less than t
+    return np.minimum(t, t + lanes.n)
+
+
+def _montgomery_multiply(a, b, lanes: '_Lanes'):
+    """
+    :return: a * b / R mod n, for a, b < n
+    """
+    a_low, a_high, b_low, b_high = a & MASK, a >> SHIFT, b & MASK, b >> SHIFT
+    return _redc(_high(a_low * b_low, a_low * b_high, a_high * b_low, a_high * b_high), a * b, lanes)
+
+
+def _f(x, lanes: '_Lanes'):
+    """
+    :return: x^2 + c in Montgomery form (x^2 / R + c mod n)
+    """
+    x_low, x_high = x & MASK, x >> SHIFT
+    cross = x_low * x_high
+    middle = (x_low * x_low >> SHIFT) + ((cross & MASK) << np.uint64(1))
+    high = x_high * x_high + ((cross >> SHIFT) << np.uint64(1)) + (middle >> SHIFT)
+    t = _redc(high, x * x, lanes) + lanes.c
+    # t < 2n: if t < n, t - n wraps around to more than t
+    return np.minimum(t, t - lanes.n)
+
+
+def _float_multiply(a, b, lanes: '_Lanes'):
+    """
+    :return: a * b mod n, for a, b < n < 2^FLOAT_BITS
+    """
+    quotient = (a.astype(np.float64) * b.astype(np.float64) * lanes.reciprocal).astype(np.uint64)
+    # -n <= t < 2n: a negative t wraps around to more than t + n, a t >= n is more than t - n
+    t = a * b - quotient * lanes.n
+    t = np.minimum(t, t + lanes.n)
+    return np.minimum(t, t - lanes.n)
+
+
+def _float_f(x, lanes: '_Lanes'):
+    """
+    :return: x^2 + c mod n, for x < n < 2^FLOAT_BITS
+    """
+    t = _float_multiply(x, x, lanes) + lanes.c
+    return np.minimum(t, t - lanes.n)
+
+
+class _Lanes:
+    FIELDS = ('n', 'n_low', 'n_high', 'n_inverse', 'reciprocal', 'c', 'x', 'y', 'product', 'total', 'item',
+              'attempt', 'checkpoint_x', 'checkpoint_y')
+
+    def __init__(self, count: int, montgomery: bool):
+        """
+        Brent's cycle detection: y = f(y) at every step, x is the value y had at the last step number which is a
+        power of 2, and the product accumulates x - y
+        Since the lanes are filled at the start of a round of GCD_EVERY steps, for the lanes past their first round
+        the powers of 2 fall on the ends of the rounds, so x is only updated there.
+        :param montgomery: True for the Montgomery arithmetic (the numbers of more than FLOAT_BITS bits), False for
+                           the float64 quotients
+        """
+        # the values are stored multiplied by scale mod n
+        self.scale = R if montgomery else 1
+        self.__f, self.__multiply = (_f, _montgomery_multiply) if montgomery else (_float_f, _float_multiply)
+        for field in self.FIELDS:
+            setattr(self, field, np.zeros(count, dtype=np.uint64))
+        self.reciprocal = np.zeros(count, dtype=np.float64)
+        # the index of the number of every lane in the input, -1 for an empty lane
+        self.item = np.full(count, -1, dtype=np.int64)
+        self.attempt = np.zeros(count, dtype=np.int64)
+
+    def fill(self, lane: int, item: int, number: int, attempt: int = 0):
+        # the constants are computed once per number with Python's integers
+        r = self.scale % number
+        self.n[lane], self.n_low[lane], self.n_high[lane] = number, number & 0xFFFFFFFF, number >> 32
+        self.n_inverse[lane] = pow(number, -1, R)
+        self.reciprocal[lane] = 1 / number
+        self.c[lane] = tasks.POLLARD_CONSTANTS[attempt] * r % number
+        self.x[lane] = self.y[lane] = self.checkpoint_x[lane] = self.checkpoint_y[lane] = 2 * r % number
+        self.product[lane] = r
+        self.total[lane] = 0
+        self.item[lane] = item
+        self.attempt[lane] = attempt
+
+    def empty(self, lane: int):
+        # the empty lanes compute with n = 3 until they are removed, which is harmless
+        self.fill(lane, -1, 3)
+
+    def keep(self, lanes):
+        for field in self.FIELDS:
+            setattr(self, field, getattr(self, field)[lanes])
+
+    def advance(self):
+        """
+        Does one round of GCD_EVERY steps
+        """
+        x, y, product = self.x, self.y, self.product
+        fresh = self.total == 0
+        for step in range(1, GCD_EVERY + 1):
+            y = self.__f(y, self)
+            # x - y mod n
+            difference = x - y
+            product = self.__multiply(product, np.minimum(difference, difference + self.n), self)
+            if step & (step - 1) == 0 and step < GCD_EVERY:
+                x = np.where(fresh, y, x)
+        self.total += np.uint64(GCD_EVERY)
+        self.x = np.where(self.total & (self.total - np.uint64(1)) == 0, y, x)
+        self.y, self.product = y, product
+
+
+def _continue(number: int, scale: int, c: int, x: int, y: int, total: int, count: int) -> Optional[int]:
+    """
+    Continues the sequence of one lane with Python's integers, with a gcd after every step
+    :param scale: the factor the values of the lane are multiplied by (see _Lanes)
+    :return: the first proper divisor found, None if the lane cycled without one or did the given number of steps
+    """
+    r_inverse = pow(scale, -1, number)
+    for _ in range(count):
+        y = (y * y * r_inverse + c) % number
+        divisor = math.gcd(x - y, number)
+        if divisor == number:
+            return None
+        if divisor > 1:
+            return divisor
+        total += 1
+        if total & (total - 1) == 0:
+            x = y
+    return None
+
+
+def _split_lanes(numbers: list[int], lanes: int, iterations: int, montgomery: bool) -> list[Optional[int]]:
+    """
+    Runs the lanes until every number is split or gave up, the numbers being odd composites below 2^MAX_BITS
+    (2^FLOAT_BITS if not montgomery) and not perfect squares
+    """
+    divisors: list[Optional[int]] = [None] * len(numbers)
+    queue = iter(enumerate(numbers))
+    state = _Lanes(min(lanes, len(numbers)), montgomery)
+    for lane, (item, number) in zip(range(len(state.n)), queue):
+        state.fill(lane, item, number)
+
+    while len(state.n) > SCALAR_LANES:
+        state.checkpoint_x, state.checkpoint_y = state.x, state.y
+        state.advance()
+        gcds = np.gcd(state.product, state.n)
+
+        for lane in np.flatnonzero((gcds != 1) | (state.total >= np.uint64(iterations))):
+            item, number = int(state.item[lane]), int(state.n[lane])
+            if item < 0:
+                continue
+            divisor = int(gcds[lane])
+            if divisor == number:
+                # several factors (or the cycle) within the last GCD_EVERY steps: find the first one
+                divisor = _continue(number, state.scale, int(state.c[lane]), int(state.checkpoint_x[lane]),
+                                    int(state.checkpoint_y[lane]), int(state.total[lane]) - GCD_EVERY, GCD_EVERY)
+            if divisor is not None and 1 < divisor < number:
+                divisors[item] = divisor
+            elif int(state.attempt[lane]) + 1 < len(tasks.POLLARD_CONSTANTS):
+                # cycled (or ran out of iterations) without a divisor: restart the number with the next c
+                state.fill(lane, item, number, int(state.attempt[lane]) + 1)
+                continue
+
+            refill = next(queue, None)
+            if refill is None:
+                state.empty(lane)
+            else:
+                state.fill(lane, *refill)
+
+        busy = state.item >= 0
+        if not busy.all():
+            # the queue is empty: the remaining lanes are packed together, so the empty ones cost nothing
+            state.keep(busy)
+
+    # too few lanes are left for NumPy to pay off: they are finished one by one, and so are the numbers still in
+    # the queue (when there were no more lanes than that to start with)
+    for lane in range(len(state.n)):
+        item, number, attempt = int(state.item[lane]), int(state.n[lane]), int(state.attempt[lane])
+        divisor = _continue(number, state.scale, int(state.c[lane]), int(state.x[lane]), int(state.y[lane]),
+                            int(state.total[lane]), iterations - int(state.total[lane]))
+        divisors[item] = divisor if divisor is not None else _restart(number, attempt + 1, iterations)
+    for item, number in queue:
+        divisors[item] = _restart(number, 0, iterations)
+    return divisors
+
+
+def _restart(number: int, attempt: int, iterations: int) -> Optional[int]:
+    """
+    Runs the sequences of one number with Python's integers, from the given value of c on
+    """
+    for c in tasks.POLLARD_CONSTANTS[attempt:]:
+        divisor = _continue(number, 1, c, 2, 2, 0, iterations)
+        if divisor is not None:
+            return divisor
+    return None
+
+
+def split_batch(numbers: Iterable[int], lanes: int = DEFAULT_LANES, iterations: int = DEFAULT_ITERATIONS) \
+        -> list[Optional[int]]:
+    """
+    Looks for a proper divisor of every number, which should be composite: a prime is only given up on after all
+    its iterations (factor_batch tests the primality first)
+    :param lanes: the number of numbers worked on at once
+    :param iterations: the maximum number of steps for every value of c (see pkc.tasks.POLLARD_CONSTANTS)
+    :return: a proper divisor of every number, in the same order; None for the numbers below 4 and the ones for
+             which none was found
+    """
+    numbers = list(numbers)
+    divisors: list[Optional[int]] = [None] * len(numbers)
+    vectorized = list()
+    for index, number in enumerate(numbers):
+        if number < 4:
+            continue
+        root = math.isqrt(number)
+        if number % 2 == 0:
+            divisors[index] = 2
+        elif root * root == number:
+            # rho would find the cycles modulo the root and modulo n at the same time
+            divisors[index] = root
+        elif np is None or number.bit_length() > MAX_BITS:
+            divisors[index] = tasks.split(number, 'pollard', iterations)
+        else:
+            vectorized.append(index)
+
+    # the two kinds of arithmetic cannot share lanes
+    for montgomery in (False, True):
+        group = [index for index in vectorized if (numbers[index].bit_length() > FLOAT_BITS) == montgomery]
+        if group:
+            found = _split_lanes([numbers[index] for index in group], lanes, iterations, montgomery)
+            for index, divisor in zip(group, found):
+                divisors[index] = divisor
+    return divisors
+
+
+def factor_batch(numbers: Iterable[int], lanes: int = DEFAULT_LANES, iterations: int = DEFAULT_ITERATIONS) \
+        -> list[dict]:
+    """
+    Factors every number: trial division, then the composite parts of all the numbers are split together by
+    split_batch, round after round, until every part is prime or could not be split
+    :return: the factorizations, in the same order, as returned by pkc.tasks.factor
+    """
+    factorizations = list()
+    parts = list()
+    for index, number in enumerate(numbers):
+        factors, cofactor = tasks.trial_division(number)
+        factorizations.append({'factors': factors, 'remaining': list()})
+        if cofactor > 1:
+            parts.append((index, cofactor))
+
+    while parts:
+        composites = list()
+        for index, part in parts:
+            if part < tasks.TRIAL_DIVISION_BOUND ** 2 or tasks.is_prime(part):
+                factorizations[index]['factors'].append(part)
+            else:
+                composites.append((index, part))
+
+        divisors = split_batch([part for _, part in composites], lanes, iterations)
+        parts = list()
+        for (index, part), divisor in zip(composites, divisors):
+            if divisor is None:
+                factorizations[index]['remaining'].append(part)
+            else:
+                parts.extend(((index, divisor), (index, part // divisor)))
+
+    for factorization in factorizations:
+        factorization['factors'].sort()
+        factorization['remaining'].sort()
+        factorization['complete'] = not factorization['remaining']
+    return factorizations
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pkc.rho_batch',
+                                     description='Factors many small numbers at once with a vectorized Pollard rho.')
+    parser.add_argument('file', nargs='?', help='the file with one number per line (default: stdin)')
+    parser.add_argument('--lanes', type=int, default=DEFAULT_LANES, help='the number of numbers worked on at once')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                        help='the maximum number of steps for every value of c')
+    args = parser.parse_args(argv)
+
+    with (open(args.file) if args.file else sys.stdin) as file:
+        numbers = [int(line, 0) for line in file if line.strip() and not line.startswith('#')]
+
+    start = time.perf_counter()
+    factorizations = factor_batch(numbers, args.lanes, args.iterations)
+    elapsed = time.perf_counter() - start
+    for index, (number, factorization) in enumerate(zip(numbers, factorizations)):
+        print(json.dumps({'index': index, 'n': number, **factorization}))
+    print(f'{len(numbers)} numbers in {elapsed:.2f} s ({len(numbers) / elapsed if elapsed else 0:,.1f} numbers/s)'
+          + ('' if np is not None else ', without NumPy'), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
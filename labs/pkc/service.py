@@ -0,0 +1,478 @@
+"""
+A local HTTP service for the Rabin cryptosystem, primality testing and factoring
+    -> the interpreter (and the worker processes) start once; every request is a small JSON document
+    -> the event loop only parses the requests and writes the responses: all the big-integer math runs in a pool
+       of worker processes (see pkc.tasks)
+    -> the requests are grouped in micro-batches: a batch is sent to the pool as soon as it has --max-batch items
+       or --max-delay-ms passed since its first item, and at most one batch per worker is in flight, so under load
+       the batches grow instead of the pool being flooded with one task per request
+    -> backpressure: at most --max-pending requests are queued or running; the ones above are answered with 503
+    -> deadlines: every request has --deadline-ms (or its own "deadline_ms", never more) to complete, otherwise it
+       is answered with 504; the deadline is also enforced in the worker, which stops working on it
+    -> with --cache, /is-prime and /factor go through the cache of pkc.cache (each worker has its memory tier, the
+       SQLite file is shared); their responses say where the result came from
+    -> GET /stats returns the request counts, the latency percentiles per endpoint, the throughput, the batch
+       sizes and the cache hit rate
+
+usage (from the labs directory):
+    python -m pkc.service --port 8765 --workers 4 --cache results.sqlite
+    curl -s localhost:8765/is-prime -d '{"n": 7121}'
+    curl -s localhost:8765/factor -d '{"n": 18446744073709551617, "method": "pollard", "deadline_ms": 2000}'
+    curl -s localhost:8765/encrypt -d '{"key": [31, 53], "text": "game"}'
+    curl -s localhost:8765/decrypt -d '{"key": [31, 53], "text": "AQFRAB"}'
+    curl -s localhost:8765/stats
+
+responses:
+    200 {"result": ...} (with --cache, also "cache": "memory" / "disk" / "resumed" / "miss")
+    400/404/405/413 {"error": "..."}, 500 {"error": "..."} (the operation failed, e.g. a worker process died: the
+    pool is then replaced), 503 {"error": "overloaded"}, 504 {"error": "deadline exceeded"}
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, NamedTuple, Optional
+
+from pkc import cache, tasks
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 32
+DEFAULT_MAX_DELAY_MS = 2.0
+DEFAULT_MAX_PENDING = 1024
+DEFAULT_DEADLINE_MS = 5000.0
+MAX_BODY_SIZE = 1 << 20
+# the longest decimal string accepted for an integer (below the default of sys.get_int_max_str_digits())
+MAX_DIGITS = 4000
+# the number of latencies kept per endpoint for the percentiles
+LATENCY_WINDOW = 4096
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+RABIN_TEXT = re.compile(r'[A-Za-z_]+')
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Overloaded(Exception):
+    pass
+
+
+# ------------------------------------------------------------------ requests
+
+
+def _integer(body: dict, name: str) -> int:
+    value = body.get(name)
+    # json.loads already refuses the integers above sys.get_int_max_str_digits(); the strings are limited to
+    # MAX_DIGITS ASCII digits (str.isdigit also accepts digits such as '²', which int refuses)
+    if isinstance(value, str):
+        digits = value.strip()
+        if not digits.isascii() or not digits.isdecimal() or len(digits) > MAX_DIGITS:
+            raise HttpError(400, f'"{name}" must be an integer of at most {MAX_DIGITS} digits')
+        try:
+            value = int(digits)
+        except ValueError as error:
+            raise HttpError(400, f'"{name}" must be an integer: {error}')
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise HttpError(400, f'"{name}" must be an integer')
+    return value
+
+
+def _rabin_arguments(body: dict) -> dict:
+    key = body.get('key')
+    if not isinstance(key, list) or len(key) != 2:
+        raise HttpError(400, '"key" must be the private key [p, q]')
+    key = tuple(_integer({'p': value}, 'p') for value in key)
+    text = body.get('text')
+    if not isinstance(text, str) or not RABIN_TEXT.fullmatch(text):
+        raise HttpError(400, '"text" must be made of letters and "_"')
+    return {'key': key, 'text': text}
+
+
+def _factor_arguments(body: dict) -> dict:
+    method = body.get('method', 'pollard')
+    if method not in tasks.METHODS:
+        raise HttpError(400, f'"method" must be one of {", ".join(tasks.METHODS)}')
+    iterations = _integer(body, 'iterations') if 'iterations' in body else tasks.DEFAULT_ITERATIONS
+    return {'number': _integer(body, 'n'), 'method': method, 'iterations': iterations}
+
+
+# the arguments of the operations of pkc.tasks, read from the request bodies
+OPERATIONS = {
+    '/is-prime': ('is-prime', lambda body: {'number': _integer(body, 'n')}),
+    '/factor': ('factor', _factor_arguments),
+    '/encrypt': ('encrypt', _rabin_arguments),
+    '/decrypt': ('decrypt', _rabin_arguments),
+}
+
+
+# ------------------------------------------------------------------ batching
+
+
+class _Item(NamedTuple):
+    operation: str
+    arguments: dict
+    # time.time() timestamp, so that it means the same in the worker processes
+    deadline: float
+    future: asyncio.Future
+
+
+class MicroBatcher:
+    def __init__(self, make_executor: Callable[[], Executor], workers: int, max_batch: int = DEFAULT_MAX_BATCH,
+                 max_delay: float = DEFAULT_MAX_DELAY_MS / 1000, max_pending: int = DEFAULT_MAX_PENDING,
+                 cache_path: Optional[str] = None):
+        """
+        :param make_executor: creates the pool the batches run in; called again to replace it when it is broken
+                              (a worker process died), so that the next batches do not fail as well
+        :param workers: the number of batches allowed in flight at once
+        :param max_batch: the maximum number of items of a batch
+        :param max_delay: how many seconds the first item of a batch waits for others
+        :param max_pending: the maximum number of items queued or running; submit raises Overloaded above it
+        :param cache_path: the database of the cache the workers use, None for no cache
+        """
+        self.make_executor = make_executor
+        self.executor = make_executor()
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.cache_path = cache_path
+        self.pending = 0
+        self.batch_sizes: Counter = Counter()
+        self.__queue: asyncio.Queue[_Item] = asyncio.Queue()
+        self.__slots = asyncio.Semaphore(workers)
+        self.__dispatches: set[asyncio.Task] = set()
+
+    @property
+    def queued(self) -> int:
+        return self.__queue.qsize()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def __release(self, future: asyncio.Future):
+        self.pending -= 1
+
+    async def submit(self, operation: str, arguments: dict, timeout: float) -> tuple[str, object, Optional[str]]:
+        """
+        Queues an operation and waits for its result
+        :return: the (status, value, cache source) triple of pkc.tasks.run_batch
+        :raises Overloaded: if max_pending items are already queued or running
+        :raises asyncio.TimeoutError: if the result is not ready after timeout seconds
+        """
+        if self.pending >= self.max_pending:
+            raise Overloaded()
+        future = asyncio.get_running_loop().create_future()
+        self.pending += 1
+        # also called when the future is cancelled by wait_for, so the item stops counting right away
+        future.add_done_callback(self.__release)
+        self.__queue.put_nowait(_Item(operation, arguments, time.time() + timeout, future))
+        return await asyncio.wait_for(future, timeout)
+
+    async def run(self):
+        """
+        Collects the queued items into batches and sends them to the pool, forever
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.__queue.get()]
+            closes_at = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not self.__queue.empty():
+                    batch.append(self.__queue.get_nowait())
+                    continue
+                remaining = closes_at - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.__queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self.__slots.acquire()
+            # the items whose deadline passed while waiting were cancelled, there is no point in running them
+            batch = [item for item in batch if not item.future.done()]
+            if not batch:
+                self.__slots.release()
+                continue
+            self.batch_sizes[len(batch)] += 1
+            dispatch = asyncio.create_task(self.__dispatch(batch))
+            self.__dispatches.add(dispatch)
+            dispatch.add_done_callback(self.__dispatches.discard)
+
+    async def __dispatch(self, batch: list[_Item]):
+        executor = self.executor
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                executor, tasks.run_batch, [(item.operation, item.arguments, item.deadline) for item in batch],
+                self.cache_path)
+        except BrokenProcessPool as error:
+            # a worker process died: the pool refuses every later batch, so it is replaced (once, by the first of the
+            # batches which were in flight in it), and this batch fails; the broken pool's threads are stopped first,
+            # so that the new workers are not forked while they hold a lock
+            if self.executor is executor:
+                executor.shutdown(cancel_futures=True)
+                self.executor = self.make_executor()
+            results = [('error', f'{type(error).__name__}: {error}', None)] * len(batch)
+        except Exception as error:
+            results = [('error', f'{type(error).__name__}: {error}', None)] * len(batch)
+        finally:
+            self.__slots.release()
+
+        for item, result in zip(batch, results):
+            if not item.future.done():
+                item.future.set_result(result)
+
+
+# ------------------------------------------------------------------ statistics
+
+
+class Stats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statuses: Counter = Counter()
+        self.latencies: dict[str, deque] = dict()
+        self.cache_sources: Counter = Counter()
+
+    def record(self, path: str, status: int, latency: float):
+        self.statuses[status] += 1
+        if path not in self.latencies:
+            self.latencies[path] = deque(maxlen=LATENCY_WINDOW)
+        self.latencies[path].append(latency)
+
+    @staticmethod
+    def __percentiles(latencies: deque) -> dict:
+        ordered = sorted(latencies)
+
+        def percentile(fraction: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+        return {'p50_ms': percentile(0.50), 'p95_ms': percentile(0.95), 'p99_ms': percentile(0.99),
+                'max_ms': round(ordered[-1] * 1000, 3)}
+
+    def __cache_hit_rates(self) -> dict:
+        lookups = sum(self.cache_sources.values())
+        hits = self.cache_sources['memory'] + self.cache_sources['disk']
+        return {'lookups': lookups, **{source: self.cache_sources[source] for source in cache.SOURCES},
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0}
+
+    def as_dict(self, batcher: MicroBatcher) -> dict:
+        uptime = time.perf_counter() - self.started
+        requests = sum(self.statuses.values())
+        batches = sum(batcher.batch_sizes.values())
+        return {
+            'uptime_s': round(uptime, 3),
+            'requests': requests,
+            'requests_per_s': round(requests / uptime, 3) if uptime else 0.0,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'pending': batcher.pending,
+            'queued': batcher.queued,
+            'batches': {
+                'count': batches,
+                'mean_size': round(sum(size * count for size, count in batcher.batch_sizes.items()) / batches, 3)
+                if batches else 0.0,
+                'max_size': max(batcher.batch_sizes, default=0),
+            },
+            'cache': self.__cache_hit_rates(),
+            # the percentiles are over the last LATENCY_WINDOW requests of every endpoint
+            'endpoints': {path: {'requests': len(latencies), **self.__percentiles(latencies)}
+                          for path, latencies in sorted(self.latencies.items())},
+        }
+
+
+# ------------------------------------------------------------------ HTTP
+
+
+class Service:
+    def __init__(self, batcher: MicroBatcher, deadline: float = DEFAULT_DEADLINE_MS / 1000):
+        """
+        :param batcher: where the operations are sent
+        :param deadline: the default (and maximum) number of seconds a request has to complete
+        """
+        self.batcher = batcher
+        self.deadline = deadline
+        self.stats = Stats()
+
+    async def handle(self, method: str, path: str, body: bytes) -> tuple[int, dict]:
+        """
+        Answers one request
+        :return: the HTTP status and the JSON body of the response
+        """
+        if path == '/stats':
+            if method != 'GET':
+                raise HttpError(405, 'use GET')
+            return 200, self.stats.as_dict(self.batcher)
+        if path not in OPERATIONS:
+            raise HttpError(404, f'unknown endpoint {path}')
+        if method != 'POST':
+            raise HttpError(405, 'use POST')
+
+        try:
+            request = json.loads(body)
+        except ValueError as error:
+            raise HttpError(400, f'invalid JSON: {error}')
+        if not isinstance(request, dict):
+            raise HttpError(400, 'the body must be a JSON object')
+        operation, read_arguments = OPERATIONS[path]
+        arguments = read_arguments(request)
+        deadline = self.deadline
+        if 'deadline_ms' in request:
+            deadline_ms = request['deadline_ms']
+            if not isinstance(deadline_ms, (int, float)) or isinstance(deadline_ms, bool) or deadline_ms <= 0:
+                raise HttpError(400, '"deadline_ms" must be a positive number')
+            deadline = min(deadline, deadline_ms / 1000)
+
+        try:
+            status, value, source = await self.batcher.submit(operation, arguments, deadline)
+        except Overloaded:
+            raise HttpError(503, 'overloaded')
+        except asyncio.TimeoutError:
+            raise HttpError(504, 'deadline exceeded')
+        if status == 'timeout':
+            raise HttpError(504, 'deadline exceeded')
+        if status == 'invalid':
+            raise HttpError(400, value)
+        if status == 'error':
+            raise HttpError(500, value)
+        if source is None:
+            return 200, {'result': value}
+        self.stats.cache_sources[source] += 1
+        return 200, {'result': value, 'cache': source}
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Answers the requests of one connection (HTTP/1.1, kept alive unless the client asks otherwise)
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                start = time.perf_counter()
+                method, path, headers = self.__parse_head(head)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                try:
+                    length = int(headers.get('content-length', 0))
+                    if length > MAX_BODY_SIZE:
+                        keep_alive = False
+                        raise HttpError(413, f'the body is limited to {MAX_BODY_SIZE} bytes')
+                    body = await reader.readexactly(length) if length else b''
+                    status, response = await self.handle(method, path, body)
+                except HttpError as error:
+                    status, response = error.status, {'error': str(error)}
+
+                # the unknown paths share one entry, so that they cannot grow the statistics without bound
+                endpoint = path if path in OPERATIONS or path == '/stats' else 'other'
+                self.stats.record(endpoint, status, time.perf_counter() - start)
+                self.__write(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except HttpError as error:
+            # the request line or the headers could not be read
+            self.__write(writer, error.status, {'error': str(error)}, False)
+        finally:
+            writer.close()
+
+    @staticmethod
+    def __parse_head(head: bytes) -> tuple[str, str, dict]:
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ')
+            headers = dict()
+            for line in lines[1:]:
+                if line:
+                    name, value = line.split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            raise HttpError(400, 'malformed request')
+        return method, target.split('?', 1)[0], headers
+
+    @staticmethod
+    def __write(writer: asyncio.StreamWriter, status: int, response: dict, keep_alive: bool):
+        body = json.dumps(response).encode()
+        head = [f'HTTP/1.1 {status} {REASONS[status]}', 'Content-Type: application/json',
+                f'Content-Length: {len(body)}', 'Connection: ' + ('keep-alive' if keep_alive else 'close')]
+        if status == 503:
+            head.append('Retry-After: 1')
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: Optional[int] = None,
+                max_batch: int = DEFAULT_MAX_BATCH, max_delay: float = DEFAULT_MAX_DELAY_MS / 1000,
+                max_pending: int = DEFAULT_MAX_PENDING, deadline: float = DEFAULT_DEADLINE_MS / 1000,
+                cache_path: Optional[str] = None, ready: Optional[asyncio.Event] = None):
+    """
+    Runs the service until it is cancelled
+    :param ready: set once the workers are started and the port is listening
+    """
+    workers = workers or os.cpu_count() or 1
+    loop = asyncio.get_running_loop()
+    # forked by a server process, not by this one: a pool replaced while the service runs would otherwise fork its
+    # workers from a process with threads (those of the event loop and of the broken pool), with their locks
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods()
+                                          else 'spawn')
+    batcher = MicroBatcher(lambda: ProcessPoolExecutor(workers, context, tasks.init_worker), workers, max_batch,
+                           max_delay, max_pending, cache_path)
+    try:
+        # start the workers (and import the modules in them) before the first request
+        await asyncio.gather(*[loop.run_in_executor(batcher.executor, tasks.is_prime, 3) for _ in range(workers)])
+
+        service = Service(batcher, deadline)
+        batching = asyncio.create_task(batcher.run())
+        server = await asyncio.start_server(service.serve_connection, host, port)
+        print(f'listening on http://{host}:{port} with {workers} workers', file=sys.stderr)
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batching.cancel()
+    finally:
+        batcher.close()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pkc.service',
+                                     description='Serves the Rabin cryptosystem, primality testing and factoring '
+                                                 'over HTTP.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, help='the number of worker processes (default: the CPU count)')
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH,
+                        help='the maximum number of requests sent to a worker at once')
+    parser.add_argument('--max-delay-ms', type=float, default=DEFAULT_MAX_DELAY_MS,
+                        help='how long a request waits for others to be batched with')
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help='the maximum number of requests queued or running; the others get 503')
+    parser.add_argument('--deadline-ms', type=float, default=DEFAULT_DEADLINE_MS,
+                        help='the default and maximum time a request has to complete; after it, it gets 504')
+    parser.add_argument('--cache', help='the SQLite file primality and factoring results are cached in')
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_batch, args.max_delay_ms / 1000,
+                          args.max_pending, args.deadline_ms / 1000, args.cache))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
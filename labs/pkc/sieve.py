@@ -0,0 +1,347 @@
+"""
+Segmented sieve of Eratosthenes, stored as a memory-mapped bitmap of the odd numbers
+    -> the bit i of the bitmap tells whether the odd number 2i + 1 is prime (bit i % 8 of byte i // 8), so the
+       primes below N take N / 16 bytes: 625 MB for N = 10^10
+    -> the bitmap is built segment by segment: a segment is sieved with the primes up to √N as a bytearray (one byte
+       per odd number, so crossing off the multiples of p is a single slice assignment), packed to bits and written
+       at its place in the file; the segments are built by a pool of processes, so only one segment per process is
+       in memory at once
+    -> the file is then mapped read-only: all the processes using it share the same pages of the OS cache, and a
+       lookup is O(1) (one byte read and a shift)
+
+The default bitmap (primes below DEFAULT_LIMIT) is built on first use in the directory given by the PKC_SIEVE_DIR
+environment variable (pkc in the user's cache directory if unset, $XDG_CACHE_HOME or ~/.cache) and reused by all the
+later runs; a file there which is not a complete bitmap of that limit is built again. The small tables of primes
+(e.g. for trial division) come from small_primes, which sieves in memory and does not touch the bitmap.
+
+usage (from the labs directory):
+    python -m pkc.sieve build primes.bin --limit 10000000000 --workers 8
+    python -m pkc.sieve count primes.bin --start 1000000000 --stop 2000000000
+    python -m pkc.sieve list primes.bin --start 1000 --stop 1100
+"""
+
+import argparse
+import contextlib
+import functools
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+MAGIC = b'PKCSIEVE'
+# the magic and the limit
+HEADER = struct.Struct('<8sQ')
+DEFAULT_LIMIT = 1 << 24
+# the number of odd numbers sieved at once by a process (a multiple of 8, so that segments start on a byte)
+SEGMENT_SIZE = 1 << 24
+# the number of bytes read at once when counting or listing the primes of a range
+BLOCK_SIZE = 1 << 16
+
+# the positions of the bits set in every byte
+BIT_POSITIONS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+
+# ------------------------------------------------------------------ building
+
+
+def _data_size(limit: int) -> int:
+    """
+    :return: the number of bytes of the bitmap of the primes below the limit, after the header
+    """
+    return (limit // 2 + 7) // 8
+
+
+@functools.lru_cache(maxsize=8)
+def _base_primes(bound: int) -> tuple[int, ...]:
+    """
+    :return: the odd primes up to the bound (inclusive), by the plain sieve of Eratosthenes
+    """
+    is_prime = bytearray(b'\x01') * (bound + 1)
+    is_prime[:2] = b'\x00\x00'
+    for p in range(2, math.isqrt(bound) + 1):
+        if is_prime[p]:
+            is_prime[p * p::p] = bytes(len(range(p * p, bound + 1, p)))
+    return tuple(p for p in range(3, bound + 1, 2) if is_prime[p])
+
+
+def small_primes(stop: int) -> list[int]:
+    """
+    :return: the primes below stop, by the plain sieve in memory (for the small tables built at import time, which
+             must not build or map the default bitmap)
+    """
+    return [2, *_base_primes(stop - 1)] if stop > 2 else []
+
+
+def _pack(segment: bytearray) -> bytes:
+    """
+    Packs a segment of one byte (0 or 1) per odd number into bits, 8 odd numbers per byte
+    Every one of the 8 strided slices is turned into one big integer, in which the byte j is the bit of the odd
+    number 8j + k; shifting it by k and or-ing the 8 integers puts all of them into place at C speed.
+    """
+    packed = 0
+    for bit in range(8):
+        packed |= int.from_bytes(segment[bit::8], 'little') << bit
+    return packed.to_bytes(len(segment) // 8, 'little')
+
+
+def _sieve_segment(path: str, limit: int, first: int, size: int) -> int:
+    """
+    Sieves the odd numbers 2i + 1 for first <= i < first + size and writes their bits to the file
+    :return: the number of primes found
+    """
+    # rounded up to whole bytes, the bits past the limit stay 0
+    count = min(size, limit // 2 - first)
+    segment = bytearray(b'\x01') * count + bytes(-count % 8)
+    zeros = memoryview(bytes(count))
+    low, high = 2 * first + 1, 2 * (first + count) - 1
+    for p in _base_primes(math.isqrt(limit - 1)):
+        if p * p > high:
+            break
+        # the first odd multiple of p which is at least p^2 (the smaller ones were crossed off by smaller primes)
+        multiple = max(p * p, (low + p - 1) // p * p)
+        if multiple % 2 == 0:
+            multiple += p
+        start = (multiple - 1) // 2 - first
+        if start < count:
+            segment[start:count:p] = zeros[:len(range(start, count, p))]
+    if first == 0:
+        # 1 is not prime
+        segment[0] = 0
+
+    with open(path, 'r+b') as file:
+        file.seek(HEADER.size + first // 8)
+        file.write(_pack(segment))
+    return segment.count(1)
+
+
+def build(path: str, limit: int, workers: Optional[int] = None, segment_size: int = SEGMENT_SIZE) -> int:
+    """
+    Builds the bitmap of the primes below the limit
+    The file is written under a temporary name and renamed at the end, so the processes building the same bitmap
+    at once do not see each other's unfinished files.
+    :param workers: the number of processes sieving the segments; 1 sieves everything in this process, None uses
+                    one process per CPU
+    :param segment_size: the number of odd numbers sieved at once by a process (a multiple of 8)
+    :return: the number of primes below the limit
+    """
+    if limit < 3:
+        raise ValueError(f'the limit must be at least 3, not {limit}')
+    if segment_size % 8:
+        raise ValueError(f'the segment size must be a multiple of 8, not {segment_size}')
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.sieve-')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, limit))
+            file.truncate(HEADER.size + _data_size(limit))
+
+        starts = range(0, limit // 2, segment_size)
+        arguments = ([temporary] * len(starts), [limit] * len(starts), starts, [segment_size] * len(starts))
+        with (ProcessPoolExecutor(workers) if workers > 1 and len(starts) > 1 else contextlib.nullcontext()) \
+                as executor:
+            counts = executor.map(_sieve_segment, *arguments) if executor else map(_sieve_segment, *arguments)
+            # 2 is the only prime which is not in the bitmap
+            total = 1 + sum(counts)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    return total
+
+
+# ------------------------------------------------------------------ reading
+
+
+class PrimeBitmap:
+    def __init__(self, path: str):
+        """
+        Maps a bitmap written by build, read-only
+        :raises ValueError: if the file is not a bitmap, or not as long as its limit requires (a truncated file would
+                            make the lookups read past the end of the map)
+        """
+        with open(path, 'rb') as file:
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self.__map)
+        magic, self.limit = HEADER.unpack_from(self.__map) if size >= HEADER.size else (None, 0)
+        if magic != MAGIC:
+            self.__map.close()
+            raise ValueError(f'{path} is not a prime bitmap')
+        if self.limit < 3 or size != HEADER.size + _data_size(self.limit):
+            self.__map.close()
+            raise ValueError(f'{path} has {size - HEADER.size} bytes of bitmap, the limit {self.limit} needs '
+                             f'{_data_size(self.limit)}')
+        self.path = path
+        self.__bits = memoryview(self.__map)[HEADER.size:]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.__bits.release()
+        self.__map.close()
+
+    def __check(self, number: int):
+        if number > self.limit:
+            raise ValueError(f'{number} is past the limit of the sieve ({self.limit})')
+
+    def is_prime(self, number: int) -> bool:
+        """
+        :return: True if the number (below the limit) is prime, False otherwise
+        """
+        if number < 3 or number % 2 == 0:
+            return number == 2
+        self.__check(number + 1)
+        index = number >> 1
+        return self.__bits[index >> 3] >> (index & 7) & 1 == 1
+
+    def next_prime(self, number: int) -> int:
+        """
+        :return: the smallest prime greater than the number
+        """
+        if number < 2:
+            return 2
+        # the odd numbers greater than the number start with the index (number + 1) // 2
+        index = (number + 1) >> 1
+        position, bit = index >> 3, index & 7
+        byte = self.__bits[position] >> bit << bit if position < len(self.__bits) else 0
+        while not byte:
+            position += 1
+            if position >= len(self.__bits):
+                raise ValueError(f'there is no prime after {number} below the limit of the sieve ({self.limit})')
+            byte = self.__bits[position]
+        return 2 * (8 * position + (byte & -byte).bit_length() - 1) + 1
+
+    def primes(self, start: int = 2, stop: Optional[int] = None) -> Iterator[int]:
+        """
+        :return: the primes p with start <= p < stop (the limit of the sieve if stop is None), in increasing order
+        """
+        stop = self.limit if stop is None else stop
+        self.__check(stop)
+        if start <= 2 < stop:
+            yield 2
+        # the odd numbers in the range have the indices first ... last
+        first, last = max(start, 1) >> 1, (stop >> 1) - 1
+        for block_start in range(first >> 3, (last >> 3) + 1, BLOCK_SIZE):
+            block = self.__bits[block_start:min(block_start + BLOCK_SIZE, (last >> 3) + 1)].tobytes()
+            for offset, byte in enumerate(block):
+                if byte:
+                    base = 8 * (block_start + offset)
+                    for bit in BIT_POSITIONS[byte]:
+                        if first <= base + bit <= last:
+                            yield 2 * (base + bit) + 1
+
+    def __count_below(self, number: int) -> int:
+        # the odd numbers below the number have the indices 0 ... number // 2 - 1
+        count = 1 if number > 2 else 0
+        full, rest = divmod(number >> 1, 8)
+        for block_start in range(0, full, BLOCK_SIZE):
+            count += int.from_bytes(self.__bits[block_start:min(block_start + BLOCK_SIZE, full)], 'little') \
+                .bit_count()
+        if rest:
+            count += (self.__bits[full] & (1 << rest) - 1).bit_count()
+        return count
+
+    def count(self, start: int = 2, stop: Optional[int] = None) -> int:
+        """
+        :return: the number of primes p with start <= p < stop (the limit of the sieve if stop is None)
+        """
+        stop = self.limit if stop is None else stop
+        self.__check(stop)
+        start, stop = max(start, 0), max(stop, 0)
+        return self.__count_below(stop) - self.__count_below(start) if start < stop else 0
+
+
+# ------------------------------------------------------------------ the default bitmap
+
+
+@functools.lru_cache(maxsize=None)
+def default() -> PrimeBitmap:
+    """
+    :return: the bitmap of the primes below DEFAULT_LIMIT, built the first time it is needed on this machine and
+             mapped once per process
+    """
+    # a directory of this user only: in a shared one like /tmp, anyone could put a file of their own at that path
+    directory = os.environ.get('PKC_SIEVE_DIR') or os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'pkc')
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    path = os.path.join(directory, f'primes-{DEFAULT_LIMIT}.bin')
+    if os.path.exists(path):
+        try:
+            bitmap = PrimeBitmap(path)
+        except ValueError:
+            pass
+        else:
+            if bitmap.limit == DEFAULT_LIMIT:
+                return bitmap
+            bitmap.close()
+    # missing, or left incomplete or corrupted: build replaces it atomically
+    build(path, DEFAULT_LIMIT, workers=1)
+    return PrimeBitmap(path)
+
+
+def is_small_prime(number: int) -> bool:
+    """
+    :return: True if the number (below DEFAULT_LIMIT) is prime, False otherwise
+    """
+    return default().is_prime(number)
+
+
+def next_prime(number: int) -> int:
+    """
+    :return: the smallest prime greater than the number (which must be below DEFAULT_LIMIT)
+    """
+    return default().next_prime(number)
+
+
+def primes(start: int = 2, stop: int = DEFAULT_LIMIT) -> Iterator[int]:
+    """
+    :return: the primes p with start <= p < stop <= DEFAULT_LIMIT, in increasing order
+    """
+    return default().primes(start, stop)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pkc.sieve', description='Builds and queries prime bitmaps.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help='sieve the primes below the limit into a file')
+    build_parser.add_argument('file')
+    build_parser.add_argument('--limit', type=lambda value: int(float(value)), default=DEFAULT_LIMIT,
+                              help='the exclusive upper bound (e.g. 1e10)')
+    build_parser.add_argument('--workers', type=int, help='the number of processes (default: one per CPU)')
+    build_parser.add_argument('--segment-size', type=int, default=SEGMENT_SIZE,
+                              help='the number of odd numbers a process sieves at once')
+
+    for command, description in (('count', 'count the primes of a range'), ('list', 'print the primes of a range')):
+        query_parser = commands.add_parser(command, help=description)
+        query_parser.add_argument('file')
+        query_parser.add_argument('--start', type=lambda value: int(float(value)), default=2)
+        query_parser.add_argument('--stop', type=lambda value: int(float(value)), help='default: the limit')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        count = build(args.file, args.limit, args.workers, args.segment_size)
+        print(f'{count} primes below {args.limit}')
+        return 0
+
+    with PrimeBitmap(args.file) as bitmap:
+        if args.command == 'count':
+            print(bitmap.count(args.start, args.stop))
+        else:
+            for p in bitmap.primes(args.start, args.stop):
+                print(p)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+The work items of the bulk command line (pkc.bulk): primality and factoring of one number
+    -> is_prime: a lookup in the prime bitmap of pkc.sieve for the numbers it covers (opened on the first of them),
+       otherwise, or if the bitmap cannot be built, the Baillie-PSW test of pkc.primality (the bases 2, 3 and 5 of
+       assignment A's Miller-Rabin test have strong pseudoprimes, such as 25326001, which it does not let through)
+    -> factor: trial division by the small primes, then the composite parts are split with the method of
+       assignment B (Pollard's rho or Fermat's method) until every part is prime or cannot be split within the
+       given number of iterations; those parts are reported as remaining, the factorization being incomplete
+    -> encrypt / decrypt: the Rabin cryptosystem of lab 4 with the given private key
+    -> run_batch: runs several of the above at once, each one within its own deadline (used by pkc.service)
+    -> is_prime and factor can go through a pkc.cache.ResultCache (one per process and database file, see
+       open_cache), so that the numbers seen before are not tested or factored again
+
+The functions are plain module-level functions of picklable arguments, so they can run in worker processes.
+"""
+
+import contextlib
+import functools
+import math
+import signal
+import time
+from typing import Iterator, Optional
+
+from assignments.B.fermat import Fermat
+from assignments.B.pollard import Pollard
+from lab4.main import Rabin
+from pkc import primality, sieve
+from pkc.cache import ResultCache
+
+METHODS = ('pollard', 'fermat')
+DEFAULT_ITERATIONS = 10000
+TRIAL_DIVISION_BOUND = 1000
+# Pollard's rho is retried with f(x) = x^2 + c for these values of c when a sequence cycles without a divisor
+POLLARD_CONSTANTS = (1, 2, 3)
+
+SMALL_PRIMES = sieve.small_primes(TRIAL_DIVISION_BOUND)
+
+
+def is_prime(number: int) -> bool:
+    """
+    :return: True if the number is (probably) prime, False otherwise
+    """
+    if number < sieve.DEFAULT_LIMIT:
+        bitmap = _default_bitmap()
+        if bitmap is not None:
+            return bitmap.is_prime(number)
+    return primality.baillie_psw(number)
+
+
+@functools.lru_cache(maxsize=None)
+def _default_bitmap() -> Optional[sieve.PrimeBitmap]:
+    """
+    :return: the default bitmap of pkc.sieve, opened on the first small number, None if it cannot be built (e.g. no
+             writable cache directory), the Baillie-PSW test being exact for those numbers anyway
+    """
+    try:
+        return sieve.default()
+    except OSError:
+        return None
+
+
+def split(number: int, method: str = 'pollard', iterations: int = DEFAULT_ITERATIONS) -> Optional[int]:
+    """
+    Looks for a proper divisor of an odd composite number
+    :return: the divisor, or None if none was found within the given number of iterations
+    """
+    root = math.isqrt(number)
+    if root * root == number:
+        # Fermat's method starts above √n, so it would never find this one
+        return root
+
+    if method == 'fermat':
+        factors = Fermat.algorithm(number, iterations)
+        # t - s = 1 means that the only factorization found is the trivial one, 1 * n
+        return factors[0] if factors and factors[0] > 1 else None
+
+    for c in POLLARD_CONSTANTS:
+        factors = Pollard.algorithm(number, 2, lambda x: x * x + c, iterations)
+        if factors:
+            return factors[0]
+    return None
+
+
+def trial_division(number: int) -> tuple[list[int], int]:
+    """
+    Divides the number by the primes below TRIAL_DIVISION_BOUND
+    :return: the prime factors found (with multiplicity) and the cofactor, which has no prime factor below the bound
+    :raises ValueError: if the number is not positive
+    """
+    if number < 1:
+        raise ValueError(f'{number} is not a positive integer')
+
+    factors = list()
+    for p in SMALL_PRIMES:
+        if p * p > number:
+            break
+        while number % p == 0:
+            factors.append(p)
+            number //= p
+    return factors, number
+
+
+def factor(number: int, method: str = 'pollard', iterations: int = DEFAULT_ITERATIONS) -> dict:
+    """
+    Factors a number as far as the method manages to
+    :return: {'factors': the prime factors found, in increasing order (with multiplicity),
+              'remaining': the composite parts which could not be split,
+              'complete': True if nothing remained}
+    """
+    factors, number = trial_division(number)
+    remaining = list()
+    pending = [number] if number > 1 else []
+    while pending:
+        part = pending.pop()
+        if part < TRIAL_DIVISION_BOUND ** 2 or is_prime(part):
+            # no prime below the bound divides the part, so if it is below the bound squared, it is prime
+            factors.append(part)
+            continue
+        divisor = split(part, method, iterations)
+        if divisor is None:
+            remaining.append(part)
+        else:
+            pending.extend((divisor, part // divisor))
+
+    return {'factors': sorted(factors), 'remaining': sorted(remaining), 'complete': not remaining}
+
+
+def encrypt(key: tuple[int, int], text: str) -> str:
+    return _rabin(tuple(key)).encrypt(text)
+
+
+def decrypt(key: tuple[int, int], text: str) -> list[str]:
+    return _rabin(tuple(key)).decrypt(text)
+
+
+@functools.lru_cache(maxsize=64)
+def _rabin(key: tuple[int, int]) -> Rabin:
+    # the CRT coefficients of a key are computed once per worker process
+    p, q = key
+    if p == q or not is_prime(p) or not is_prime(q):
+        raise ValueError(f'the key must be two distinct primes, not {p} and {q}')
+    return Rabin((p, q))
+
+
+OPERATIONS = {
+    'is-prime': is_prime,
+    'factor': factor,
+    'encrypt': encrypt,
+    'decrypt': decrypt,
+}
+
+
+# ------------------------------------------------------------------ cache
+
+
+@functools.lru_cache(maxsize=None)
+def open_cache(path: str) -> ResultCache:
+    # every process opens the database once and keeps its own memory tier
+    return ResultCache(path)
+
+
+def run(operation: str, arguments: dict, cache: Optional[ResultCache] = None) -> tuple[object, Optional[str]]:
+    """
+    Runs one of the OPERATIONS, through the cache if one is given and the operation is cached
+    :return: the result and where it came from (see ResultCache), None if it was not looked up in the cache
+    """
+    if cache is not None and operation == 'is-prime':
+        return cache.is_prime(arguments['number'], is_prime)
+    if cache is not None and operation == 'factor':
+        return cache.factor(arguments['number'], arguments.get('method', 'pollard'),
+                            arguments.get('iterations', DEFAULT_ITERATIONS), factor)
+    return OPERATIONS[operation](**arguments), None
+
+
+# ------------------------------------------------------------------ worker processes
+
+
+def init_worker():
+    # the workers are stopped by the parent on Ctrl+C, they don't have to handle it themselves
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+# ------------------------------------------------------------------ time limits
+
+
+class TimeLimitExceeded(Exception):
+    pass
+
+
+def _raise_time_limit_exceeded(signum, frame):
+    raise TimeLimitExceeded()
+
+
+@contextlib.contextmanager
+def time_limit(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Interrupts the block with TimeLimitExceeded after the given number of seconds
+    It relies on SIGALRM, so it only works in the main thread (which is where the pool workers run their tasks);
+    on platforms without setitimer, or for seconds = None, the block is not limited.
+    """
+    if seconds is None or not hasattr(signal, 'setitimer'):
+        yield
+        return
+    if seconds <= 0:
+        raise TimeLimitExceeded()
+
+    previous = signal.signal(signal.SIGALRM, _raise_time_limit_exceeded)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def run_batch(items: list[tuple[str, dict, Optional[float]]], cache_path: Optional[str] = None) \
+        -> list[tuple[str, object, Optional[str]]]:
+    """
+    Runs a batch of operations, one after the other
+    :param items: (operation, keyword arguments, deadline) for every item; the deadline is a time.time()
+                  timestamp, or None for no deadline
+    :param cache_path: the database of the cache (see open_cache), None to compute everything
+    :return: ('ok', result, cache source), ('timeout', None, None), ('invalid', message, None) if the item raised
+             a ValueError (its arguments were wrong) or ('error', message, None) if it raised anything else, for
+             every item, in the same order
+    """
+    cache = open_cache(cache_path) if cache_path else None
+    results = list()
+    for operation, arguments, deadline in items:
+        try:
+            with time_limit(deadline - time.time() if deadline is not None else None):
+                results.append(('ok', *run(operation, arguments, cache)))
+        except TimeLimitExceeded:
+            results.append(('timeout', None, None))
+        except ValueError as error:
+            results.append(('invalid', str(error), None))
+        except Exception as error:
+            # whatever goes wrong with one item only fails that item, not the others of its batch
+            results.append(('error', f'{type(error).__name__}: {error}', None))
+    if cache is not None:
+        cache.flush()
+    return results
@@ -0,0 +1,13 @@
+"""
+The tests run from the labs directory (python -m pytest tests), which is the import root of the modules
+"""
+
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def sieve_directory(tmp_path_factory):
+    # the default prime bitmap of pkc.sieve is built in a directory of the test session, not in the user's cache
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('PKC_SIEVE_DIR', str(tmp_path_factory.mktemp('sieve')))
+        yield
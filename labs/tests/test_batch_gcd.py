@@ -0,0 +1,67 @@
+import io
+import math
+
+import pytest
+
+from pkc import batch_gcd
+
+# the moduli 0 and 1, 1 and 2 share a prime, the modulus 3 shares both of its primes with 0 and 4
+MODULI = [101 * 103, 103 * 107, 107 * 109, 101 * 113, 113 * 127, 131 * 137, 139 * 149]
+
+
+def _pairwise_gcds(moduli: list[int]) -> list[int]:
+    return [math.gcd(modulus, math.prod(moduli[:index] + moduli[index + 1:])) for index, modulus in enumerate(moduli)]
+
+
+@pytest.mark.parametrize('workers', (1, 2))
+@pytest.mark.parametrize('chunk_size', (1, 2, batch_gcd.CHUNK_SIZE))
+def test_batch_gcd_agrees_with_the_pairwise_products(workers, chunk_size, tmp_path):
+    assert batch_gcd.batch_gcd(MODULI, workers, str(tmp_path), chunk_size) == _pairwise_gcds(MODULI)
+    # the levels are written to a temporary directory of the working directory, which is removed
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_batch_gcd_consumes_a_generator():
+    assert batch_gcd.batch_gcd((modulus for modulus in MODULI), workers=1) == _pairwise_gcds(MODULI)
+
+
+def test_batch_gcd_of_fewer_than_two_moduli():
+    assert batch_gcd.batch_gcd([], workers=1) == []
+    assert batch_gcd.batch_gcd([15], workers=1) == [1]
+
+
+def test_find_shared_factors_splits_the_moduli_sharing_both_primes():
+    factors = batch_gcd.find_shared_factors(MODULI, workers=1)
+    assert factors == {
+        0: (101, 103),
+        1: (103, 107),
+        2: (107, 109),
+        3: (101, 113),
+        4: (113, 127),
+    }
+
+
+def test_parse_modulus():
+    assert batch_gcd._parse_modulus('0123\n') == 123
+    assert batch_gcd._parse_modulus(' 42 ') == 42
+    assert batch_gcd._parse_modulus('0x1f') == 31
+    assert batch_gcd._parse_modulus('0O17') == 15
+    assert batch_gcd._parse_modulus('0b101') == 5
+    with pytest.raises(ValueError):
+        batch_gcd._parse_modulus('12a')
+
+
+def test_main_reads_a_file(tmp_path, capsys):
+    path = tmp_path / 'moduli.txt'
+    path.write_text('\n'.join(hex(modulus) for modulus in MODULI[:2]) + '\n\n')
+    assert batch_gcd.main([str(path), '--workers', '1']) == 0
+    assert capsys.readouterr().out == f'0: {MODULI[0]} = 101 * 103\n1: {MODULI[1]} = 103 * 107\n' \
+                                      '2 of 2 moduli share a prime factor\n'
+
+
+def test_main_leaves_stdin_open(monkeypatch, capsys):
+    stdin = io.StringIO('0010403\n0011021\n')
+    monkeypatch.setattr('sys.stdin', stdin)
+    assert batch_gcd.main(['--workers', '1']) == 0
+    assert not stdin.closed
+    assert capsys.readouterr().out.endswith('2 of 2 moduli share a prime factor\n')
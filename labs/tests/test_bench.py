@@ -0,0 +1,99 @@
+import json
+import math
+import random
+
+import pytest
+
+from pkc import bench, numtheory
+
+
+def test_percentile_interpolates_between_ranks():
+    assert bench._percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.5
+    assert bench._percentile([1.0, 2.0, 3.0, 4.0], 0.0) == 1.0
+    assert bench._percentile([1.0, 2.0, 3.0, 4.0], 1.0) == 4.0
+    assert bench._percentile([5.0], 0.95) == 5.0
+
+
+def _recording_case(calls: list) -> bench.Case:
+    return bench.Case('test.recording', lambda value: calls.append(value),
+                      lambda rng, bits: (rng.getrandbits(bits),), (16,), inputs=4)
+
+
+def test_measure_generates_the_same_inputs_for_the_same_seed():
+    first, second, other = list(), list(), list()
+    bench.measure(_recording_case(first), 16, seed=1, repeat=2, warmup=1)
+    bench.measure(_recording_case(second), 16, seed=1, repeat=2, warmup=1)
+    bench.measure(_recording_case(other), 16, seed=2, repeat=2, warmup=1)
+    assert first == second
+    assert first != other
+    # 4 inputs, called once per warm-up run and once per repeat
+    assert len(first) == 4 * 3
+
+
+def test_measure_reports_ordered_statistics():
+    result = bench.measure(_recording_case(list()), 16, repeat=5, warmup=0)
+    assert result['name'] == 'test.recording' and result['size'] == 16 and result['unit'] == 'bits'
+    assert result['samples'] == 5
+    assert 0 < result['min_ns'] <= result['median_ns'] <= result['p95_ns']
+    assert result['ops_per_sec'] == pytest.approx(1e9 / result['median_ns'])
+
+
+def test_select_cases_by_substring():
+    assert bench.select_cases() == bench.CASES
+    selected = bench.select_cases(['numtheory.crt', 'legacy.rabin'])
+    assert selected and all(case.name.startswith(('numtheory.crt', 'legacy.rabin')) for case in selected)
+    assert bench.select_cases(['no such case']) == []
+
+
+def test_case_names_are_unique():
+    names = [case.name for case in bench.CASES]
+    assert len(names) == len(set(names))
+
+
+def _report(medians: dict) -> dict:
+    return {'meta': {}, 'results': {key: {'median_ns': median} for key, median in medians.items()}}
+
+
+def test_compare_flags_regressions_beyond_the_threshold():
+    baseline = _report({'a[1]': 100.0, 'b[1]': 100.0, 'c[1]': 100.0, 'gone[1]': 1.0})
+    current = _report({'a[1]': 115.0, 'b[1]': 105.0, 'c[1]': 80.0, 'new[1]': 1.0})
+    verdicts = {entry['key']: entry['verdict'] for entry in bench.compare(baseline, current, threshold=0.1)}
+    assert verdicts == {'a[1]': 'regression', 'b[1]': 'unchanged', 'c[1]': 'improvement'}
+
+
+def test_main_compare_fails_on_a_regression(tmp_path, capsys):
+    baseline, current = tmp_path / 'baseline.json', tmp_path / 'current.json'
+    baseline.write_text(json.dumps(_report({'a[1]': 100.0})))
+    current.write_text(json.dumps(_report({'a[1]': 200.0})))
+    assert bench.main(['compare', str(baseline), str(current)]) == 1
+    assert 'regression' in capsys.readouterr().out
+    current.write_text(json.dumps(_report({'a[1]': 100.0})))
+    assert bench.main(['compare', str(baseline), str(current)]) == 0
+
+
+# ------------------------------------------------------------------ the legacy implementations the bench compares with
+
+
+def test_legacy_gcds_agree_with_the_numtheory_ones():
+    rng = random.Random(0)
+    for _ in range(50):
+        a, b = rng.randrange(1, 1 << 12), rng.randrange(1, 1 << 12)
+        assert bench._legacy_gcd_division(a, b) == math.gcd(a, b)
+        assert bench._legacy_gcd_subtraction(a, b) == numtheory.binary_gcd(a, b)
+        assert bench._legacy_gcd_brute_force(a, b) == math.gcd(a, b)
+        assert bench._legacy_pollard_gcd(a, b) == numtheory.gcd(a, b)
+        d, x, y = bench._legacy_hill_gcd_extended(a, b)
+        assert d == math.gcd(a, b) and a * x + b * y == d
+
+
+def test_legacy_rabin_crt_agrees_with_numtheory_crt():
+    p, q = 31, 53
+    crt = numtheory.CRT((p, q))
+    for a1, a2 in ((3, 7), (0, 5), (30, 52)):
+        expected = [crt.solve((a1, a2)), crt.solve((a1, -a2)), crt.solve((-a1, a2)), crt.solve((-a1, -a2))]
+        assert bench._legacy_rabin_crt(p, q, a1, a2) == expected
+
+
+def test_legacy_rabin_is_prime():
+    assert [n for n in range(60) if bench._legacy_rabin_is_prime(n)] == [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37,
+                                                                          41, 43, 47, 53, 59]
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from pkc import bulk
+
+FACTOR_OPTIONS = {'method': 'pollard', 'iterations': 1000}
+LINES = ['# a comment', '97', '', '8051', '0x11', 'abc', '100']
+
+
+def _without_times(records) -> list[dict]:
+    return [{key: value for key, value in record.items() if key != 'elapsed_ms'} for record in records]
+
+
+def test_run_item_is_prime():
+    assert _without_times([bulk.run_item('is-prime', 0, '97', {}, None)]) == [{'index': 0, 'n': 97, 'is_prime': True}]
+    assert _without_times([bulk.run_item('is-prime', 1, '0b1001', {}, None)]) \
+        == [{'index': 1, 'n': 9, 'is_prime': False}]
+
+
+def test_run_item_factor():
+    record = bulk.run_item('factor', 3, '8051', FACTOR_OPTIONS, 5.0)
+    assert _without_times([record]) == [{'index': 3, 'n': 8051, 'factors': [83, 97], 'remaining': [],
+                                         'complete': True}]
+    assert record['elapsed_ms'] >= 0
+
+
+def test_run_item_errors():
+    assert bulk.run_item('is-prime', 0, 'abc', {}, None) == {'index': 0, 'n': 'abc', 'error': 'invalid number',
+                                                             'elapsed_ms': 0.0}
+    assert bulk.run_item('factor', 0, '-15', FACTOR_OPTIONS, None)['error'] == '-15 is not a positive integer'
+    # no time left at all
+    assert bulk.run_item('factor', 0, '8051', FACTOR_OPTIONS, 0.0)['error'] == 'timeout'
+
+
+def test_run_item_goes_through_the_cache(tmp_path):
+    options = dict(FACTOR_OPTIONS, cache=str(tmp_path / 'cache.sqlite'))
+    first = bulk.run_item('factor', 0, '8051', options, None)
+    second = bulk.run_item('factor', 0, '8051', options, None)
+    assert first['cache'] == 'miss' and second['cache'] == 'memory'
+    assert first['factors'] == second['factors'] == [83, 97]
+
+
+def test_run_numbers_the_lines_without_the_skipped_ones():
+    records = list(bulk.run('is-prime', LINES, {}, workers=0, chunk_size=2))
+    assert [(record['index'], record['n']) for record in records] == [(0, 97), (1, 8051), (2, 17), (3, 'abc'),
+                                                                      (4, 100)]
+    assert [record.get('is_prime') for record in records] == [True, False, True, None, False]
+
+
+@pytest.mark.parametrize('ordered', (True, False))
+def test_run_in_worker_processes(ordered):
+    expected = _without_times(bulk.run('factor', LINES, FACTOR_OPTIONS, workers=0))
+    records = _without_times(bulk.run('factor', LINES, FACTOR_OPTIONS, workers=2, chunk_size=1, in_flight=2,
+                                      ordered=ordered))
+    if not ordered:
+        records.sort(key=lambda record: record['index'])
+    assert records == expected
+
+
+def test_main_writes_json_lines(tmp_path, capsys):
+    numbers, output = tmp_path / 'numbers.txt', tmp_path / 'output.jsonl'
+    numbers.write_text('97\n8051\n')
+    assert bulk.main(['factor', str(numbers), '--workers', '0', '--output', str(output)]) == 0
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [record['factors'] for record in records] == [[97], [83, 97]]
+    assert '2 numbers in' in capsys.readouterr().err
+
+
+def test_main_fails_when_a_number_fails(tmp_path, capsys):
+    numbers = tmp_path / 'numbers.txt'
+    numbers.write_text('97\nabc\n')
+    assert bulk.main(['is-prime', str(numbers), '--workers', '0', '--cache', str(tmp_path / 'cache.sqlite')]) == 1
+    out, err = capsys.readouterr()
+    assert json.loads(out.splitlines()[1])['error'] == 'invalid number'
+    assert '1 errors (0 timeouts)' in err
+    assert 'cache: 0.0% hits' in err
@@ -0,0 +1,87 @@
+from pkc import tasks
+from pkc.cache import CacheEntry, ResultCache
+
+# no prime factor below the trial division bound: Pollard's rho splits off 1009 within 40 iterations, the other
+# part needs about a thousand
+PART = 1000003 * 1000033
+NUMBER = 1009 * PART
+
+
+class _Counting:
+    def __init__(self, function):
+        self.function = function
+        self.calls = list()
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        return self.function(*args)
+
+
+def test_cache_entry_defaults():
+    first = CacheEntry()
+    assert first.attempts is None and first.factors is None and first.remaining == ()
+    assert not first.complete
+    assert not first.is_enough('pollard', 1)
+    assert first._replace(factors=(3, 5)).complete
+
+
+def test_is_prime_is_computed_once():
+    test = _Counting(tasks.is_prime)
+    with ResultCache() as cache:
+        assert cache.is_prime(97, test) == (True, 'miss')
+        assert cache.is_prime(97, test) == (True, 'memory')
+        assert cache.is_prime(91, test) == (False, 'miss')
+    assert test.calls == [(97,), (91,)]
+
+
+def test_factor_from_memory_and_disk(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    factorize = _Counting(tasks.factor)
+    with ResultCache(path) as cache:
+        first = cache.factor(8051, 'pollard', 100, factorize)
+        assert first == ({'factors': [83, 97], 'remaining': [], 'complete': True}, 'miss')
+        assert cache.factor(8051, 'fermat', 5, factorize) == (first[0], 'memory')
+    with ResultCache(path) as cache:
+        assert cache.factor(8051, 'pollard', 100, factorize) == (first[0], 'disk')
+        assert cache.factor(8051, 'pollard', 100, factorize) == (first[0], 'memory')
+        assert cache.hit_rates() == {'lookups': 2, 'memory': 1, 'disk': 1, 'resumed': 0, 'miss': 0, 'hit_rate': 1.0}
+    assert len(factorize.calls) == 1
+
+
+def test_the_memory_tier_is_bounded():
+    with ResultCache(capacity=2) as cache:
+        for number in (3, 5, 7):
+            cache.is_prime(number, tasks.is_prime)
+        assert cache.get(3) == (None, None)
+        assert cache.get(7)[1] == 'memory'
+
+
+def test_an_incomplete_factorization_is_resumed_by_a_stronger_attempt():
+    factorize = _Counting(tasks.factor)
+    with ResultCache() as cache:
+        partial, source = cache.factor(NUMBER, 'pollard', 40, factorize)
+        assert (partial, source) == ({'factors': [1009], 'remaining': [PART], 'complete': False}, 'miss')
+        # the same attempt cannot do better
+        assert cache.factor(NUMBER, 'pollard', 40, factorize) == (partial, 'memory')
+        assert cache.factor(PART, 'pollard', 40, factorize) == ({'factors': [], 'remaining': [PART],
+                                                                'complete': False}, 'memory')
+        assert len(factorize.calls) == 1
+
+        complete, source = cache.factor(NUMBER, 'pollard', 10 ** 5, factorize)
+        assert (complete, source) == ({'factors': [1009, 1000003, 1000033], 'remaining': [], 'complete': True},
+                                      'resumed')
+        # only the remaining part was factored again
+        assert factorize.calls[1:] == [(PART, 'pollard', 10 ** 5)]
+
+
+def test_a_part_factored_on_its_own_completes_the_entries_containing_it():
+    factorize = _Counting(tasks.factor)
+    with ResultCache() as cache:
+        cache.factor(NUMBER, 'pollard', 40, factorize)
+        assert cache.factor(PART, 'pollard', 10 ** 5, factorize) == ({'factors': [1000003, 1000033], 'remaining': [],
+                                                                     'complete': True}, 'resumed')
+        # the attempt on n is not stronger than the recorded one, but its part is now factored
+        result, source = cache.factor(NUMBER, 'pollard', 40, factorize)
+        assert (result['factors'], source) == ([1009, 1000003, 1000033], 'resumed')
+        assert cache.factor(NUMBER, 'pollard', 40, factorize)[1] == 'memory'
+        assert len(factorize.calls) == 2
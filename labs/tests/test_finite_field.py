@@ -0,0 +1,257 @@
+import itertools
+import random
+
+import pytest
+
+from pkc import finite_field
+from pkc.finite_field import GF2m, GFpn
+
+# x^8 + x^4 + x^3 + x + 1, the modulus of AES
+AES = 0x11b
+
+
+def _clmul(a: int, b: int) -> int:
+    result = 0
+    for i in range(b.bit_length()):
+        if b >> i & 1:
+            result ^= a << i
+    return result
+
+
+def _clmod(a: int, modulus: int) -> int:
+    while a.bit_length() >= modulus.bit_length():
+        a ^= modulus << (a.bit_length() - modulus.bit_length())
+    return a
+
+
+def _poly_multiply(a: tuple, b: tuple, modulus: tuple, p: int) -> tuple:
+    n = len(modulus) - 1
+    product = [0] * (2 * n)
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            product[i + j] += x * y
+    for k in range(2 * n - 1, n - 1, -1):
+        for i in range(n + 1):
+            product[k - n + i] -= product[k] * modulus[i]
+    return tuple(c % p for c in product[:n])
+
+
+def _irreducible_count(p: int, n: int) -> int:
+    # Gauss's formula: (1/n) * sum over d | n of mu(d) p^(n/d)
+    def mobius(d: int) -> int:
+        result, k = 1, 2
+        while d > 1:
+            if d % k == 0:
+                d //= k
+                if d % k == 0:
+                    return 0
+                result = -result
+            k += 1
+        return result
+
+    return sum(mobius(d) * p ** (n // d) for d in range(1, n + 1) if n % d == 0) // n
+
+
+# ------------------------------------------------------------------ polynomials
+
+
+def test_clmul_and_clmod_agree_with_the_reference():
+    rng = random.Random(1)
+    for bits in (1, 4, 9, 64, 300):
+        for _ in range(20):
+            a, b = rng.getrandbits(bits), rng.getrandbits(bits)
+            assert finite_field.clmul(a, b) == _clmul(a, b)
+    for modulus in (AES, 0b11, (1 << 127) | (1 << 1) | 1, (1 << 64) - 1):
+        for _ in range(20):
+            a = rng.getrandbits(300)
+            assert finite_field.clmod(a, modulus) == _clmod(a, modulus)
+    with pytest.raises(ZeroDivisionError):
+        finite_field.clmod(5, 0)
+
+
+def test_find_irreducible():
+    assert finite_field.find_irreducible(2, 8) == AES
+    assert finite_field.find_irreducible(2, 8, primitive=True) == 0x11d
+    assert finite_field.find_irreducible(3, 2) == (1, 0, 1)
+    assert finite_field.format_polynomial(finite_field.find_irreducible(3, 5)) == 'x^5 + 2x + 1'
+
+
+@pytest.mark.parametrize('p, n', ((2, 2), (2, 6), (2, 8), (3, 3), (3, 4), (5, 2), (7, 3)))
+def test_the_number_of_irreducible_polynomials(p, n):
+    polynomials = list(finite_field.irreducible_polynomials(p, n))
+    assert len(polynomials) == _irreducible_count(p, n)
+    assert all(finite_field.is_irreducible(polynomial, p) for polynomial in polynomials)
+
+
+def test_the_number_of_primitive_polynomials():
+    # phi(2^8 - 1) / 8 and phi(3^4 - 1) / 4
+    assert len(list(finite_field.irreducible_polynomials(2, 8, primitive=True))) == 16
+    assert len(list(finite_field.irreducible_polynomials(3, 4, primitive=True))) == 8
+    assert not finite_field.is_primitive(AES)
+
+
+def test_reducible_polynomials():
+    assert not finite_field.is_irreducible(_clmul(0b111, 0b1011))
+    assert not finite_field.is_irreducible((1, 0, 0, 1), 3)
+    assert not finite_field.is_irreducible(0b1)
+
+
+def test_a_non_prime_characteristic_is_refused():
+    for p in (0, 1, 4, 9):
+        with pytest.raises(ValueError, match='must be prime'):
+            finite_field.find_irreducible(p, 2)
+    with pytest.raises(ValueError, match='degree must be positive'):
+        finite_field.find_irreducible(3, 0)
+    with pytest.raises(ValueError):
+        finite_field.is_irreducible((1, 1), 6)
+    with pytest.raises(ValueError):
+        GFpn(1, 2)
+    with pytest.raises(ValueError):
+        GFpn(4, 2)
+
+
+def test_format_polynomial():
+    assert finite_field.format_polynomial(AES) == 'x^8 + x^4 + x^3 + x + 1'
+    assert finite_field.format_polynomial((2, 0, 1)) == 'x^2 + 2'
+    assert finite_field.format_polynomial((0, 2, 1)) == 'x^2 + 2x'
+    assert finite_field.format_polynomial(0) == '0'
+
+
+# ------------------------------------------------------------------ GF(2^m)
+
+
+def test_aes_field():
+    field = GF2m(8, AES)
+    assert field.has_tables
+    assert field.multiply(0x57, 0x83) == 0xc1
+    assert field.multiply(0x57, 0x13) == 0xfe
+    assert field.inverse(0x53) == 0xca
+    assert field.log(0x01, 0x03) == 0 and field.power(0x03, field.log(0x53, 0x03)) == 0x53
+
+
+@pytest.mark.parametrize('m, modulus', ((8, AES), (8, None), (4, None)))
+def test_gf2m_with_tables_agrees_with_the_reference(m, modulus):
+    field = GF2m(m, modulus)
+    for a, b in itertools.product(range(1 << m), repeat=2):
+        assert field.multiply(a, b) == _clmod(_clmul(a, b), field.modulus)
+    for a in range(1, 1 << m):
+        assert field.multiply(a, field.inverse(a)) == 1
+        assert field.divide(a, a) == 1
+
+
+def test_gf2m_without_tables():
+    field = GF2m(20)
+    assert not field.has_tables
+    rng = random.Random(2)
+    for _ in range(200):
+        a, b = field.random(rng), field.random(rng, nonzero=True)
+        assert field.multiply(a, b) == _clmod(_clmul(a, b), field.modulus)
+        assert field.multiply(b, field.inverse(b)) == 1
+        assert field.power(b, -3) == field.inverse(field.multiply(b, field.multiply(b, b)))
+    with pytest.raises(ZeroDivisionError):
+        field.inverse(0)
+
+
+def test_gf2m_refuses_a_reducible_modulus():
+    with pytest.raises(ValueError, match='not an irreducible polynomial of degree 8'):
+        GF2m(8, 0x11f)
+    with pytest.raises(ValueError):
+        GF2m(7, AES)
+
+
+# ------------------------------------------------------------------ GF(p^n)
+
+
+@pytest.mark.parametrize('p, n', ((3, 2), (5, 3), (2, 5), (7, 2)))
+def test_gfpn_agrees_with_the_reference(p, n):
+    field = GFpn(p, n)
+    assert field.has_tables
+    elements = list(field.elements())
+    assert len(elements) == p ** n and field.from_int(field.to_int(elements[-1])) == elements[-1]
+    for a, b in itertools.product(elements, repeat=2):
+        assert field.multiply(a, b) == _poly_multiply(a, b, field.modulus, p)
+    for a in elements[1:]:
+        assert field.multiply(a, field.inverse(a)) == field.one
+        assert field.add(a, field.negative(a)) == field.zero
+        assert field.subtract(a, a) == field.zero
+
+
+def test_gfpn_without_tables():
+    field = GFpn(5, 8)
+    assert not field.has_tables
+    rng = random.Random(3)
+    for _ in range(50):
+        a, b = field.random(rng), field.random(rng, nonzero=True)
+        assert field.multiply(a, b) == _poly_multiply(a, b, field.modulus, 5)
+        assert field.multiply(b, field.inverse(b)) == field.one
+    assert field.element([0] * 8 + [1]) == field.negative(field.modulus[:8])
+
+
+# ------------------------------------------------------------------ logarithms
+
+
+@pytest.mark.parametrize('field', (GF2m(8), GF2m(8, AES), GFpn(3, 4)), ids=repr)
+def test_log_with_tables(field):
+    g = field.generator
+    for k in range(field.order - 1):
+        assert field.log(field.power(g, k)) == k
+    for k in range(field.order - 1):
+        z = field.zech_log(k)
+        total = field.add(field.one, field.power(g, k))
+        assert total == field.zero if z is None else field.power(g, z) == total
+    with pytest.raises(ValueError):
+        field.log(field.zero)
+
+
+def test_log_by_baby_step_giant_step():
+    field = GF2m(20)
+    g = field.generator
+    for k in (0, 1, 12345, field.order - 2):
+        assert field.log(field.power(g, k)) == k
+    # 2^20 - 1 = 3 * 5^2 * 11 * 31 * 41: the powers of g^3 do not reach g
+    with pytest.raises(ValueError, match='is not a power'):
+        field.log(g, field.power(g, 3))
+
+
+def test_log_of_a_field_too_large():
+    field = GF2m(64)
+    with pytest.raises(ValueError, match='too large'):
+        field.log(field.x, field.x)
+
+
+# ------------------------------------------------------------------ arrays
+
+
+@pytest.mark.skipif(finite_field.np is None, reason='the arrays need NumPy')
+@pytest.mark.parametrize('field', (GF2m(8, AES), GF2m(20), GF2m(63)), ids=repr)
+def test_gf2m_arrays_agree_with_the_scalar_operations(field):
+    rng = random.Random(4)
+    a = [field.random(rng) for _ in range(100)]
+    b = [field.random(rng, nonzero=True) for _ in range(100)]
+    assert field.add_array(a, b).tolist() == [field.add(x, y) for x, y in zip(a, b)]
+    assert field.multiply_array(a, b).tolist() == [field.multiply(x, y) for x, y in zip(a, b)]
+    assert field.multiply_array(a, b[0]).tolist() == [field.multiply(x, b[0]) for x in a]
+    assert field.inverse_array(b).tolist() == [field.inverse(y) for y in b]
+    for exponent in (0, 1, 5, -2):
+        assert field.power_array(b, exponent).tolist() == [field.power(y, exponent) for y in b]
+    with pytest.raises(ZeroDivisionError):
+        field.inverse_array([1, 0])
+
+
+@pytest.mark.skipif(finite_field.np is None, reason='the arrays need NumPy')
+@pytest.mark.parametrize('field', (GFpn(3, 4), GFpn(5, 8)), ids=repr)
+def test_gfpn_arrays_agree_with_the_scalar_operations(field):
+    rng = random.Random(5)
+    a = [field.random(rng) for _ in range(50)]
+    b = [field.random(rng, nonzero=True) for _ in range(50)]
+
+    def as_tuples(array) -> list[tuple]:
+        return [tuple(row) for row in array.tolist()]
+
+    assert as_tuples(field.add_array(a, b)) == [field.add(x, y) for x, y in zip(a, b)]
+    assert as_tuples(field.multiply_array(a, b)) == [field.multiply(x, y) for x, y in zip(a, b)]
+    assert as_tuples(field.inverse_array(b)) == [field.inverse(y) for y in b]
+    for exponent in (0, 3, -1):
+        assert as_tuples(field.power_array(b, exponent)) == [field.power(y, exponent) for y in b]
+    with pytest.raises(ZeroDivisionError):
+        field.inverse_array([field.one, field.zero])
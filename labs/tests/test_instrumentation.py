@@ -0,0 +1,67 @@
+import json
+import time
+
+from assignments.B.pollard import Pollard
+from lab4.main import Rabin
+from pkc.instrumentation import Metrics, instrumented, metrics
+
+# 8051 = 83 * 97, found by Pollard's rho with x0 = 2 and f(x) = x^2 + 1 at the third iteration
+NUMBER = 8051
+
+
+def test_nothing_is_collected_when_disabled():
+    metrics.reset()
+    assert not metrics.enabled
+    assert Pollard.algorithm(NUMBER) == (83, 97)
+    with metrics.phase('test.phase'):
+        pass
+    assert metrics.counters == {} and metrics.phases == {}
+
+
+def test_instrumented_collects_the_counters_and_phases():
+    with instrumented() as collected:
+        assert Pollard.algorithm(NUMBER) == (83, 97)
+    assert not metrics.enabled
+    assert collected.counters == {'pollard.iterations': 3, 'pollard.f': 9, 'pollard.gcd': 3}
+    assert collected.phases['pollard.rho'][0] == 1
+    assert collected.phases['pollard.gcd'][0] == 3
+
+    exported = json.loads(collected.to_json())
+    assert exported['counters'] == collected.counters
+    assert set(exported['phases']) == {'pollard.gcd', 'pollard.rho'}
+
+
+def test_instrumented_keeps_or_discards_the_previous_metrics():
+    with instrumented():
+        Pollard.algorithm(NUMBER)
+    with instrumented(reset=False) as collected:
+        Pollard.algorithm(NUMBER)
+    assert collected.counters['pollard.iterations'] == 6
+    with instrumented() as collected:
+        pass
+    assert collected.counters == {}
+
+
+def test_pollard_time_excludes_the_consumer():
+    pause = 0.02
+    with instrumented() as collected:
+        for _ in Pollard.steps(NUMBER, trace=True):
+            time.sleep(pause)
+    # 5 records were consumed (start, 3 iterations, result), the computation itself takes microseconds
+    assert collected.phases['pollard.rho'][1] < pause * 1e9
+
+
+def test_rabin_phases():
+    with instrumented() as collected:
+        rabin = Rabin((31, 53))
+        assert 'BED_HI' in rabin.decrypt(rabin.encrypt('BED_HI'))
+    assert {'rabin.codec', 'rabin.square', 'rabin.sqrt', 'rabin.crt'} <= set(collected.phases)
+    assert collected.counters['rabin.mulmod'] > 0
+
+
+def test_add_time_accumulates():
+    collected = Metrics()
+    collected.add_time('test.loop', 100)
+    collected.add_time('test.loop', 50, calls=4)
+    assert collected.phases == {'test.loop': [5, 150]}
+    assert collected.as_dict()['phases']['test.loop'] == {'calls': 5, 'total_ns': 150, 'mean_ns': 30.0}
@@ -0,0 +1,60 @@
+import itertools
+import math
+import random
+
+import pytest
+
+from pkc import numtheory
+
+GCDS = (numtheory.gcd, numtheory.euclid_gcd, numtheory.binary_gcd, numtheory.lehmer_gcd)
+
+
+def _pairs() -> list[tuple[int, int]]:
+    rng = random.Random(1)
+    pairs = [(0, 0), (0, 7), (7, 0), (1, 1), (12, 18), (-12, 18), (12, -18), (-12, -18), (2 ** 70, 2 ** 65 * 3)]
+    for bits in (8, 64, 65, 200, numtheory.LEHMER_THRESHOLD + 500):
+        common = rng.getrandbits(bits // 2) | 1
+        pairs.append((rng.getrandbits(bits), rng.getrandbits(bits)))
+        pairs.append((common * rng.getrandbits(bits) << 3, -common * rng.getrandbits(bits) << 5))
+    return pairs
+
+
+@pytest.mark.parametrize('function', GCDS, ids=lambda function: function.__name__)
+def test_gcd_agrees_with_math_gcd(function):
+    for a, b in _pairs():
+        assert function(a, b) == math.gcd(a, b), (a, b)
+
+
+def test_extended_gcd_gives_bezout_coefficients():
+    for a, b in _pairs():
+        d, x, y = numtheory.extended_gcd(a, b)
+        assert d == math.gcd(a, b), (a, b)
+        assert a * x + b * y == d, (a, b)
+
+
+def test_inverse_mod():
+    for n in (2, 7, 10, 2 ** 61 - 1):
+        for a in range(1, min(n, 50)):
+            if math.gcd(a, n) == 1:
+                x = numtheory.inverse_mod(a, n)
+                assert 0 <= x < n and a * x % n == 1
+    with pytest.raises(ValueError):
+        numtheory.inverse_mod(6, 10)
+
+
+@pytest.mark.parametrize('moduli', ((7, 11), (3, 5, 7), (4, 9, 25, 7)))
+def test_crt_agrees_with_brute_force(moduli):
+    crt = numtheory.CRT(moduli)
+    assert crt.modulus == math.prod(moduli)
+    solutions = dict()
+    for x in range(crt.modulus):
+        solutions[tuple(x % m for m in moduli)] = x
+    for residues in itertools.product(*(range(m) for m in moduli)):
+        assert crt.solve(residues) == solutions[residues]
+
+
+def test_crt_rejects_moduli_which_are_not_coprime():
+    with pytest.raises(ValueError, match='not pairwise coprime'):
+        numtheory.CRT((6, 10))
+    with pytest.raises(ValueError):
+        numtheory.CRT((3, 5, 9))
@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from lab4.main import Rabin
+from pkc import primality, sieve
+
+# strong pseudoprimes to the base 2 without a prime factor below the trial division bound (the first one also passes
+# the bases 3 and 5 of assignment A, the second one every prime base up to 37)
+STRONG_PSEUDOPRIMES = (25326001, 3825123056546413051)
+# strong Lucas pseudoprimes for Selfridge's parameters
+STRONG_LUCAS_PSEUDOPRIMES = (5459, 5777, 10877, 16109, 18971)
+CARMICHAEL_NUMBERS = (561, 1105, 1729, 41041, 825265, 321197185)
+RANDOMIZED_TESTS = (primality.miller_rabin, primality.solovay_strassen)
+
+
+def _legendre(a: int, p: int) -> int:
+    # Euler's criterion
+    value = pow(a, (p - 1) // 2, p)
+    return -1 if value == p - 1 else value
+
+
+def _jacobi(a: int, n: int) -> int:
+    # the product of the Legendre symbols of the prime factors of n, with multiplicity
+    result, p = 1, 3
+    while n > 1:
+        while n % p == 0:
+            result *= _legendre(a, p)
+            n //= p
+        p += 2
+    return result
+
+
+def test_jacobi_agrees_with_euler_criterion():
+    for n in range(1, 200, 2):
+        for a in range(-10, 2 * n):
+            assert primality.jacobi(a, n) == _jacobi(a, n), (a, n)
+
+
+def test_jacobi_is_only_defined_for_odd_positive_n():
+    for n in (0, -3, 8):
+        with pytest.raises(ValueError):
+            primality.jacobi(1, n)
+
+
+@pytest.mark.parametrize('test', [*primality.TESTS.values()], ids=[*primality.TESTS])
+def test_the_tests_agree_with_the_sieve(test):
+    primes = set(sieve.small_primes(20000))
+    for number in range(-5, 20000):
+        assert test(number) == (number in primes), number
+
+
+@pytest.mark.parametrize('test', [*primality.TESTS.values()], ids=[*primality.TESTS])
+def test_large_primes_are_accepted(test):
+    for prime in (2 ** 61 - 1, 2 ** 89 - 1, 2 ** 127 - 1, 10 ** 18 + 9, 1000033):
+        assert test(prime)
+
+
+def test_baillie_psw_rejects_the_pseudoprimes():
+    for number in STRONG_PSEUDOPRIMES:
+        assert primality.is_strong_probable_prime(number, 2)
+        assert not primality.baillie_psw(number)
+    for number in STRONG_LUCAS_PSEUDOPRIMES:
+        assert primality.is_strong_lucas_probable_prime(number)
+        assert not primality.baillie_psw(number)
+    for number in CARMICHAEL_NUMBERS + (1000003 * 1000033, (2 ** 31 - 1) ** 2):
+        assert not primality.baillie_psw(number)
+
+
+@pytest.mark.parametrize('test', RANDOMIZED_TESTS, ids=lambda test: test.__name__)
+def test_randomized_tests_reject_the_pseudoprimes(test):
+    for number in STRONG_PSEUDOPRIMES + CARMICHAEL_NUMBERS:
+        assert not test(number, rng=random.Random(number))
+
+
+def test_random_prime():
+    rng = random.Random(1)
+    for bits in (2, 3, 8, 64, 256):
+        prime = primality.random_prime(bits, rng)
+        assert prime.bit_length() == bits and primality.baillie_psw(prime)
+    for bits in (3, 16, 128):
+        prime = primality.random_prime(bits, rng, blum=True)
+        assert prime.bit_length() == bits and prime % 4 == 3 and primality.baillie_psw(prime)
+    with pytest.raises(ValueError):
+        primality.random_prime(1)
+    with pytest.raises(ValueError):
+        primality.random_prime(2, blum=True)
+
+
+# ------------------------------------------------------------------ the Rabin cryptosystem of lab 4
+
+
+def test_rabin_square_roots_are_the_smallest_from_2_on():
+    square_root = Rabin._Rabin__get_modular_square_root
+    for p in (23, 29, 31, 37, 43, 53, 71, 101):
+        for c in range(p):
+            roots = [x for x in range(2, p) if x * x % p == c]
+            expected = 0 if c == 0 else roots[0] if roots else None
+            assert square_root(c, p) == expected, (c, p)
+
+
+def _round_trips(rabin: Rabin, text: str) -> bool:
+    return text in rabin.decrypt(rabin.encrypt(text))
+
+
+@pytest.mark.parametrize('key', ((23, 29), (31, 53), (43, 71), (97, 101), (89, 23)))
+def test_rabin_round_trip_of_one_unit(key):
+    # the candidates of several units are paired by their rank, so only a text of one unit is sure to come back
+    rabin = Rabin(key)
+    length = rabin._Rabin__len_plaintext_unit
+    for text in ('A', 'Z', 'GO', 'ME', '_Z', 'ZZ'):
+        text = (text * length)[:length]
+        assert _round_trips(rabin, text), (key, text)
+
+
+def test_rabin_round_trip_of_several_units():
+    assert _round_trips(Rabin((31, 53)), 'GAME')
+    assert _round_trips(Rabin((31, 53)), 'BED_HI')
+
+
+@pytest.mark.parametrize('bits', (None, 16, 64))
+def test_rabin_with_generated_keys(bits):
+    rabin = Rabin(bits=bits)
+    length = rabin._Rabin__len_plaintext_unit
+    assert _round_trips(rabin, ('ATTACK_AT_DAWN' * length)[:length])
+
+
+def test_rabin_decrypt_with_the_wrong_key():
+    assert 'HENO' in Rabin((31, 53)).decrypt('AQFRAB')
+    with pytest.raises(ValueError, match='not a square modulo 1537'):
+        Rabin((29, 53)).decrypt('AQFRAB')
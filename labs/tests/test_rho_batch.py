@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from pkc import primality, rho_batch, tasks
+
+pytestmark = pytest.mark.skipif(rho_batch.np is None, reason='the lanes need NumPy')
+
+
+def _semiprimes(count: int, bits: int, seed: int) -> list[int]:
+    rng = random.Random(seed)
+    return [primality.random_prime(bits, rng) * primality.random_prime(bits, rng) for _ in range(count)]
+
+
+def _check_divisors(numbers: list[int], divisors: list) -> None:
+    assert len(divisors) == len(numbers)
+    for number, divisor in zip(numbers, divisors):
+        assert divisor is not None and 1 < divisor < number and number % divisor == 0, number
+
+
+@pytest.mark.parametrize('bits', (12, 20), ids=('float-small', 'float'))
+@pytest.mark.parametrize('lanes', (4, 40, 64, rho_batch.DEFAULT_LANES))
+def test_split_batch_below_float_bits(bits, lanes):
+    numbers = _semiprimes(100, bits, seed=bits)
+    assert max(numbers).bit_length() <= rho_batch.FLOAT_BITS
+    _check_divisors(numbers, rho_batch.split_batch(numbers, lanes))
+
+
+@pytest.mark.parametrize('lanes', (4, 40, 64))
+def test_split_batch_in_montgomery_form(lanes):
+    numbers = _semiprimes(80, 26, seed=3)
+    assert min(numbers).bit_length() > rho_batch.FLOAT_BITS
+    _check_divisors(numbers, rho_batch.split_batch(numbers, lanes))
+
+
+def test_split_batch_mixes_the_kinds_of_numbers():
+    numbers = [0, 1, 2, 3, 4, 10, 49, 91, 2 ** 62 + 1] + _semiprimes(40, 14, seed=4) + _semiprimes(40, 27, seed=5)
+    divisors = rho_batch.split_batch(numbers, lanes=48)
+    assert divisors[:7] == [None, None, None, None, 2, 2, 7]
+    assert divisors[7] in (7, 13)
+    # 2^62 + 1 = 5 * 5581 * 8681 * 49477 * 384773 is too big for the lanes: it is split by the scalar loop
+    _check_divisors(numbers[8:], divisors[8:])
+
+
+def test_a_prime_is_given_up_on():
+    assert rho_batch.split_batch([1000003, 2 ** 31 - 1], lanes=64, iterations=200) == [None, None]
+
+
+def test_factor_batch_agrees_with_the_scalar_factorization():
+    rng = random.Random(6)
+    numbers = [1, 2, 97, 8051, 2 ** 32 + 1, 3 ** 20, 1009 * 1000003 * 1000033] + \
+        [rng.randrange(2, 1 << 60) for _ in range(60)] + _semiprimes(20, 24, seed=7)
+    factorizations = rho_batch.factor_batch(numbers, lanes=64)
+    for number, factorization in zip(numbers, factorizations):
+        assert factorization == tasks.factor(number), number
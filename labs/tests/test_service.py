@@ -0,0 +1,176 @@
+import asyncio
+import json
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from pkc import service, tasks
+
+
+class _InlineExecutor(Executor):
+    """
+    Runs the batches in the calling thread (the main one, where the time limits of pkc.tasks work), or fails them
+    as a pool whose worker died would
+    """
+
+    def __init__(self, broken: bool = False):
+        self.broken = broken
+        self.submitted = 0
+        self.is_shut_down = False
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        self.submitted += 1
+        future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool('a child process terminated abruptly'))
+        else:
+            future.set_result(fn(*args, **kwargs))
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.is_shut_down = True
+
+
+def _service(executors: list) -> service.Service:
+    # the executors are handed out one after the other, for the first pool and its replacements
+    return service.Service(service.MicroBatcher(lambda: executors.pop(0), workers=1, max_delay=0.001), deadline=5.0)
+
+
+async def _handle(handler: service.Service, requests: list[tuple[str, str, object]]) -> list[tuple[int, dict]]:
+    batching = asyncio.create_task(handler.batcher.run())
+    responses = list()
+    try:
+        for method, path, body in requests:
+            try:
+                responses.append(await handler.handle(method, path, json.dumps(body).encode()))
+            except service.HttpError as error:
+                responses.append((error.status, {'error': str(error)}))
+    finally:
+        batching.cancel()
+    return responses
+
+
+def _statuses(handler: service.Service, requests: list[tuple[str, str, object]]) -> list[int]:
+    return [status for status, _ in asyncio.run(_handle(handler, requests))]
+
+
+# ------------------------------------------------------------------ requests
+
+
+def test_integer_accepts_numbers_and_decimal_strings():
+    assert service._integer({'n': 97}, 'n') == 97
+    assert service._integer({'n': ' 0097 '}, 'n') == 97
+    assert service._integer({'n': '9' * service.MAX_DIGITS}, 'n') == 10 ** service.MAX_DIGITS - 1
+
+
+@pytest.mark.parametrize('value', (None, True, 9.5, '', '-5', '0x11', '²', '٣', '9' * (service.MAX_DIGITS + 1), [7]))
+def test_integer_rejects(value):
+    with pytest.raises(service.HttpError) as raised:
+        service._integer({'n': value}, 'n')
+    assert raised.value.status == 400
+
+
+def test_rabin_arguments():
+    assert service._rabin_arguments({'key': [31, '53'], 'text': 'BED_HI'}) == {'key': (31, 53), 'text': 'BED_HI'}
+    for body in ({'key': [31], 'text': 'a'}, {'key': (31, 53), 'text': 'a'}, {'key': [31, 53], 'text': 'a b'},
+                 {'key': [31, 53], 'text': ''}, {'key': [31, 'x'], 'text': 'a'}):
+        with pytest.raises(service.HttpError):
+            service._rabin_arguments(body)
+
+
+def test_factor_arguments():
+    assert service._factor_arguments({'n': 8051}) == {'number': 8051, 'method': 'pollard',
+                                                     'iterations': tasks.DEFAULT_ITERATIONS}
+    with pytest.raises(service.HttpError, match='"method"'):
+        service._factor_arguments({'n': 8051, 'method': 'ecm'})
+
+
+# ------------------------------------------------------------------ run_batch
+
+
+def test_run_batch_statuses():
+    results = tasks.run_batch([
+        ('is-prime', {'number': 97}, None),
+        ('factor', {'number': 0}, None),
+        ('decrypt', {'key': (29, 53), 'text': 'AQFRAB'}, None),
+        ('encrypt', {'key': (31, 53)}, None),
+        ('factor', {'number': 8051}, 0.0),
+    ])
+    assert results[0] == ('ok', True, None)
+    assert results[1] == ('invalid', '0 is not a positive integer', None)
+    # AQFRAB was encrypted with [31, 53]
+    assert results[2][0] == 'invalid' and results[2][1].startswith('13151 is not a square modulo 1537')
+    assert results[3][0] == 'error' and results[3][1].startswith('TypeError')
+    assert results[4] == ('timeout', None, None)
+
+
+# ------------------------------------------------------------------ batching and HTTP
+
+
+def test_handle_maps_the_statuses():
+    handler = _service([_InlineExecutor()])
+    responses = asyncio.run(_handle(handler, [
+        ('POST', '/is-prime', {'n': 97}),
+        ('POST', '/factor', {'n': '8051'}),
+        ('POST', '/decrypt', {'key': [29, 53], 'text': 'AQFRAB'}),
+        ('POST', '/decrypt', {'key': [31, 31], 'text': 'AQFRAB'}),
+        ('POST', '/factor', {'n': 0}),
+        ('POST', '/is-prime', {'n': 'abc'}),
+        ('POST', '/is-prime', [97]),
+        ('GET', '/is-prime', {'n': 97}),
+        ('POST', '/unknown', {}),
+        ('POST', '/is-prime', {'n': 97, 'deadline_ms': 0}),
+    ]))
+    assert responses[0] == (200, {'result': True})
+    assert responses[1] == (200, {'result': {'factors': [83, 97], 'remaining': [], 'complete': True}})
+    assert [status for status, _ in responses[2:]] == [400, 400, 400, 400, 400, 405, 404, 400]
+
+
+def test_encrypt_and_decrypt():
+    async def round_trip() -> tuple[int, dict]:
+        handler = _service([_InlineExecutor()])
+        (_, encrypted), = await _handle(handler, [('POST', '/encrypt', {'key': [31, 53], 'text': 'BED_HI'})])
+        response, = await _handle(handler, [('POST', '/decrypt', {'key': [31, 53], 'text': encrypted['result']})])
+        return response
+
+    status, decrypted = asyncio.run(round_trip())
+    assert status == 200 and 'BED_HI' in decrypted['result']
+
+
+def test_a_broken_pool_is_replaced():
+    broken, replacement = _InlineExecutor(broken=True), _InlineExecutor()
+    handler = _service([broken, replacement])
+    assert _statuses(handler, [('POST', '/is-prime', {'n': 97})] * 3) == [500, 200, 200]
+    assert broken.is_shut_down and broken.submitted == 1
+    assert handler.batcher.executor is replacement and replacement.submitted == 2
+
+
+def test_overloaded():
+    handler = _service([_InlineExecutor()])
+    handler.batcher.max_pending = 0
+    assert _statuses(handler, [('POST', '/is-prime', {'n': 97})]) == [503]
+
+
+def test_serve_connection():
+    async def exchange() -> list[bytes]:
+        handler = _service([_InlineExecutor()])
+        batching = asyncio.create_task(handler.batcher.run())
+        server = await asyncio.start_server(handler.serve_connection, '127.0.0.1', 0)
+        try:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            body = b'{"n": 8051}'
+            writer.write(b'POST /is-prime HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body))
+            writer.write(b'GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n')
+            responses = await reader.read()
+            writer.close()
+            return responses.split(b'HTTP/1.1 ')[1:]
+        finally:
+            batching.cancel()
+            server.close()
+
+    first, second = asyncio.run(exchange())
+    assert first.startswith(b'200 OK\r\n') and first.endswith(b'{"result": false}')
+    assert second.startswith(b'200 OK\r\n') and b'Connection: close' in second
+    stats = json.loads(second.split(b'\r\n\r\n', 1)[1])
+    assert stats['statuses'] == {'200': 1} and stats['batches']['count'] == 1
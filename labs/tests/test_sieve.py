@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+from pkc import sieve
+
+
+def _reference(stop: int) -> list[int]:
+    return [n for n in range(2, stop) if all(n % d for d in range(2, int(n ** 0.5) + 1))]
+
+
+@pytest.mark.parametrize('limit', (3, 4, 5, 100, 101, 1000, 1001, 4099))
+@pytest.mark.parametrize('segment_size', (8, 24, sieve.SEGMENT_SIZE))
+def test_build_agrees_with_the_reference(tmp_path, limit, segment_size):
+    path = str(tmp_path / 'primes.bin')
+    expected = _reference(limit)
+    assert sieve.build(path, limit, workers=1, segment_size=segment_size) == len(expected)
+    with sieve.PrimeBitmap(path) as bitmap:
+        assert bitmap.limit == limit
+        assert list(bitmap.primes()) == expected
+        assert [n for n in range(limit) if bitmap.is_prime(n)] == expected
+        assert bitmap.count() == len(expected)
+
+
+def test_build_in_worker_processes(tmp_path):
+    path = str(tmp_path / 'primes.bin')
+    assert sieve.build(path, 10000, workers=2, segment_size=256) == 1229
+    with sieve.PrimeBitmap(path) as bitmap:
+        assert list(bitmap.primes()) == _reference(10000)
+    # the temporary file was renamed
+    assert os.listdir(tmp_path) == ['primes.bin']
+
+
+def test_build_rejects_its_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        sieve.build(str(tmp_path / 'primes.bin'), 2)
+    with pytest.raises(ValueError):
+        sieve.build(str(tmp_path / 'primes.bin'), 100, segment_size=12)
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.fixture(scope='module')
+def bitmap(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('bitmap') / 'primes.bin')
+    sieve.build(path, 1000, workers=1, segment_size=16)
+    with sieve.PrimeBitmap(path) as bitmap:
+        yield bitmap
+
+
+def test_ranges(bitmap):
+    primes = _reference(1000)
+    for start, stop in ((0, 10), (2, 3), (3, 3), (-5, 2), (14, 16), (17, 18), (90, 98), (500, 1000), (997, 998)):
+        expected = [p for p in primes if start <= p < stop]
+        assert list(bitmap.primes(start, stop)) == expected, (start, stop)
+        assert bitmap.count(start, stop) == len(expected), (start, stop)
+    assert bitmap.count(100, 50) == 0
+
+
+def test_next_prime(bitmap):
+    assert [bitmap.next_prime(n) for n in (-3, 0, 1, 2, 3, 7, 8, 13, 996)] == [2, 2, 2, 3, 5, 11, 11, 17, 997]
+    with pytest.raises(ValueError, match='no prime after 997'):
+        bitmap.next_prime(997)
+
+
+def test_the_limit_is_checked(bitmap):
+    assert bitmap.is_prime(997)
+    with pytest.raises(ValueError, match='past the limit'):
+        bitmap.is_prime(1001)
+    with pytest.raises(ValueError):
+        bitmap.count(2, 1001)
+
+
+def test_invalid_files_are_refused(tmp_path):
+    path = tmp_path / 'primes.bin'
+    sieve.build(str(path), 1000, workers=1)
+    data = path.read_bytes()
+
+    for content in (b'', b'not a bitmap at all', data[:-1], data + b'\x00', sieve.HEADER.pack(sieve.MAGIC, 2)):
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            sieve.PrimeBitmap(str(path))
+
+
+def test_small_primes():
+    assert sieve.small_primes(0) == sieve.small_primes(2) == []
+    assert sieve.small_primes(3) == [2]
+    assert sieve.small_primes(12) == [2, 3, 5, 7, 11]
+    assert sieve.small_primes(1000) == _reference(1000)
+
+
+def test_default_rebuilds_a_corrupt_file(tmp_path, monkeypatch):
+    monkeypatch.setenv('PKC_SIEVE_DIR', str(tmp_path))
+    path = tmp_path / f'primes-{sieve.DEFAULT_LIMIT}.bin'
+    path.write_bytes(sieve.HEADER.pack(sieve.MAGIC, sieve.DEFAULT_LIMIT) + bytes(10))
+    sieve.default.cache_clear()
+    try:
+        bitmap = sieve.default()
+        assert bitmap.path == str(path)
+        assert bitmap.limit == sieve.DEFAULT_LIMIT
+        assert bitmap.count(2, 1000) == 168
+        assert sieve.default() is bitmap
+        bitmap.close()
+    finally:
+        # the other tests get the bitmap of the session directory
+        sieve.default.cache_clear()
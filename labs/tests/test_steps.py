@@ -0,0 +1,136 @@
+import importlib
+import io
+
+import pytest
+
+from assignments.B.fermat import Fermat
+from assignments.B.pollard import Pollard
+from assignments.render import Renderer
+from assignments.steps import FermatIteration, FermatResult, FermatStart, MillerRabinDecomposition, \
+    MillerRabinError, MillerRabinIteration, MillerRabinResult, MillerRabinStart, PollardIteration, PollardResult, \
+    PollardStart
+from assignments.utils import Style
+
+miller_rabin_module = importlib.import_module('assignments.A.miller-rabin')
+
+
+def _is_prime(number: int) -> bool:
+    return number > 1 and all(number % d for d in range(2, int(number ** 0.5) + 1))
+
+
+# ------------------------------------------------------------------ Fermat
+
+
+def test_fermat_steps():
+    # 5959 = 59 * 101: t0 = 77, and 80^2 - 5959 = 21^2
+    assert list(Fermat.steps(5959, 5)) == [
+        FermatStart(5959, 77, 5),
+        FermatIteration(1, 125, False),
+        FermatIteration(2, 282, False),
+        FermatIteration(3, 441, True),
+        FermatResult(21, 80, 59, 101),
+    ]
+
+
+def test_fermat_algorithm():
+    assert Fermat.algorithm(5959) == (59, 101)
+    assert Fermat.algorithm(5959, iteration_count=2) is None
+    assert list(Fermat.steps(5959, 2, trace=False)) == [FermatResult(None, None, None, None)]
+
+
+# ------------------------------------------------------------------ Pollard
+
+
+def test_pollard_steps():
+    # x1, x2, ... = 5, 26, 677, 7474, 2839, 871 mod 8051, and (871 - 677, 8051) = 97
+    assert list(Pollard.steps(8051, iteration_count=5)) == [
+        PollardStart(8051, 5),
+        PollardIteration(1, 5, 26, 1),
+        PollardIteration(3, 677, 7474, 1),
+        PollardIteration(5, 2839, 871, 97),
+        PollardResult(97, 83, 97),
+    ]
+
+
+def test_pollard_algorithm():
+    assert Pollard.algorithm(8051) == (83, 97)
+    assert Pollard.algorithm(8051, iteration_count=2) is None
+    # the sequence of a prime cycles without a proper divisor
+    assert Pollard.algorithm(101, iteration_count=50) is None
+
+
+# ------------------------------------------------------------------ Miller-Rabin
+
+
+def test_miller_rabin_agrees_with_trial_division():
+    for number in range(3, 5000, 2):
+        assert miller_rabin_module.miller_rabin(number) == _is_prime(number), number
+    for prime in (97, 65537, 2 ** 31 - 1):
+        assert miller_rabin_module.miller_rabin(prime)
+
+
+def test_miller_rabin_rejects_the_numbers_out_of_its_conditions():
+    for number in (0, 1, 2, 10):
+        with pytest.raises(ValueError, match='Condition not met'):
+            miller_rabin_module.miller_rabin(number)
+
+
+def test_miller_rabin_steps():
+    # 97 - 1 = 2^5 * 3
+    steps = list(miller_rabin_module.miller_rabin_steps(97))
+    assert steps[:2] == [MillerRabinStart(97), MillerRabinDecomposition(5, 3)]
+    iterations = [step for step in steps if isinstance(step, MillerRabinIteration)]
+    assert [(step.k, step.a, step.is_possibly_prime) for step in iterations] == [(1, 2, True), (2, 3, True),
+                                                                                (3, 5, True)]
+    assert iterations[0].sequence == (8, 64, 22, 96, 1, 1)
+    assert steps[-1] == MillerRabinResult(97, True)
+
+    assert list(miller_rabin_module.miller_rabin_steps(8, trace=False)) == [MillerRabinError('n odd')]
+    assert list(miller_rabin_module.miller_rabin_steps(91, trace=False)) == [MillerRabinResult(91, False)]
+
+
+def test_repeated_squaring_agrees_with_pow():
+    for base, exponent, modulus in ((2, 0, 7), (3, 1, 7), (-5, 13, 97), (123456789, 65537, 2 ** 61 - 1)):
+        assert miller_rabin_module.repeated_squaring_modular_exponentiation(base, exponent, modulus) \
+            == pow(base, exponent, modulus)
+
+
+# ------------------------------------------------------------------ rendering
+
+
+def _render(steps) -> tuple[tuple, str]:
+    output = io.StringIO()
+    last = Renderer(output).render(steps)
+    return last, output.getvalue().replace(Style.YELLOW, '').replace(Style.RESET, '')
+
+
+def test_renderer_fills_the_steps_not_run():
+    last, output = _render(Pollard.steps(8051, iteration_count=4))
+    assert last == PollardResult(97, 83, 97)
+    assert 'n = 8051' in output
+    assert '(x₆ - x₃, n) = 97' in output
+    assert output.count('= x') == 3
+    assert 'are (in increasing order!) 83 and 97' in output
+
+    last, output = _render(Fermat.steps(5959, 4))
+    assert last == FermatResult(21, 80, 59, 101)
+    assert 't = t0 + 4: t² - n = x   perfect square (yes/no) = x' in output
+
+
+def test_renderer_reports_no_factors():
+    _, output = _render(Fermat.steps(5959, 2))
+    assert 'No factors were found' in output
+
+
+def test_renderer_shows_the_expected_number_of_terms():
+    _, output = _render(miller_rabin_module.miller_rabin_steps(7))
+    # 7 - 1 = 2 * 3: 2 terms computed, the 3 others of the 5 expected are "x"
+    assert 'n is prime (yes/no)= yes' in output
+    assert output.count('= x') == 3 * 3 + 8
+
+
+def test_untraced_algorithms_do_not_print(capsys):
+    Fermat.algorithm(5959)
+    Pollard.algorithm(8051)
+    miller_rabin_module.miller_rabin(97)
+    assert capsys.readouterr().out == ''